@@ -1,3 +1,4 @@
+import hmac
 import os
 import sys
 import logging
@@ -7,7 +8,7 @@ from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 from flask import (
     Flask, jsonify, request, render_template, redirect, url_for, flash,
-    make_response, has_request_context, session, Response, current_app, abort, send_from_directory
+    make_response, has_request_context, session, Response, current_app, abort, send_from_directory, g
 )
 from flask_session import Session
 from flask_cors import CORS
@@ -16,7 +17,7 @@ from dotenv import load_dotenv
 from functools import wraps
 from pymongo import MongoClient
 import certifi
-from flask_login import LoginManager, login_required, current_user, UserMixin, logout_user
+from flask_login import LoginManager, login_required, current_user, UserMixin, logout_user, user_logged_in, user_logged_out
 from flask_wtf.csrf import CSRFProtect, CSRFError
 from flask_babel import Babel
 from flask_compress import Compress
@@ -24,10 +25,25 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from blueprints.users.routes import get_post_login_redirect
 from utils import (
-    get_mongo_db, logger, initialize_tools_with_urls, generate_tools_with_urls,
-    TRADER_TOOLS, TRADER_NAV, ADMIN_TOOLS, ADMIN_NAV, format_date
+    get_mongo_db, logger, get_navigation_tables, format_date, get_entitlement
 )
+from helpers.breadcrumb_helper import get_breadcrumb_role_group
+from helpers.logging_helpers import configure_logging, reset_log_context, queue_depth as log_queue_depth
+from helpers.session_interface import CoalescingMongoDBSessionInterface
+from helpers.query_metrics import init_query_metrics
+from helpers.slow_queries import init_slow_queries
+from helpers.metrics import init_metrics, register_queue_depth, render_metrics
+from helpers.request_profiler import init_request_profiler
+from helpers.memory_metrics import init_memory_metrics
+from helpers.fragment_cache import init_fragment_cache
+from helpers.conditional_get import init_conditional_get
+from helpers.page_cache import init_page_cache
+from helpers.static_assets import init_static_assets
+from helpers.service_worker import init_service_worker
+from helpers.json_provider import init_json_provider
+from helpers.profile_pictures import init_profile_pictures
 from translations import register_translation, trans, get_translations, get_all_translations, get_module_translations
+from translations.jinja_extension import configure_template_translations
 
 # Load environment variables
 load_dotenv()
@@ -60,7 +76,7 @@ def custom_login_required(f):
         if not current_user.is_authenticated:
             logger.info("Redirecting unauthenticated user to login", extra={'session_id': session.get('sid', 'no-session-id'), 'ip_address': request.remote_addr})
             return redirect(url_for('users.login', next=request.url))
-        if not current_user.is_trial_active():
+        if not get_entitlement().can_interact:
             logger.info(f"User {current_user.id} trial expired, redirecting to subscription", extra={'session_id': session.get('sid', 'no-session-id'), 'ip_address': request.remote_addr})
             return redirect(url_for('subscribe_bp.subscribe'))
         return f(*args, **kwargs)
@@ -76,28 +92,8 @@ def ensure_session_id(f):
                 session['last_activity'] = datetime.now(timezone.utc).isoformat()
                 session.modified = True
                 logger.info(f'New session ID generated: {session["sid"]}', extra={'session_id': session["sid"], 'ip_address': request.remote_addr})
-            else:
-                session_id = session.get('sid')
-                db = get_mongo_db()
-                mongo_session = db.sessions.find_one({'_id': session_id})
-                if not mongo_session and current_user.is_authenticated:
-                    logger.info(f'Invalid session {session_id} for user {current_user.id}, logging out', extra={'session_id': session_id, 'ip_address': request.remote_addr})
-                    logout_user()
-                    session.clear()
-                    session['lang'] = session.get('lang', 'en')
-                    session['sid'] = str(uuid.uuid4())
-                    session['is_anonymous'] = True
-                    session['last_activity'] = datetime.now(timezone.utc).isoformat()
-                    flash('Your session has timed out.', 'warning')
-                    response = make_response(redirect(url_for('users.login')))
-                    response.set_cookie(
-                        current_app.config['SESSION_COOKIE_NAME'],
-                        '',
-                        expires=0,
-                        httponly=True,
-                        secure=current_app.config.get('SESSION_COOKIE_SECURE', True)
-                    )
-                    return response
+            # A session whose server-side copy has expired comes back without
+            # Flask-Login's user id, so no separate lookup in db.sessions is needed.
             session['last_activity'] = datetime.now(timezone.utc).isoformat()
             session.modified = True
         except Exception as e:
@@ -116,24 +112,10 @@ def ensure_session_id(f):
     return decorated_function
 
 def setup_logging(app):
-    handler = logging.StreamHandler(sys.stderr)
-    handler.setLevel(logging.INFO)
-    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s [session: %(session_id)s, role: %(user_role)s, ip: %(ip_address)s]'))
-    root_logger = logging.getLogger('bizcore_app')
-    root_logger.handlers = []
-    root_logger.addHandler(handler)
-    flask_logger = logging.getLogger('flask')
-    werkzeug_logger = logging.getLogger('werkzeug')
-    pymongo_logger = logging.getLogger('pymongo')
-    flask_logger.handlers = []
-    werkzeug_logger.handlers = []
-    pymongo_logger.handlers = []
-    flask_logger.addHandler(handler)
-    werkzeug_logger.addHandler(handler)
-    pymongo_logger.addHandler(handler)
-    flask_logger.setLevel(logging.INFO)
-    werkzeug_logger.setLevel(logging.INFO)
-    pymongo_logger.setLevel(logging.INFO)
+    configure_logging(['bizcore_app', 'flask', 'werkzeug', 'pymongo'], level=logging.INFO, stream=sys.stderr)
+    # The role in the cached log context changes when a user logs in or out
+    user_logged_in.connect(reset_log_context, app)
+    user_logged_out.connect(reset_log_context, app)
     logger.info('Logging setup complete', extra={'session_id': 'none', 'user_role': 'none', 'ip_address': 'none'})
 
 def check_mongodb_connection(app):
@@ -146,6 +128,9 @@ def check_mongodb_connection(app):
         logger.error(f'MongoDB connection failed: {str(e)}', extra={'session_id': 'none', 'user_role': 'none', 'ip_address': 'none'})
         return False
 
+# Signed-in sessions end after this long without a request (check_session_timeout)
+SESSION_IDLE_TIMEOUT = timedelta(minutes=30)
+
 def setup_session(app):
     try:
         with app.app_context():
@@ -155,12 +140,21 @@ def setup_session(app):
                 app.config['SESSION_MONGODB_DB'] = 'bizdb'
                 app.config['SESSION_MONGODB_COLLECT'] = 'sessions'
                 app.config['SESSION_PERMANENT'] = False
-                app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(minutes=30)
+                app.config['PERMANENT_SESSION_LIFETIME'] = SESSION_IDLE_TIMEOUT
                 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
                 app.config['SESSION_COOKIE_SECURE'] = os.getenv('FLASK_ENV', 'development') == 'production'
                 app.config['SESSION_COOKIE_HTTPONLY'] = True
                 app.config['SESSION_COOKIE_NAME'] = 'bizcore_session'
                 flask_session.init_app(app)
+                # Only write the session document when its contents change (see helpers.session_interface)
+                app.session_interface = CoalescingMongoDBSessionInterface(
+                    app,
+                    client=app.config['SESSION_MONGODB'],
+                    key_prefix=app.config.get('SESSION_KEY_PREFIX', 'session:'),
+                    permanent=app.config['SESSION_PERMANENT'],
+                    db=app.config['SESSION_MONGODB_DB'],
+                    collection=app.config['SESSION_MONGODB_COLLECT']
+                )
                 db = app.extensions['mongo']['bizdb']
                 db.sessions.create_index("created_at", expireAfterSeconds=1800)
                 logger.info(f'Session configured: type={app.config["SESSION_TYPE"]}', extra={'session_id': 'none', 'user_role': 'none', 'ip_address': 'none'})
@@ -176,7 +170,7 @@ def setup_session(app):
         logger.info('Session configured with filesystem fallback', extra={'session_id': 'none', 'user_role': 'none', 'ip_address': 'none'})
 
 class User(UserMixin):
-    def __init__(self, id, email, display_name=None, role='trader', is_trial=True, trial_start=None, trial_end=None, is_subscribed=False, subscription_plan=None, subscription_start=None, subscription_end=None):
+    def __init__(self, id, email, display_name=None, role='trader', is_trial=True, trial_start=None, trial_end=None, is_subscribed=False, subscription_plan=None, subscription_start=None, subscription_end=None, data_version=0, data_versions=None, profile_picture=None, profile_picture_hash=None, user_doc=None):
         self.id = id
         self.email = email
         self.display_name = display_name or id
@@ -188,12 +182,26 @@ class User(UserMixin):
         self.subscription_plan = subscription_plan
         self.subscription_start = subscription_start
         self.subscription_end = subscription_end
+        # Bumped on data writes (helpers.data_versions); used by cache keys and ETags
+        self.data_version = data_version
+        self.data_versions = data_versions or {}
+        # For the header avatar (helpers.profile_pictures)
+        self.profile_picture = profile_picture
+        self.profile_picture_hash = profile_picture_hash
+        # The users document this was loaded from; get(), settings and
+        # is_active read it instead of querying on every access
+        self._user_doc = user_doc
+
+    def _load_doc(self):
+        if self._user_doc is None:
+            with current_app.app_context():
+                self._user_doc = current_app.extensions['mongo']['bizdb'].users.find_one({'_id': self.id}) or {}
+        return self._user_doc
 
     def get(self, key, default=None):
         try:
-            with current_app.app_context():
-                user = current_app.extensions['mongo']['bizdb'].users.find_one({'_id': self.id})
-                return user.get(key, default) if user else default
+            user = self._load_doc()
+            return user.get(key, default) if user else default
         except Exception as e:
             logger.error(f'Error fetching user data for {self.id}: {str(e)}', extra={'session_id': session.get('sid', 'no-session-id'), 'ip_address': request.remote_addr})
             return default
@@ -201,16 +209,15 @@ class User(UserMixin):
     @property
     def settings(self):
         try:
-            with current_app.app_context():
-                user = current_app.extensions['mongo']['bizdb'].users.find_one({'_id': self.id})
-                if user and 'settings' in user:
-                    return user['settings']
-                return {
-                    'show_kobo': True,
-                    'incognito_mode': False,
-                    'app_sounds': True,
-                    'activity_sidebar_enabled': True
-                }
+            user = self._load_doc()
+            if user and 'settings' in user:
+                return user['settings']
+            return {
+                'show_kobo': True,
+                'incognito_mode': False,
+                'app_sounds': True,
+                'activity_sidebar_enabled': True
+            }
         except Exception as e:
             logger.error(f'Error fetching user settings for {self.id}: {str(e)}', extra={'session_id': session.get('sid', 'no-session-id'), 'ip_address': request.remote_addr})
             return {
@@ -223,9 +230,8 @@ class User(UserMixin):
     @property
     def is_active(self):
         try:
-            with current_app.app_context():
-                user = current_app.extensions['mongo']['bizdb'].users.find_one({'_id': self.id})
-                return user.get('is_active', True) if user else False
+            user = self._load_doc()
+            return user.get('is_active', True) if user else False
         except Exception as e:
             logger.error(f'Error checking active status for user {self.id}: {str(e)}', extra={'session_id': session.get('sid', 'no-session-id'), 'ip_address': request.remote_addr})
             return False
@@ -258,6 +264,11 @@ class User(UserMixin):
 
 def create_app():
     app = Flask(__name__, template_folder='templates', static_folder='static')
+    # Inline constant translations at template compile time (one compiled template per language)
+    configure_template_translations(app, bytecode_cache_dir=os.getenv('JINJA_BYTECODE_CACHE_DIR'))
+    # orjson-backed jsonify that takes ObjectId and datetime as they come from pymongo
+    init_json_provider(app)
+    init_profile_pictures(app)
     CORS(app, resources={r"/api/*": {"origins": "*"}})
 
     # Load configuration
@@ -280,18 +291,36 @@ def create_app():
     app.config['APPLICATION_ROOT'] = os.getenv('APPLICATION_ROOT', '/')
     app.config['PREFERRED_URL_SCHEME'] = os.getenv('PREFERRED_URL_SCHEME', 'https')
 
+    # Per-request Mongo command counts and Prometheus metrics; registered before the client is created
+    init_query_metrics(app)
+    init_metrics(app)
+    # Sampled/on-demand request profiling, stored in the bizdb 'profiles' GridFS bucket
+    init_request_profiler(app, lambda: app.extensions['mongo']['bizdb'])
+    # Worker RSS, and per-request peak allocation when MEMORY_TRACE is set
+    init_memory_metrics(app)
+    # Per-user cache of rendered dashboard cards (FRAGMENT_CACHE_* settings)
+    init_fragment_cache(app)
+    # Build id mixed into ETags of conditional GET views
+    init_conditional_get(app)
+    # /sw.js, generated from the static asset manifest
+    init_service_worker(app)
+
     # Initialize MongoDB
     try:
+        # MONGO_TLS=false allows a plain local mongod (benchmarks, development)
+        tls_options = {'tls': True, 'tlsCAFile': certifi.where()} if os.getenv('MONGO_TLS', 'true').lower() != 'false' else {}
         client = MongoClient(
             app.config['MONGO_URI'],
             serverSelectionTimeoutMS=5000,
-            tls=True,
-            tlsCAFile=certifi.where(),
             maxPoolSize=50,
-            minPoolSize=5
+            minPoolSize=5,
+            **tls_options
         )
         app.extensions = getattr(app, 'extensions', {})
         app.extensions['mongo'] = client
+        slow_query_recorder = init_slow_queries(app, client, db_name='bizdb')
+        register_queue_depth('logging', log_queue_depth)
+        register_queue_depth('slow_queries', slow_query_recorder.queue_depth)
         client.admin.command('ping')
         logger.info('MongoDB client initialized successfully', extra={'session_id': 'none', 'user_role': 'none', 'ip_address': 'none'})
     except Exception as e:
@@ -300,8 +329,14 @@ def create_app():
 
     # Initialize extensions
     setup_logging(app)
+    # Fingerprinted static files are served precompressed (helpers.static_assets), which
+    # registers Flask-Compress's after_request hook itself so it can skip them
+    app.config['COMPRESS_REGISTER'] = False
     compress.init_app(app)
+    init_static_assets(app, compress)
     csrf.init_app(app)
+    # RATELIMIT_ENABLED=false for load tests, where every virtual user shares one address
+    app.config['RATELIMIT_ENABLED'] = os.getenv('RATELIMIT_ENABLED', 'true').lower() != 'false'
     limiter.init_app(app)
     babel.init_app(app)
     login_manager.init_app(app)
@@ -352,7 +387,12 @@ def create_app():
                     is_subscribed=user.get('is_subscribed', False),
                     subscription_plan=user.get('subscription_plan'),
                     subscription_start=subscription_start,
-                    subscription_end=subscription_end
+                    subscription_end=subscription_end,
+                    data_version=user.get('data_version', 0),
+                    data_versions=user.get('data_versions', {}),
+                    profile_picture=user.get('profile_picture'),
+                    profile_picture_hash=user.get('profile_picture_hash'),
+                    user_doc=user
                 )
         except Exception as e:
             logger.error(f"Error loading user {user_id}: {str(e)}", extra={'session_id': session.get('sid', 'no-session-id'), 'ip_address': request.remote_addr})
@@ -385,6 +425,8 @@ def create_app():
     from blueprints.settings.routes import settings_bp
     from blueprints.inventory.routes import inventory_bp
     from blueprints.rewards.routes import rewards_bp
+    from blueprints.api.routes import api_bp
+    from blueprints.imports.routes import imports_bp
 
     app.register_blueprint(users_bp, url_prefix='/users')
     app.register_blueprint(debtors_bp, url_prefix='/debtors')
@@ -402,6 +444,8 @@ def create_app():
     app.register_blueprint(settings_bp, url_prefix='/settings')
     app.register_blueprint(inventory_bp, url_prefix='/inventory')
     app.register_blueprint(rewards_bp, url_prefix='/rewards')
+    app.register_blueprint(api_bp, url_prefix='/api/v1')
+    app.register_blueprint(imports_bp, url_prefix='/imports')
     logger.info('Registered all blueprints including KYC, Settings, and Rewards', extra={'session_id': 'none', 'user_role': 'none', 'ip_address': 'none'})
 
     # Define format_currency filter
@@ -462,16 +506,16 @@ def create_app():
     app.jinja_env.globals['is_trial_expired'] = is_trial_expired
     logger.info("Registered is_trial_expired Jinja global", extra={'session_id': 'none', 'user_role': 'none', 'ip_address': 'none'})
 
-    # Initialize tools and navigation after blueprints
+    # Resolve tools and navigation once, on the first non-static request
     @app.before_request
     def initialize_navigation():
-        with app.app_context():
-            try:
-                initialize_tools_with_urls(app)
-                logger.info('Navigation initialized after blueprint registration', extra={'session_id': session.get('sid', 'no-session-id'), 'ip_address': request.remote_addr})
-            except Exception as e:
-                logger.error(f'Failed to initialize navigation: {str(e)}', extra={'session_id': session.get('sid', 'no-session-id'), 'ip_address': request.remote_addr})
-                raise
+        if request.endpoint == 'static':
+            return
+        try:
+            get_navigation_tables()
+        except Exception as e:
+            logger.error(f'Failed to initialize navigation: {str(e)}', extra={'session_id': session.get('sid', 'no-session-id'), 'ip_address': request.remote_addr})
+            raise
 
     # Ensure session['lang'] is set early and respected
     @app.before_request
@@ -536,32 +580,20 @@ def create_app():
 
     @app.context_processor
     def inject_globals():
-        def build_nav(nav_template):
-            try:
-                return generate_tools_with_urls(nav_template)
-            except Exception as e:
-                logger.error(f"Error building nav: {e}")
-                return []
         nav = []
         tools = []
         breadcrumb_items = []
 
         if current_user.is_authenticated:
             role = getattr(current_user, 'role', 'trader')
-            if role == 'admin':
-                nav = build_nav(ADMIN_NAV)
-                tools = build_nav(ADMIN_TOOLS)
-            else:
-                nav = build_nav(TRADER_NAV)
-                tools = build_nav(TRADER_TOOLS)
-
-            # Generate breadcrumb items
             try:
-                from helpers.breadcrumb_helper import get_breadcrumb_items
-                breadcrumb_items = get_breadcrumb_items()
+                tables = get_navigation_tables()
+                nav_role = 'admin' if role == 'admin' else 'trader'
+                nav = tables['nav'][nav_role]
+                tools = tables['tools'][nav_role]
+                breadcrumb_items = tables['breadcrumbs'][get_breadcrumb_role_group(role)].get(request.endpoint, [])
             except Exception as e:
-                logger.error(f"Error generating breadcrumb items: {e}")
-                breadcrumb_items = []
+                logger.error(f"Error building nav: {e}")
 
         return {
             'current_year': datetime.now(timezone.utc).year,
@@ -574,6 +606,7 @@ def create_app():
             'navigation': nav,
             'tools': tools,
             'breadcrumb_items': breadcrumb_items,
+            'entitlement': get_entitlement() if has_request_context() else None,
         }
 
     @app.route('/')
@@ -581,9 +614,8 @@ def create_app():
     def index():
         try:
             current_app.logger.info(
-                f"Accessing root route - User: {current_user.id if current_user.is_authenticated else 'Anonymous'}, "
-                f"Authenticated: {current_user.is_authenticated}, Session: {dict(session)}",
-                extra={'session_id': session.get('sid', 'no-session-id'), 'ip_address': request.remote_addr}
+                "Accessing root route - User: %s, Authenticated: %s",
+                current_user.id if current_user.is_authenticated else 'Anonymous', current_user.is_authenticated
             )
             if current_user.is_authenticated:
                 return redirect(get_post_login_redirect(current_user.role))
@@ -608,6 +640,18 @@ def create_app():
             status['details'] = str(e)
             return jsonify(status), 500
 
+    @app.route('/metrics')
+    def metrics():
+        # Scrapers authenticate with the METRICS_TOKEN bearer token; without one
+        # configured the endpoint does not exist
+        token = os.getenv('METRICS_TOKEN')
+        if not token:
+            abort(404)
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            abort(401)
+        body, content_type = render_metrics()
+        return Response(body, mimetype=content_type.split(';')[0], content_type=content_type)
+
     @app.route('/google489486b6f031d46f.html')
     def google_site_verification():
         return send_from_directory(
@@ -634,18 +678,22 @@ def create_app():
             return render_template('view_data.html',
                                  records=list(records),
                                  cashflows=list(cashflows),
-                                 is_trial_active=current_user.is_trial_active())
+                                 is_trial_active=get_entitlement().can_interact)
         except Exception as e:
             logger.error(f'Error fetching data for user {current_user.id}: {str(e)}', extra={'session_id': session.get('sid', 'no-session-id'), 'ip_address': request.remote_addr})
             flash('Error fetching your data.', 'danger')
             return redirect(url_for('index'))
 
+    # Exempt from CSRF: it only switches the display language, and pages served
+    # from the public page cache (helpers.page_cache) carry no CSRF token
     @app.route('/set_language/<lang>', methods=['POST'])
+    @csrf.exempt
     @ensure_session_id
     def set_language(lang):
         valid_langs = ['en', 'ha']
         lang = lang if lang in valid_langs else 'en'
         session['lang'] = lang
+        g.lang = lang
         session['last_activity'] = datetime.now(timezone.utc).isoformat()
         session.modified = True
         logger.info(f"Language set to {session['lang']} for session {session.get('sid', 'no-session-id')}", extra={'session_id': session.get('sid', 'no-session-id'), 'ip_address': request.remote_addr})
@@ -687,7 +735,7 @@ def create_app():
                 except ValueError:
                     last_activity = datetime.now(timezone.utc)
                     session['last_activity'] = last_activity.isoformat()
-            if (datetime.now(timezone.utc) - last_activity).total_seconds() > 1800:
+            if datetime.now(timezone.utc) - last_activity > SESSION_IDLE_TIMEOUT:
                 user_id = current_user.id
                 sid = session.get('sid', 'no-session-id')
                 logger.info(f"Session timeout for user {user_id}", extra={'session_id': sid, 'ip_address': request.remote_addr})
@@ -718,6 +766,9 @@ def create_app():
             session['last_activity'] = datetime.now(timezone.utc).isoformat()
             session.modified = True
 
+    # Anonymous public pages served from a full-page cache in front of the session and login machinery
+    init_page_cache(app)
+
     return app
 
 app = create_app()
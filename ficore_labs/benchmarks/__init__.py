@@ -0,0 +1,60 @@
+"""
+Micro-benchmarks for hot code paths.
+
+Run a suite from the ficore_labs directory, e.g.:
+
+    python -m benchmarks.bench_translations
+    python -m benchmarks.bench_utils
+    python -m benchmarks.bench_converters
+    python -m benchmarks.bench_reports --sizes 1000,10000
+    python -m benchmarks.bench_endpoints
+    python -m benchmarks.bench_startup
+    python -m benchmarks.check_query_budgets
+
+benchmarks.generate_tenants seeds a mongod with synthetic users and
+power-law distributed data to measure against at production scale, and
+benchmarks.loadtest drives concurrent user journeys against it under gunicorn.
+
+benchmarks.run runs the suites together and writes the results as JSON;
+benchmarks.compare diffs two result files. The report and endpoint suites
+create the full app (see benchmarks.support) against mongomock by default or a
+local mongod via --mongo-uri.
+"""
+import timeit
+
+
+def run_benchmark(name, func, number=100000, repeat=5, collect_garbage=False):
+    """
+    Time a zero-argument callable and return a result row.
+
+    Args:
+        name: Label for the benchmark case.
+        func: Callable to time.
+        number: Calls per timing run.
+        repeat: Number of timing runs; the best one is reported.
+        collect_garbage: Keep the garbage collector on while timing. timeit
+            turns it off, which lets callables that leave reference cycles
+            behind (reportlab canvases) grow until the process runs out of
+            memory.
+
+    Returns:
+        dict: name, number of calls and best per-call time in nanoseconds.
+    """
+    setup = 'gc.enable()' if collect_garbage else 'pass'
+    best = min(timeit.repeat(func, setup=setup, number=number, repeat=repeat))
+    return {'name': name, 'number': number, 'ns_per_call': best / number * 1e9}
+
+
+def format_duration(ns):
+    """Format a duration in nanoseconds with a readable unit."""
+    for unit, scale in (('s', 1e9), ('ms', 1e6), ('us', 1e3)):
+        if ns >= scale:
+            return f"{ns / scale:.2f} {unit}"
+    return f"{ns:.1f} ns"
+
+
+def print_results(results):
+    """Print benchmark rows as an aligned table."""
+    width = max(len(row['name']) for row in results)
+    for row in results:
+        print(f"{row['name']:<{width}}  {format_duration(row['ns_per_call']):>10}/call")
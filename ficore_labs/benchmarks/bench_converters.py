@@ -0,0 +1,86 @@
+"""
+Micro-benchmarks for the to_dict_* document converters.
+
+Covers the converters in models.py and the report-specific ones in
+blueprints/reports/routes.py, which additionally sanitise strings and format
+dates. Documents are shaped like pymongo returns them (naive UTC datetimes,
+ObjectId _id). The report converters normalise datetimes in place, so each
+call gets a shallow copy of its document; the copy is part of the timing.
+
+    python -m benchmarks.bench_converters
+"""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from bson import ObjectId
+from flask import Flask, session
+from flask_login import LoginManager
+
+import models
+from benchmarks import print_results, run_benchmark
+from blueprints.reports import routes as reports
+
+
+def sample_documents():
+    now = datetime(2025, 3, 14, 9, 26)
+    user_id = 'bench_trader'
+    return {
+        'feedback': {'_id': ObjectId(), 'user_id': user_id, 'session_id': 'bench', 'tool_name': 'dashboard',
+                     'rating': 4, 'comment': 'Works well', 'timestamp': now},
+        'debtor': {'_id': ObjectId(), 'user_id': user_id, 'type': 'debtor', 'name': 'Aisha Stores', 'contact': '08012345678',
+                   'amount_owed': 25000.0, 'description': 'Goods supplied on credit', 'reminder_count': 1,
+                   'created_at': now, 'updated_at': now},
+        'fund': {'_id': ObjectId(), 'user_id': user_id, 'type': 'fund', 'source': 'Angel round', 'amount': 5000000.0,
+                 'category': 'equity', 'date_received': now, 'status': 'received', 'created_at': now, 'updated_at': now},
+        'forecast': {'_id': ObjectId(), 'user_id': user_id, 'type': 'forecast', 'title': 'Q2', 'scenario': 'Base case',
+                     'projected_revenue': 1200000.0, 'projected_expenses': 800000.0, 'forecast_date': now,
+                     'period_start': now, 'period_end': now + timedelta(days=90), 'created_at': now, 'updated_at': now},
+        'investor_report': {'_id': ObjectId(), 'user_id': user_id, 'type': 'investor_report', 'title': 'Q1 update',
+                            'financial_metrics': {'revenue': 1500000.0, 'runway': '14 months'}, 'created_at': now},
+        'cashflow': {'_id': ObjectId(), 'user_id': user_id, 'type': 'receipt', 'party_name': 'Musa & Sons',
+                     'amount': 15000.5, 'method': 'cash', 'category': 'sales', 'created_at': now, 'updated_at': now},
+        'audit_log': {'_id': ObjectId(), 'admin_id': 'bench_admin', 'action': 'suspend_user',
+                      'details': {'user_id': user_id}, 'timestamp': now},
+        'kyc_record': {'_id': ObjectId(), 'user_id': user_id, 'full_name': 'Aisha Bello', 'id_type': 'NIN',
+                       'id_number': '12345678901', 'uploaded_id_photo_url': '/uploads/kyc.png', 'status': 'pending',
+                       'created_at': now, 'updated_at': now},
+        'waitlist': {'_id': ObjectId(), 'full_name': 'Aisha Bello', 'whatsapp_number': '+2348012345678',
+                     'email': 'aisha@example.com', 'business_type': 'retail', 'created_at': now, 'updated_at': now},
+        'user': SimpleNamespace(
+            id=user_id, email='bench@example.com', username=user_id, role='trader', display_name='Bench Trader',
+            is_admin=False, setup_complete=True, language='en', is_trial=True, trial_start=now,
+            trial_end=now + timedelta(days=30), is_subscribed=False, subscription_plan=None, subscription_start=None,
+            subscription_end=None, profile_picture=None, profile_picture_hash=None, phone='08012345678',
+            dark_mode=False, settings={}, security_settings={}
+        ),
+    }
+
+
+def collect(number=20000):
+    docs = sample_documents()
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'benchmark'
+    LoginManager(app)
+    with app.test_request_context('/'):
+        session['lang'] = 'en'
+        session['sid'] = 'bench'
+        return [
+            run_benchmark('models.to_dict_feedback', lambda: models.to_dict_feedback(docs['feedback']), number),
+            run_benchmark('models.to_dict_user', lambda: models.to_dict_user(docs['user']), number),
+            run_benchmark('models.to_dict_record debtor', lambda: models.to_dict_record(docs['debtor']), number),
+            run_benchmark('models.to_dict_record forecast', lambda: models.to_dict_record(docs['forecast']), number),
+            run_benchmark('models.to_dict_cashflow', lambda: models.to_dict_cashflow(docs['cashflow']), number),
+            run_benchmark('models.to_dict_audit_log', lambda: models.to_dict_audit_log(docs['audit_log']), number),
+            run_benchmark('models.to_dict_kyc_record', lambda: models.to_dict_kyc_record(docs['kyc_record']), number),
+            run_benchmark('models.to_dict_waitlist', lambda: models.to_dict_waitlist(docs['waitlist']), number),
+            run_benchmark('reports.to_dict_record', lambda: reports.to_dict_record(dict(docs['debtor'])), number),
+            run_benchmark('reports.to_dict_cashflow', lambda: reports.to_dict_cashflow(dict(docs['cashflow'])), number),
+            run_benchmark('reports.to_dict_fund', lambda: reports.to_dict_fund(dict(docs['fund'])), number),
+            run_benchmark('reports.to_dict_forecast', lambda: reports.to_dict_forecast(dict(docs['forecast'])), number),
+            run_benchmark('reports.to_dict_investor_report',
+                          lambda: reports.to_dict_investor_report(dict(docs['investor_report'])), number),
+        ]
+
+
+if __name__ == '__main__':
+    print_results(collect())
@@ -0,0 +1,69 @@
+"""
+Endpoint benchmarks through the Flask test client against a seeded database.
+
+The benchmark trader gets --cashflows cashflows and --records debtor/creditor
+records (defaults 1000 and 500); the admin dashboard is requested as the
+benchmark admin. Each endpoint is requested once first and must answer 200,
+so a redirect or error page is never timed by mistake. Timings cover the whole
+stack (hooks, session, template rendering) but not a real network or WSGI
+server.
+
+    python -m benchmarks.bench_endpoints
+    python -m benchmarks.bench_endpoints --mongo-uri mongodb://localhost:27017/bizdb --cashflows 10000
+"""
+import argparse
+
+from benchmarks import print_results, run_benchmark
+from benchmarks import support
+
+CASES = (
+    # name, user, method, path, form data
+    ('dashboard.index', 'trader', 'GET', '/dashboard/', None),
+    ('dashboard.weekly_profit_data', 'trader', 'GET', '/dashboard/weekly_profit_data', None),
+    ('reports.profit_loss GET', 'trader', 'GET', '/reports/profit_loss', None),
+    ('reports.profit_loss POST html', 'trader', 'POST', '/reports/profit_loss', {'format': 'html'}),
+    ('reports.profit_loss POST pdf', 'trader', 'POST', '/reports/profit_loss', {'format': 'pdf'}),
+    ('reports.profit_loss POST csv', 'trader', 'POST', '/reports/profit_loss', {'format': 'csv'}),
+    ('admin.dashboard', 'admin', 'GET', '/admin/dashboard', None),
+)
+
+
+def collect(app, number=20, repeat=3, cashflows=1000, records=500):
+    trader_id, admin_id = support.seed_database(app, cashflows=cashflows, records=records)
+    clients = {'trader': app.test_client(), 'admin': app.test_client()}
+    support.login(clients['trader'], trader_id)
+    support.login(clients['admin'], admin_id)
+
+    results = []
+    for name, user, method, path, data in CASES:
+        client = clients[user]
+
+        def request(client=client, method=method, path=path, data=data):
+            response = client.open(path, method=method, data=data)
+            response.get_data()
+            response.close()
+            return response
+
+        status = request().status_code
+        if status != 200:
+            raise RuntimeError(f'{name}: {method} {path} answered HTTP {status}, expected 200')
+        row = run_benchmark(name, request, number=number, repeat=repeat, collect_garbage=True)
+        row.update({'cashflows': cashflows, 'records': records})
+        results.append(row)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=20, help='Requests per timing run')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--cashflows', type=int, default=1000)
+    parser.add_argument('--records', type=int, default=500)
+    parser.add_argument('--mongo-uri', help='mongodb:// URI of a local mongod, or mongomock:// (default)')
+    args = parser.parse_args(argv)
+    app = support.load_app(args.mongo_uri)
+    print_results(collect(app, args.number, args.repeat, args.cashflows, args.records))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+Per-request logging overhead, before and after the queue-based pipeline.
+
+Each simulated request makes the same log calls a typical view does (INFO lines,
+DEBUG lines that are filtered out, one warning) through a SessionAdapter. Output
+goes to a stream that sleeps on every write (--write-latency-us, default 20) to
+stand in for a stdout pipe under back-pressure; 0 writes straight to os.devnull.
+
+- legacy: the previous adapter (session, current_user and uuid lookups on every
+  call) with a synchronous StreamHandler doing formatting and I/O inline.
+- queued: utils.SessionAdapter with context captured once per request and
+  helpers.logging_helpers.configure_logging (JSON, formatting on the listener).
+- queued+sampled: as above with the logger's INFO lines sampled at 10%.
+
+    python -m benchmarks.bench_logging
+"""
+import argparse
+import logging
+import os
+import time
+import uuid
+
+from flask import Flask, g, has_request_context, request, session
+from flask_login import LoginManager, current_user
+
+from benchmarks import print_results, run_benchmark
+from helpers.logging_helpers import configure_logging, stop_logging
+from utils import SessionAdapter
+
+class LegacySessionFormatter(logging.Formatter):
+    def format(self, record):
+        record.session_id = getattr(record, 'session_id', 'no-session-id')
+        record.ip_address = getattr(record, 'ip_address', 'unknown')
+        record.user_role = getattr(record, 'user_role', 'anonymous')
+        return super().format(record)
+
+class LegacySessionAdapter(logging.LoggerAdapter):
+    """The adapter as it was before context was captured once per request."""
+
+    def process(self, msg, kwargs):
+        kwargs['extra'] = kwargs.get('extra', {})
+        session_id = 'no-session-id'
+        ip_address = 'unknown'
+        user_role = 'anonymous'
+        try:
+            if has_request_context():
+                session_id = session.get('sid', 'no-session-id')
+                ip_address = request.remote_addr
+                user_role = current_user.role if current_user.is_authenticated else 'anonymous'
+            else:
+                session_id = f'non-request-{str(uuid.uuid4())[:8]}'
+        except Exception as e:
+            session_id = f'session-error-{str(uuid.uuid4())[:8]}'
+            kwargs['extra']['session_error'] = str(e)
+        kwargs['extra']['session_id'] = session_id
+        kwargs['extra']['ip_address'] = ip_address
+        kwargs['extra']['user_role'] = user_role
+        return msg, kwargs
+
+class SlowStream:
+    """Write-only stream that blocks for a fixed time on every write."""
+
+    def __init__(self, target, latency_s):
+        self.target = target
+        self.latency_s = latency_s
+
+    def write(self, data):
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return self.target.write(data)
+
+    def flush(self):
+        self.target.flush()
+
+def make_app():
+    app = Flask(__name__)
+    app.secret_key = 'benchmark'
+    LoginManager(app).user_loader(lambda user_id: None)
+    return app
+
+def simulate_request(log):
+    # Each call stands for a new request: the cached log context is dropped
+    g.pop('log_context', None)
+    user_id = 'trader1'
+    log.info("Accessing dashboard for user %s", user_id, extra={'user_id': user_id})
+    log.debug("User %s allowed to interact: Active trial", user_id)
+    log.info("Fetched %d recent records for user %s", 5, user_id)
+    log.debug("User %s allowed to interact: Active trial", user_id)
+    log.info("Fetched %d notifications for user %s", 3, user_id)
+    log.info("Computed weekly profit for user %s", user_id)
+    log.warning("Slow query for user %s: %d ms", user_id, 250)
+    log.info("Rendered dashboard for user %s", user_id)
+
+def collect(number=2000, write_latency_us=20):
+    app = make_app()
+    results = []
+    devnull = open(os.devnull, 'w')
+    stream = SlowStream(devnull, write_latency_us / 1e6)
+    base = logging.getLogger('bench_logging')
+    base.propagate = False
+
+    with app.test_request_context('/dashboard/', environ_base={'REMOTE_ADDR': '10.0.0.1'}):
+        session['sid'] = 'bench-session'
+
+        base.handlers = [logging.NullHandler()]
+        base.setLevel(logging.CRITICAL)
+        baseline = run_benchmark('baseline (logging disabled)', lambda: simulate_request(SessionAdapter(base, {})), number=number)
+        results.append(baseline)
+
+        legacy_handler = logging.StreamHandler(stream)
+        legacy_handler.setFormatter(LegacySessionFormatter(
+            '[%(asctime)s] %(levelname)s in %(name)s: %(message)s [session: %(session_id)s, role: %(user_role)s, ip: %(ip_address)s]'
+        ))
+        base.handlers = [legacy_handler]
+        base.setLevel(logging.INFO)
+        legacy = LegacySessionAdapter(base, {})
+        results.append(run_benchmark('legacy (sync handler, per-call context)', lambda: simulate_request(legacy), number=number))
+
+        queued = SessionAdapter(base, {})
+        configure_logging(['bench_logging'], stream=stream, log_format='json', sample_rates={})
+        results.append(run_benchmark('queued (listener thread, per-request context)', lambda: simulate_request(queued), number=number))
+
+        configure_logging(['bench_logging'], stream=stream, log_format='json', sample_rates={'bench_logging': 0.1})
+        results.append(run_benchmark('queued + 10% INFO sampling', lambda: simulate_request(queued), number=number))
+
+        stop_logging()
+    devnull.close()
+    for row in results[1:]:
+        row['overhead_ns_per_request'] = row['ns_per_call'] - baseline['ns_per_call']
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Per-request logging overhead')
+    parser.add_argument('--number', type=int, default=2000)
+    parser.add_argument('--write-latency-us', type=float, default=20)
+    args = parser.parse_args()
+    results = collect(args.number, args.write_latency_us)
+    print_results(results)
+    for row in results[1:]:
+        print(f"{row['name']}: {row['overhead_ns_per_request'] / 1000:.1f} us logging overhead per request")
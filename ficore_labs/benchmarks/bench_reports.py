@@ -0,0 +1,81 @@
+"""
+PDF and CSV report generators at increasing row counts.
+
+Every generate_* function in blueprints/reports/routes.py is timed on inputs
+of each size (default 1k, 10k and 100k rows), built the way the views build
+them: documents passed through the matching to_dict_* converter. Generators
+run in a request context with the benchmark trader logged in, since they read
+current_user for the branding header. Conversion is not part of the timing.
+The PDF generators draw the branded header (with its logo image) on every
+page, so the 100k-row PDF cases take minutes each; use --sizes for quick runs.
+
+    python -m benchmarks.bench_reports --sizes 1000,10000
+    python -m benchmarks.bench_reports --mongo-uri mongodb://localhost:27017/bizdb
+"""
+import argparse
+
+from benchmarks import print_results, run_benchmark
+from benchmarks import support
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+
+def build_inputs(size):
+    """Generator inputs for size rows, keyed by report name."""
+    from blueprints.reports import routes as reports
+    user_id = support.BENCH_USER_ID
+    return {
+        'profit_loss': [reports.to_dict_cashflow(doc) for doc in support.make_cashflow_docs(user_id, size)],
+        'debtors_creditors': [reports.to_dict_record(doc) for doc in support.make_record_docs(user_id, size)],
+        'funds': [reports.to_dict_fund(doc) for doc in support.make_fund_docs(user_id, size)],
+        'forecasts': [reports.to_dict_forecast(doc) for doc in support.make_forecast_docs(user_id, size)],
+        'investor_reports': [reports.to_dict_investor_report(doc) for doc in support.make_investor_report_docs(user_id, size)],
+        'customer_report': support.make_customer_report_rows(size),
+    }
+
+
+def collect(app, sizes=DEFAULT_SIZES, repeat=3, only=None):
+    """
+    Args:
+        app: Application from support.load_app().
+        sizes: Row counts to benchmark.
+        repeat: Timing runs per case below 100k rows (one run at 100k and above).
+        only: Optional substring; only reports whose name contains it run.
+    """
+    from blueprints.reports import routes as reports
+    support.seed_database(app, cashflows=0, records=0)
+    results = []
+    with support.user_request_context(app, support.BENCH_USER_ID):
+        for size in sizes:
+            inputs = build_inputs(size)
+            for report, rows in inputs.items():
+                if only and only not in report:
+                    continue
+                for fmt in ('pdf', 'csv'):
+                    generate = getattr(reports, f'generate_{report}_{fmt}')
+                    row = run_benchmark(
+                        f'{report} {fmt} {size} rows', lambda: generate(rows),
+                        number=1, repeat=repeat if size < 100000 else 1, collect_garbage=True
+                    )
+                    row['rows'] = size
+                    results.append(row)
+    return results
+
+
+def parse_sizes(value):
+    return tuple(int(size) for size in value.split(',') if size.strip())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=parse_sizes, default=DEFAULT_SIZES, help='Comma-separated row counts')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', help='Only reports whose name contains this')
+    parser.add_argument('--mongo-uri', help='mongodb:// URI of a local mongod, or mongomock:// (default)')
+    args = parser.parse_args(argv)
+    app = support.load_app(args.mongo_uri)
+    print_results(collect(app, args.sizes, args.repeat, args.only))
+
+
+if __name__ == '__main__':
+    main()
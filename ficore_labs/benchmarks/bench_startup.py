@@ -0,0 +1,117 @@
+"""
+Startup import profiler and import-time budget.
+
+Imports every blueprint and the shared modules in a fresh interpreter with
+``-X importtime`` (app.py itself is skipped because importing it builds the
+app and connects to MongoDB), then reports per-module and per-package import
+cost. Exits with status 1 when the total exceeds the budget or when a module
+that should only load on first use was imported at startup.
+
+    python -m benchmarks.bench_startup [--budget-ms 600] [--top 25]
+
+The budget can also be set with IMPORT_TIME_BUDGET_MS.
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+STARTUP_MODULES = [
+    'utils',
+    'models',
+    'translations',
+    'notifications.routes',
+    'blueprints.users.routes',
+    'blueprints.debtors.routes',
+    'blueprints.creditors.routes',
+    'blueprints.payments.routes',
+    'blueprints.receipts.routes',
+    'blueprints.reports.routes',
+    'blueprints.admin.routes',
+    'blueprints.dashboard.routes',
+    'blueprints.general.routes',
+    'blueprints.business.routes',
+    'blueprints.subscribe.routes',
+    'blueprints.kyc.routes',
+    'blueprints.settings.routes',
+    'blueprints.inventory.routes',
+    'blueprints.rewards.routes',
+]
+
+# Modules that must only be imported when first used
+DEFERRED_MODULES = ['reportlab', 'PIL', 'requests']
+
+DEFAULT_BUDGET_MS = 600
+
+
+def profile_imports(modules=STARTUP_MODULES):
+    """
+    Import modules in a fresh interpreter and collect -X importtime output.
+
+    Returns:
+        tuple: (rows, loaded_deferred) where rows is a list of
+        (module, self_us, cumulative_us, depth) and loaded_deferred lists the
+        DEFERRED_MODULES that were imported.
+    """
+    code = (
+        "import importlib, sys\n"
+        f"for name in {modules!r}:\n"
+        "    importlib.import_module(name)\n"
+        f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=root, capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    loaded_deferred = [m for m in result.stdout.strip().split(',') if m]
+    return rows, loaded_deferred
+
+
+def summarize(rows):
+    """Return total self time (ms) and self time per top-level package (ms)."""
+    per_package = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        per_package[name.split('.')[0]] += self_us
+    total_ms = sum(per_package.values()) / 1000
+    return total_ms, {pkg: us / 1000 for pkg, us in per_package.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget-ms', type=float, default=float(os.getenv('IMPORT_TIME_BUDGET_MS', DEFAULT_BUDGET_MS)))
+    parser.add_argument('--top', type=int, default=25)
+    args = parser.parse_args(argv)
+
+    rows, loaded_deferred = profile_imports()
+    total_ms, per_package = summarize(rows)
+
+    print(f"Slowest modules by self time (top {args.top}):")
+    for name, self_us, cumulative_us, _ in sorted(rows, key=lambda r: r[1], reverse=True)[:args.top]:
+        print(f"  {name:<60} self {self_us / 1000:8.1f} ms  cumulative {cumulative_us / 1000:8.1f} ms")
+
+    print(f"\nSlowest packages (top {args.top}):")
+    for pkg, ms in sorted(per_package.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {pkg:<60} {ms:8.1f} ms")
+
+    print(f"\nTotal import time: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    failed = False
+    if total_ms > args.budget_ms:
+        print("FAIL: import-time budget exceeded")
+        failed = True
+    if loaded_deferred:
+        print(f"FAIL: modules imported at startup that should load on first use: {', '.join(loaded_deferred)}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
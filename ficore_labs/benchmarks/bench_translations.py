@@ -0,0 +1,39 @@
+"""
+Micro-benchmarks for translations.trans().
+
+Covers hits in each language, English fallback, misses (with and without a
+default) and calls with format kwargs, both outside and inside a request.
+"""
+from flask import Flask, session
+from translations import trans, register_translation
+from benchmarks import run_benchmark, print_results
+
+
+def collect(number=100000):
+    results = [
+        run_benchmark('trans hit en', lambda: trans('general_login', lang='en'), number),
+        run_benchmark('trans hit ha', lambda: trans('general_login', lang='ha'), number),
+        run_benchmark('trans hit prefixed module', lambda: trans('receipts_dashboard', lang='ha'), number),
+        run_benchmark('trans miss', lambda: trans('bench_missing_key', lang='en'), number),
+        run_benchmark('trans miss with default', lambda: trans('bench_missing_key', lang='ha', default='Fallback'), number),
+        run_benchmark('trans invalid lang', lambda: trans('general_login', lang='xx'), number),
+        run_benchmark('trans format kwargs', lambda: trans('bench_format_key', lang='en', default='Hello {name}', name='Ada'), number),
+        run_benchmark('trans format missing kwarg', lambda: trans('bench_format_key', lang='en', default='Hello {name}', other='x'), number),
+    ]
+
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'benchmark'
+    register_translation(app)
+    with app.test_request_context('/'):
+        session['lang'] = 'ha'
+        app.preprocess_request()
+        results.extend([
+            run_benchmark('trans hit (request lang)', lambda: trans('general_login'), number),
+            run_benchmark('trans miss (request lang)', lambda: trans('bench_missing_key'), number),
+            run_benchmark('trans format kwargs (request lang)', lambda: trans('bench_format_key', default='Hello {name}', name='Ada'), number),
+        ])
+    return results
+
+
+if __name__ == '__main__':
+    print_results(collect())
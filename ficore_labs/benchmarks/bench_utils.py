@@ -0,0 +1,46 @@
+"""
+Micro-benchmarks for the formatting and input helpers in utils.
+
+format_currency, format_date, sanitize_input and clean_currency run for every
+row of every report and table, so they are timed inside a request (as views
+call them) with typical and edge-case inputs.
+
+    python -m benchmarks.bench_utils
+"""
+from datetime import datetime, timezone
+
+from flask import Flask, session
+
+from benchmarks import print_results, run_benchmark
+from utils import clean_currency, format_currency, format_date, sanitize_input
+
+
+def collect(number=20000):
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'benchmark'
+    aware = datetime(2025, 3, 14, 9, 26, tzinfo=timezone.utc)
+    naive = datetime(2025, 3, 14, 9, 26)
+    text = '  Payment for 12 bags of rice <b>"urgent"</b>  '
+    with app.test_request_context('/'):
+        session['lang'] = 'en'
+        session['sid'] = 'bench'
+        return [
+            run_benchmark('format_currency int', lambda: format_currency(150000), number),
+            run_benchmark('format_currency float', lambda: format_currency(1234567.891), number),
+            run_benchmark('format_currency string', lambda: format_currency('₦1,234.50'), number),
+            run_benchmark('format_currency no symbol', lambda: format_currency(99.5, include_symbol=False), number),
+            run_benchmark('format_date aware', lambda: format_date(aware), number),
+            run_benchmark('format_date naive', lambda: format_date(naive), number),
+            run_benchmark('format_date iso string', lambda: format_date('2025-03-14T09:26:00+00:00'), number),
+            run_benchmark('format_date long ha', lambda: format_date(aware, lang='ha', format_type='long'), number),
+            run_benchmark('sanitize_input short', lambda: sanitize_input('Aisha Stores', max_length=100), number),
+            run_benchmark('sanitize_input markup', lambda: sanitize_input(text, max_length=100), number),
+            run_benchmark('sanitize_input long', lambda: sanitize_input(text * 40, max_length=1000), number),
+            run_benchmark('clean_currency float', lambda: clean_currency(2500.75), number),
+            run_benchmark('clean_currency string', lambda: clean_currency('NGN 2,500.75'), number),
+            run_benchmark('clean_currency empty', lambda: clean_currency(''), number),
+        ]
+
+
+if __name__ == '__main__':
+    print_results(collect())
@@ -0,0 +1,73 @@
+"""
+Check MongoDB query budgets for endpoints that declare one.
+
+Seeds the benchmark trader (benchmarks.support, mongomock by default, so no
+server is needed in CI), issues a GET to every parameterless endpoint that
+has a budget (@query_budget or QUERY_BUDGETS), and reads the query count from
+the Server-Timing header. Each endpoint is requested once, with cold caches.
+Exits with status 1 if any endpoint goes over its budget, so an N+1
+regression fails the run.
+
+    python -m benchmarks.check_query_budgets
+    python -m benchmarks.check_query_budgets --mongo-uri mongodb://localhost:27017/bizdb --user-id trader1
+
+With --user-id the named existing user is checked and nothing is seeded.
+"""
+import argparse
+import re
+import sys
+
+from benchmarks import support
+
+_COUNT_RE = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+def budgeted_endpoints(app):
+    """Yield (endpoint, rule, budget) for GET routes without URL arguments."""
+    from helpers.query_metrics import get_query_budget
+    with app.app_context():
+        for rule in app.url_map.iter_rules():
+            if rule.arguments or 'GET' not in rule.methods:
+                continue
+            budget = get_query_budget(rule.endpoint)
+            if budget is not None:
+                yield rule.endpoint, rule.rule, budget
+
+
+def check(app, user_id):
+    """Return rows of (endpoint, path, status, count, budget)."""
+    app.config['QUERY_BUDGET_STRICT'] = False
+    client = app.test_client()
+    support.login(client, user_id)
+    rows = []
+    for endpoint, path, budget in sorted(budgeted_endpoints(app)):
+        response = client.get(path)
+        match = _COUNT_RE.search(response.headers.get('Server-Timing', ''))
+        count = int(match.group(1)) if match else None
+        rows.append((endpoint, path, response.status_code, count, budget))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-uri', default=None, help='mongodb:// URI (default: BENCH_MONGO_URI or mongomock)')
+    parser.add_argument('--user-id', default=None, help='Existing user to log in as instead of the seeded trader')
+    parser.add_argument('--cashflows', type=int, default=1000, help='Cashflows to seed for the trader')
+    parser.add_argument('--records', type=int, default=500, help='Debtor/creditor records to seed for the trader')
+    args = parser.parse_args(argv)
+
+    app = support.load_app(args.mongo_uri)
+    user_id = args.user_id
+    if user_id is None:
+        user_id, _ = support.seed_database(app, cashflows=args.cashflows, records=args.records)
+    rows = check(app, user_id)
+    failed = False
+    for endpoint, path, status, count, budget in rows:
+        over = count is None or count > budget
+        failed = failed or over
+        print(f"{'FAIL' if over else 'ok  '}  {endpoint:<40} {path:<30} HTTP {status}  {count if count is not None else '?':>4} / {budget} queries")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+Compare two result files written by benchmarks.run.
+
+Cases are matched by suite and name; the ratio is new / base time per call,
+so below 1.0 is faster. Cases that changed by more than --threshold percent
+are flagged.
+
+    python -m benchmarks.compare benchmarks/results/base.json benchmarks/results/new.json
+    python -m benchmarks.compare base.json new.json --threshold 5 --fail-on-regression
+"""
+import argparse
+import json
+import sys
+
+from benchmarks import format_duration
+
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(base, new):
+    """
+    Returns:
+        list: (suite, name, base ns_per_call, new ns_per_call, ratio) for cases in both runs.
+    """
+    rows = []
+    for suite, cases in new['suites'].items():
+        base_cases = {case['name']: case for case in base['suites'].get(suite, [])}
+        for case in cases:
+            before = base_cases.get(case['name'])
+            if before is None:
+                continue
+            rows.append((suite, case['name'], before['ns_per_call'], case['ns_per_call'],
+                         case['ns_per_call'] / before['ns_per_call'] if before['ns_per_call'] else float('inf')))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('base')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=10.0, help='Percent change to flag (default 10)')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit 1 if any case got slower than the threshold')
+    args = parser.parse_args(argv)
+
+    base, new = load(args.base), load(args.new)
+    print(f"base: {base['metadata'].get('git_commit')} {base['metadata'].get('created_at')} ({base['metadata'].get('mongo')})")
+    print(f"new:  {new['metadata'].get('git_commit')} {new['metadata'].get('created_at')} ({new['metadata'].get('mongo')})")
+    rows = compare(base, new)
+    if not rows:
+        print("No cases in common")
+        return 0
+    width = max(len(f"{suite}/{name}") for suite, name, *_ in rows)
+    limit = 1 + args.threshold / 100
+    regressed = False
+    for suite, name, before, after, ratio in rows:
+        flag = ''
+        if ratio > limit:
+            flag, regressed = 'SLOWER', True
+        elif ratio < 1 / limit:
+            flag = 'faster'
+        print(f"{suite + '/' + name:<{width}}  {format_duration(before):>10}  {format_duration(after):>10}  {ratio:6.2f}x  {flag}")
+    return 1 if regressed and args.fail_on_regression else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
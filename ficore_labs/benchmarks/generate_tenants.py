@@ -0,0 +1,373 @@
+"""
+Seed a database with synthetic tenants for scale testing.
+
+Creates N users (<prefix>_00000001, ...) and, per user, records (debtor,
+creditor, inventory, fund, forecast), cashflows (receipt, payment),
+notifications, rewards, tool_usage entries and admin audit_logs about them.
+Row counts per user follow a power law: each user gets a Pareto-distributed
+activity weight (--alpha, default 1.16, the classic 80/20 split), scaled so the
+average user has --mean-records records and --mean-cashflows cashflows, capped at
+--max-rows per collection. A few heavy traders therefore hold most rows, as
+in production.
+
+Every user is generated from its own random stream derived from --seed and its
+index, so output is identical whatever --processes is, and re-running with a
+larger --users only adds users. Timestamps fall in the --days before --end-date
+(default: today, UTC midnight; pass it explicitly for byte-identical reruns).
+
+Users are split into chunks across worker processes; each worker has its own
+MongoClient and writes with unordered insert_many batches. All synthetic users
+share one password (--password) so load tests can log in as them; a synthetic
+admin <prefix>_admin is created as well.
+
+    python -m benchmarks.generate_tenants --mongo-uri mongodb://localhost:27017 --users 10000
+    python -m benchmarks.generate_tenants --mongo-uri mongodb://localhost:27017 --users 100000 \\
+        --processes 16 --batch-size 10000 --reset
+
+Run the app once against the database first so collections, validators and
+indexes exist; the documents satisfy the validators in models.py. The app has
+no 'sale' or 'expense' record types (the records validator rejects them), so
+sales and expenses are receipt and payment cashflows with a matching category.
+"""
+import argparse
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+COLLECTIONS = ('users', 'records', 'cashflows', 'notifications', 'rewards', 'tool_usage', 'audit_logs')
+
+RECORD_TYPES = (('debtor', 35), ('creditor', 25), ('inventory', 25), ('fund', 8), ('forecast', 7))
+CASHFLOW_TYPES = (('receipt', 60), ('payment', 40))
+RECEIPT_CATEGORIES = ('sales', 'sales', 'sales', 'services', 'other_income')
+PAYMENT_CATEGORIES = ('expense', 'rent', 'salaries', 'supplies', 'utilities', 'transport')
+METHODS = ('cash', 'cash', 'card', 'bank', None)
+INDUSTRIES = ('retail', 'food', 'fashion', 'agriculture', 'services', 'technology')
+FIRST_NAMES = ('Aisha', 'Musa', 'Zainab', 'Ibrahim', 'Fatima', 'Bello', 'Hauwa', 'Sani', 'Amina', 'Yusuf', 'Chinedu', 'Ngozi')
+BUSINESS_WORDS = ('Stores', 'Ventures', 'Enterprises', '& Sons', 'Farms', 'Foods', 'Textiles', 'Motors', 'Traders')
+PRODUCTS = ('Rice 50kg', 'Vegetable oil 5L', 'Sugar 1kg', 'Ankara fabric', 'Phone charger', 'Sachet water', 'Detergent', 'Yam tuber')
+NOTIFICATION_TYPES = ('info', 'info', 'warning', 'success', 'email', 'sms', 'whatsapp')
+TOOLS = ('dashboard', 'debtors', 'creditors', 'receipts', 'payments', 'inventory', 'reports', 'funds', 'forecasts')
+AUDIT_ACTIONS = ('view_user', 'update_user', 'suspend_user', 'approve_kyc', 'reset_password', 'grant_subscription')
+REWARD_TYPES = ('referral', 'milestone', 'promotion', 'loyalty')
+REWARD_STATUSES = ('pending', 'awarded', 'awarded', 'redeemed', 'expired')
+
+
+def _weighted(choices):
+    population = [value for value, _ in choices]
+    weights = [weight for _, weight in choices]
+    return population, weights
+
+
+def user_id_for(prefix, index):
+    return f'{prefix}_{index:08d}'
+
+
+def activity_weight(rng, alpha):
+    """Pareto weight normalised to mean 1 (alpha must be > 1)."""
+    return rng.paretovariate(alpha) * (alpha - 1) / alpha
+
+
+class TenantGenerator:
+    """Builds every document for one synthetic user from its own random stream."""
+
+    def __init__(self, options, password_hash):
+        self.options = options
+        self.password_hash = password_hash
+        self.end = options['end_date']
+        self.span_seconds = options['days'] * 86400
+        self.record_types = _weighted(RECORD_TYPES)
+        self.cashflow_types = _weighted(CASHFLOW_TYPES)
+
+    def _count(self, rng, weight, mean):
+        return min(int(round(mean * weight * rng.uniform(0.7, 1.3))), self.options['max_rows'])
+
+    def _timestamp(self, rng, not_before=None):
+        start = not_before or self.end - timedelta(seconds=self.span_seconds)
+        span = max((self.end - start).total_seconds(), 1)
+        return start + timedelta(seconds=rng.random() * span)
+
+    def _party(self, rng):
+        return f"{rng.choice(FIRST_NAMES)} {rng.choice(BUSINESS_WORDS)}"
+
+    def user(self, rng, user_id, weight):
+        joined = self._timestamp(rng)
+        plan = rng.random()
+        subscribed = plan < 0.25
+        trial_end = joined + timedelta(days=30)
+        name = self._party(rng)
+        return {
+            '_id': user_id,
+            'email': f'{user_id}@synthetic.example.com',
+            'password_hash': self.password_hash,
+            'role': 'startup' if rng.random() < 0.15 else 'trader',
+            'display_name': name,
+            'is_admin': False,
+            'setup_complete': True,
+            'language': 'ha' if rng.random() < 0.3 else 'en',
+            'is_trial': not subscribed and trial_end > self.end,
+            'trial_start': joined,
+            'trial_end': trial_end,
+            'is_subscribed': subscribed,
+            'subscription_plan': rng.choice(('monthly', 'yearly')) if subscribed else None,
+            'subscription_start': joined + timedelta(days=30) if subscribed else None,
+            'subscription_end': self.end + timedelta(days=rng.randrange(1, 365)) if subscribed else None,
+            'created_at': joined,
+            'business_details': {
+                'name': name, 'address': f'{rng.randrange(1, 200)} Market Road', 'industry': rng.choice(INDUSTRIES),
+                'products_services': rng.choice(PRODUCTS), 'phone_number': f'080{rng.randrange(10000000, 99999999)}'
+            },
+            'phone': f'080{rng.randrange(10000000, 99999999)}',
+            'dark_mode': rng.random() < 0.2,
+            'settings': {'show_kobo': False, 'incognito_mode': False, 'app_sounds': True},
+            'security_settings': {},
+            'synthetic_weight': round(weight, 4),
+        }
+
+    def record(self, rng, user_id, joined):
+        record_type = rng.choices(*self.record_types)[0]
+        created_at = self._timestamp(rng, joined)
+        doc = {'user_id': user_id, 'type': record_type, 'created_at': created_at, 'updated_at': None}
+        if record_type in ('debtor', 'creditor'):
+            doc.update({
+                'name': self._party(rng),
+                'contact': f'080{rng.randrange(10000000, 99999999)}',
+                'amount_owed': round(rng.lognormvariate(9.5, 1.2), 2),
+                'description': rng.choice(PRODUCTS),
+                'reminder_count': rng.choice((0, 0, 0, 1, 1, 2, 3)),
+            })
+        elif record_type == 'inventory':
+            doc.update({
+                'name': rng.choice(PRODUCTS),
+                'cost': round(rng.lognormvariate(8, 1), 2),
+                'expected_margin': round(rng.uniform(5, 40), 1),
+            })
+        elif record_type == 'fund':
+            doc.update({
+                'source': rng.choice(('Savings', 'Family', 'Cooperative', 'Bank loan', 'Grant')),
+                'amount': round(rng.lognormvariate(11, 1.3), 2),
+                'category': rng.choice(('equity', 'debt', 'grant')),
+                'description': 'Working capital',
+            })
+        else:
+            doc.update({
+                'title': f'Forecast {created_at:%b %Y}',
+                'projected_revenue': round(rng.lognormvariate(12, 1), 2),
+                'projected_expenses': round(rng.lognormvariate(11.6, 1), 2),
+                'forecast_date': created_at + timedelta(days=90),
+                'description': rng.choice(('Base case', 'Optimistic', 'Pessimistic')),
+            })
+        return doc
+
+    def cashflow(self, rng, user_id, joined):
+        cashflow_type = rng.choices(*self.cashflow_types)[0]
+        return {
+            'user_id': user_id,
+            'type': cashflow_type,
+            'party_name': self._party(rng),
+            'amount': round(rng.lognormvariate(8.5, 1.3), 2),
+            'method': rng.choice(METHODS),
+            'category': rng.choice(RECEIPT_CATEGORIES if cashflow_type == 'receipt' else PAYMENT_CATEGORIES),
+            'created_at': self._timestamp(rng, joined),
+            'updated_at': None,
+        }
+
+    def notification(self, rng, user_id, joined):
+        timestamp = self._timestamp(rng, joined)
+        return {
+            'user_id': user_id,
+            'message': rng.choice((
+                'Payment reminder sent', 'Your trial ends soon', 'New debtor added', 'Weekly summary is ready',
+                'Inventory running low', 'Subscription renewed',
+            )),
+            'type': rng.choice(NOTIFICATION_TYPES),
+            'read': (self.end - timestamp).days > 7 or rng.random() < 0.4,
+            'timestamp': timestamp,
+            'details': None,
+        }
+
+    def reward(self, rng, user_id, joined):
+        created_at = self._timestamp(rng, joined)
+        status = rng.choice(REWARD_STATUSES)
+        return {
+            'user_id': user_id,
+            'type': rng.choice(REWARD_TYPES),
+            'points': rng.choice((10, 25, 50, 100, 250)),
+            'status': status,
+            'description': 'Synthetic reward',
+            'created_at': created_at,
+            'expires_at': created_at + timedelta(days=365),
+            'redeemed_at': created_at + timedelta(days=rng.randrange(1, 60)) if status == 'redeemed' else None,
+        }
+
+    def tool_usage(self, rng, user_id, joined):
+        tool = rng.choice(TOOLS)
+        return {
+            'tool_name': tool,
+            'user_id': user_id,
+            'session_id': f'synthetic-{rng.randrange(1 << 32):08x}',
+            'action': rng.choice(('main_view', 'create', 'edit', 'delete', 'export')),
+            'timestamp': self._timestamp(rng, joined),
+            'ip_address': f'10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}',
+            'user_agent': 'synthetic',
+        }
+
+    def audit_log(self, rng, user_id, joined):
+        return {
+            'admin_id': f"{self.options['prefix']}_admin",
+            'action': rng.choice(AUDIT_ACTIONS),
+            'details': {'user_id': user_id, 'synthetic': True},
+            'timestamp': self._timestamp(rng, joined),
+        }
+
+    def generate(self, index):
+        """Yield (collection, document) for user number index."""
+        options = self.options
+        rng = random.Random(f"{options['seed']}:{index}")
+        user_id = user_id_for(options['prefix'], index)
+        weight = activity_weight(rng, options['alpha'])
+        user = self.user(rng, user_id, weight)
+        joined = user['created_at']
+        yield 'users', user
+        for _ in range(self._count(rng, weight, options['mean_records'])):
+            yield 'records', self.record(rng, user_id, joined)
+        cashflows = self._count(rng, weight, options['mean_cashflows'])
+        for _ in range(cashflows):
+            yield 'cashflows', self.cashflow(rng, user_id, joined)
+        # Notifications and tool usage scale with activity; rewards and admin attention barely do
+        for _ in range(self._count(rng, weight, options['mean_cashflows'] * 0.1)):
+            yield 'notifications', self.notification(rng, user_id, joined)
+        for _ in range(self._count(rng, weight, (options['mean_records'] + options['mean_cashflows']) * 0.5)):
+            yield 'tool_usage', self.tool_usage(rng, user_id, joined)
+        for _ in range(min(int(rng.expovariate(1 / 1.5)), 10)):
+            yield 'rewards', self.reward(rng, user_id, joined)
+        for _ in range(min(int(rng.expovariate(1 / 0.3)), 5)):
+            yield 'audit_logs', self.audit_log(rng, user_id, joined)
+
+
+_worker = {}
+
+
+def _init_worker(options, password_hash):
+    from pymongo import MongoClient
+    client = MongoClient(options['mongo_uri'], **options['client_options'])
+    _worker['db'] = client[options['db']]
+    _worker['generator'] = TenantGenerator(options, password_hash)
+
+
+def _write_chunk(indices):
+    """Generate and insert the users in indices; returns per-collection counts."""
+    db = _worker['db']
+    generator = _worker['generator']
+    batch_size = generator.options['batch_size']
+    buffers = {name: [] for name in COLLECTIONS}
+    counts = Counter()
+
+    def flush(name):
+        if buffers[name]:
+            db[name].insert_many(buffers[name], ordered=False)
+            counts[name] += len(buffers[name])
+            buffers[name] = []
+
+    for index in indices:
+        for name, doc in generator.generate(index):
+            buffers[name].append(doc)
+            if len(buffers[name]) >= batch_size:
+                flush(name)
+    for name in COLLECTIONS:
+        flush(name)
+    return counts
+
+
+def reset(db, prefix):
+    """Delete every document belonging to users with this prefix."""
+    pattern = {'$regex': f'^{prefix}_'}
+    for name in COLLECTIONS:
+        field = '_id' if name == 'users' else 'admin_id' if name == 'audit_logs' else 'user_id'
+        deleted = db[name].delete_many({field: pattern}).deleted_count
+        print(f"deleted {deleted:>12,} {name}")
+
+
+def parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-uri', default=os.getenv('MONGO_URI'), help='Target server (default: $MONGO_URI)')
+    parser.add_argument('--db', default='bizdb')
+    parser.add_argument('--users', type=int, required=True)
+    parser.add_argument('--first-user', type=int, default=1, help='Index of the first user, to extend an existing run')
+    parser.add_argument('--mean-records', type=float, default=200)
+    parser.add_argument('--mean-cashflows', type=float, default=500)
+    parser.add_argument('--max-rows', type=int, default=200000, help='Cap per user and collection')
+    parser.add_argument('--alpha', type=float, default=1.16, help='Pareto shape; lower is more skewed (must be > 1)')
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--end-date', type=parse_date, help='YYYY-MM-DD (default: today)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--prefix', default='synth')
+    parser.add_argument('--password', default='synthetic-password')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--chunk-users', type=int, default=50, help='Users per worker task')
+    parser.add_argument('--reset', action='store_true', help='Delete this prefix\'s synthetic data first')
+    parser.add_argument('--tls', action='store_true', help='Connect with TLS using the certifi CA bundle')
+    args = parser.parse_args(argv)
+    if not args.mongo_uri:
+        parser.error('--mongo-uri or MONGO_URI is required')
+    if args.alpha <= 1:
+        parser.error('--alpha must be greater than 1')
+
+    from pymongo import MongoClient
+    from werkzeug.security import generate_password_hash
+
+    client_options = {}
+    if args.tls:
+        import certifi
+        client_options = {'tls': True, 'tlsCAFile': certifi.where()}
+    end_date = args.end_date or datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    options = {
+        'mongo_uri': args.mongo_uri, 'client_options': client_options, 'db': args.db, 'seed': args.seed,
+        'prefix': args.prefix, 'alpha': args.alpha, 'mean_records': args.mean_records,
+        'mean_cashflows': args.mean_cashflows, 'max_rows': args.max_rows, 'days': args.days,
+        'end_date': end_date, 'batch_size': args.batch_size,
+    }
+    # Hashing is deliberately slow, so every synthetic user shares one hash
+    password_hash = generate_password_hash(args.password)
+
+    db = MongoClient(args.mongo_uri, **client_options)[args.db]
+    if args.reset:
+        reset(db, args.prefix)
+    admin = TenantGenerator(options, password_hash).user(random.Random(args.seed), f'{args.prefix}_admin', 1.0)
+    admin.update({'role': 'admin', 'is_admin': True, 'is_trial': False, 'subscription_plan': 'admin'})
+    db.users.replace_one({'_id': admin['_id']}, admin, upsert=True)
+
+    indices = range(args.first_user, args.first_user + args.users)
+    chunks = [indices[i:i + args.chunk_users] for i in range(0, len(indices), args.chunk_users)]
+    print(f"Generating {args.users:,} users in {len(chunks):,} chunks on {args.processes} processes "
+          f"(seed {args.seed}, end date {end_date:%Y-%m-%d})")
+
+    totals = Counter()
+    started = time.perf_counter()
+    report_every = max(1, math.ceil(len(chunks) / 100))
+    with multiprocessing.get_context('spawn').Pool(args.processes, _init_worker, (options, password_hash)) as pool:
+        for done, counts in enumerate(pool.imap_unordered(_write_chunk, chunks), 1):
+            totals.update(counts)
+            if done % report_every == 0 or done == len(chunks):
+                elapsed = time.perf_counter() - started
+                documents = sum(totals.values())
+                print(f"{done / len(chunks):6.1%}  {documents:>14,} documents  {documents / elapsed:>10,.0f} docs/s", flush=True)
+
+    elapsed = time.perf_counter() - started
+    for name in COLLECTIONS:
+        print(f"{name:<14} {totals[name]:>14,}")
+    print(f"{sum(totals.values()):,} documents in {elapsed:.1f}s; log in as {args.prefix}_00000001 / {args.password}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
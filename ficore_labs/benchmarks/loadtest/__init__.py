@@ -0,0 +1,28 @@
+"""
+HTTP load tests: concurrent virtual users running scripted journeys.
+
+Journeys (benchmarks.loadtest.journeys):
+- trader_receipts: login, dashboard, add receipt, list receipts, profit/loss PDF
+- debtor_reminder: login, debtors list, debtor detail, send SMS reminder
+- admin_users: admin login, admin dashboard, users list, audit log
+- subscribe: payment initiation and callback against the Paystack stub
+  (not in the default mix, since it changes the user's subscription)
+
+The runner starts the app under gunicorn for each --config WORKERSxTHREADS
+given (or uses --target), with a local Paystack stub (benchmarks.loadtest.stubs)
+and rate limiting off, then drives --vus virtual users for --duration seconds
+after a --ramp-up. It reports per step: request count, failures, throughput and
+p50/p95/p99/max latency, printed and written as JSON next to the benchmark
+results so worker/thread configurations can be compared.
+
+Users come from benchmarks.generate_tenants: virtual users log in as active
+synthetic traders (<prefix>_NNNNNNNN) with the shared synthetic password, and
+admin journeys as <prefix>_admin.
+
+    python -m benchmarks.generate_tenants --mongo-uri mongodb://localhost:27017 --users 2000
+    python -m benchmarks.loadtest --mongo-uri mongodb://localhost:27017 \\
+        --config 1x8 --config 2x4 --config 4x2 --vus 40 --duration 120
+
+The virtual users are threads in one process; for more than a few hundred,
+run the client on a separate machine against --target.
+"""
@@ -0,0 +1,270 @@
+"""
+Run the load test; see benchmarks.loadtest for an overview.
+
+    python -m benchmarks.loadtest --mongo-uri mongodb://localhost:27017 --config 2x4 --vus 20
+    python -m benchmarks.loadtest --mongo-uri mongodb://localhost:27017 --target http://127.0.0.1:5000 \\
+        --journey trader_receipts=1 --journey debtor_reminder=1
+"""
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+import requests
+
+from benchmarks import support
+from benchmarks.loadtest.journeys import JOURNEYS, StepFailed, VirtualUser
+from benchmarks.loadtest.stubs import PaystackStub
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+RESULTS_DIR = os.path.join(APP_ROOT, 'benchmarks', 'results')
+DEFAULT_MIX = {'trader_receipts': 6, 'debtor_reminder': 3, 'admin_users': 1}
+
+
+def parse_config(value):
+    workers, _, threads = value.lower().partition('x')
+    return int(workers), int(threads or 1)
+
+
+def parse_journey(value):
+    name, _, weight = value.partition('=')
+    if name not in JOURNEYS:
+        raise argparse.ArgumentTypeError(f"unknown journey {name!r} (choose from {', '.join(JOURNEYS)})")
+    return name, float(weight or 1)
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def select_users(mongo_uri, db_name, prefix, count, seed):
+    """Ids of synthetic traders who can still add data (active trial or subscription)."""
+    from pymongo import MongoClient
+    now = datetime.now(timezone.utc)
+    db = MongoClient(mongo_uri, serverSelectionTimeoutMS=5000)[db_name]
+    ids = [doc['_id'] for doc in db.users.find({
+        '_id': {'$regex': f'^{prefix}_[0-9]'},
+        'role': {'$in': ['trader', 'startup']},
+        '$or': [
+            {'is_trial': True, 'trial_end': {'$gt': now}},
+            {'is_subscribed': True, 'subscription_end': {'$gt': now}},
+        ],
+    }, {'_id': 1}).limit(max(count * 20, 1000))]
+    if not ids:
+        raise SystemExit(f'No active {prefix}_* users in {db_name}; run benchmarks.generate_tenants first')
+    rng = random.Random(seed)
+    return rng.sample(ids, count) if len(ids) >= count else [ids[i % len(ids)] for i in range(count)]
+
+
+class GunicornServer:
+    """The app under gunicorn on 127.0.0.1:port, started and stopped as a context manager."""
+
+    def __init__(self, workers, threads, port, env, log_path, ready_timeout=120):
+        self.workers = workers
+        self.threads = threads
+        self.url = f'http://127.0.0.1:{port}'
+        self.ready_timeout = ready_timeout
+        self.log_path = log_path
+        self.env = dict(env, SERVER_NAME=f'127.0.0.1:{port}')
+        self.command = [
+            sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py',
+            '--workers', str(workers), '--threads', str(threads),
+            '--bind', f'127.0.0.1:{port}', '--timeout', '120', 'wsgi:app',
+        ]
+        self.process = None
+
+    def __enter__(self):
+        self._log = open(self.log_path, 'w', encoding='utf-8')
+        self.process = subprocess.Popen(self.command, cwd=APP_ROOT, env=self.env, stdout=self._log, stderr=subprocess.STDOUT)
+        deadline = time.monotonic() + self.ready_timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f'gunicorn exited with {self.process.returncode}; see {self.log_path}')
+            try:
+                if requests.get(f'{self.url}/users/login', timeout=5).status_code == 200:
+                    return self
+            except requests.RequestException:
+                pass
+            time.sleep(0.5)
+        self.__exit__()
+        raise RuntimeError(f'gunicorn did not become ready in {self.ready_timeout}s; see {self.log_path}')
+
+    def __exit__(self, *exc):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(30)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self._log.close()
+        return False
+
+
+def run_load(base_url, users, admin_id, password, mix, vus, duration, ramp_up, think_time, seed):
+    """
+    Drive vus virtual users against base_url.
+
+    Returns:
+        tuple: (samples, measure_start, measure_end); samples taken during ramp-up
+        are kept but fall before measure_start.
+    """
+    samples = []
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    started = time.time()
+    measure_start = started + ramp_up
+    deadline = measure_start + duration
+
+    def virtual_user(index):
+        rng = random.Random(seed * 100003 + index)
+        time.sleep(ramp_up * index / max(vus, 1))
+        trader = VirtualUser(base_url, users[index], password, samples)
+        admin = VirtualUser(base_url, admin_id, password, samples)
+        while time.time() < deadline:
+            journey, as_admin = JOURNEYS[rng.choices(names, weights)[0]]
+            try:
+                journey(admin if as_admin else trader)
+            except StepFailed:
+                pass
+            except Exception as e:
+                samples.append(('unexpected', type(e).__name__, time.time(), 0.0, False, str(e)))
+            pause = rng.uniform(0, 2 * think_time)
+            time.sleep(max(0.0, min(pause, deadline - time.time())))
+
+    threads = [threading.Thread(target=virtual_user, args=(i,), daemon=True) for i in range(vus)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, measure_start, deadline
+
+
+def summarize(samples, measure_start, measure_end):
+    """Per-step rows: journey, step, count, failures, throughput and latency percentiles (ms)."""
+    measured = max(measure_end - measure_start, 1e-9)
+    grouped = defaultdict(list)
+    failures = Counter()
+    errors = defaultdict(Counter)
+    for journey, step, at, seconds, ok, error in samples:
+        if not measure_start <= at <= measure_end:
+            continue
+        if ok:
+            grouped[(journey, step)].append(seconds * 1000)
+        else:
+            failures[(journey, step)] += 1
+            errors[(journey, step)][error or 'unknown'] += 1
+    rows = []
+    for key in sorted(set(grouped) | set(failures)):
+        latencies = sorted(grouped[key])
+        rows.append({
+            'journey': key[0],
+            'step': key[1],
+            'count': len(latencies),
+            'failures': failures[key],
+            'throughput_rps': round(len(latencies) / measured, 3),
+            'p50_ms': percentile(latencies, 0.50),
+            'p95_ms': percentile(latencies, 0.95),
+            'p99_ms': percentile(latencies, 0.99),
+            'max_ms': latencies[-1] if latencies else None,
+            'errors': dict(errors[key].most_common(5)),
+        })
+    return rows
+
+
+def print_summary(title, rows):
+    def ms(value):
+        return f'{value:9.1f}' if value is not None else f"{'-':>9}"
+
+    print(f'\n== {title}')
+    print(f"{'journey':<16} {'step':<20} {'count':>7} {'fail':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for row in rows:
+        print(f"{row['journey']:<16} {row['step']:<20} {row['count']:>7} {row['failures']:>5} {row['throughput_rps']:>8.2f} "
+              f"{ms(row['p50_ms'])} {ms(row['p95_ms'])} {ms(row['p99_ms'])} {ms(row['max_ms'])}")
+        for error, count in row['errors'].items():
+            print(f"{'':<16}   {count} x {error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-uri', default=os.getenv('MONGO_URI'), help='Database seeded by generate_tenants (default: $MONGO_URI)')
+    parser.add_argument('--db', default='bizdb', help='Database the users are read from (the app always uses bizdb)')
+    parser.add_argument('--mongo-tls', action='store_true', help='Let the app connect with TLS (default off for a local mongod)')
+    parser.add_argument('--target', help='Test an already running app at this URL instead of starting gunicorn')
+    parser.add_argument('--config', action='append', type=parse_config, metavar='WORKERSxTHREADS',
+                        help='gunicorn workers and threads, e.g. 2x4 (repeatable; default 2x4)')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--vus', type=int, default=20, help='Concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=60, help='Measured seconds per configuration')
+    parser.add_argument('--ramp-up', type=float, default=10, help='Seconds to start all virtual users (not measured)')
+    parser.add_argument('--think-time', type=float, default=0.5, help='Mean pause between journeys in seconds')
+    parser.add_argument('--journey', action='append', type=parse_journey, metavar='NAME=WEIGHT',
+                        help=f'Journey mix (repeatable; default {" ".join(f"{k}={v}" for k, v in DEFAULT_MIX.items())})')
+    parser.add_argument('--user-prefix', default='synth')
+    parser.add_argument('--password', default='synthetic-password')
+    parser.add_argument('--stub-latency-ms', type=float, default=150, help='Delay added by the Paystack stub')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/loadtest-<timestamp>.json)')
+    args = parser.parse_args(argv)
+    if not args.mongo_uri:
+        parser.error('--mongo-uri or MONGO_URI is required')
+
+    mix = dict(args.journey) if args.journey else dict(DEFAULT_MIX)
+    configs = args.config or [(2, 4)]
+    users = select_users(args.mongo_uri, args.db, args.user_prefix, args.vus, args.seed)
+    admin_id = f'{args.user_prefix}_admin'
+    metadata = support.run_metadata(args.mongo_uri)
+    metadata['options'] = {
+        'vus': args.vus, 'duration': args.duration, 'ramp_up': args.ramp_up, 'think_time': args.think_time,
+        'mix': mix, 'stub_latency_ms': args.stub_latency_ms, 'seed': args.seed, 'target': args.target,
+    }
+
+    results = []
+    with PaystackStub(latency_ms=args.stub_latency_ms) as stub:
+        env = dict(
+            os.environ,
+            MONGO_URI=args.mongo_uri,
+            MONGO_TLS='true' if args.mongo_tls else 'false',
+            PREFERRED_URL_SCHEME='http',
+            RATELIMIT_ENABLED='false',
+            PAYSTACK_API_BASE=stub.url,
+            PAYSTACK_SECRET_KEY=os.getenv('PAYSTACK_SECRET_KEY', 'sk_test_loadtest_stub'),
+        )
+        env.setdefault('SECRET_KEY', 'loadtest-secret-key-not-for-production')
+        for workers, threads in ([(None, None)] if args.target else configs):
+            title = args.target or f'gunicorn {workers} workers x {threads} threads'
+            print(f'{title}: {args.vus} virtual users, {args.ramp_up:.0f}s ramp-up, {args.duration:.0f}s measured', flush=True)
+            if args.target:
+                samples, start, end = run_load(args.target, users, admin_id, args.password, mix, args.vus,
+                                               args.duration, args.ramp_up, args.think_time, args.seed)
+            else:
+                log_path = os.path.join(tempfile.gettempdir(), f'loadtest-gunicorn-{workers}x{threads}.log')
+                with GunicornServer(workers, threads, args.port, env, log_path) as server:
+                    samples, start, end = run_load(server.url, users, admin_id, args.password, mix, args.vus,
+                                                   args.duration, args.ramp_up, args.think_time, args.seed)
+            rows = summarize(samples, start, end)
+            print_summary(title, rows)
+            results.append({'workers': workers, 'threads': threads, 'target': args.target, 'steps': rows})
+        metadata['stub_calls'] = stub.calls
+
+    output = args.output or os.path.join(RESULTS_DIR, f"loadtest-{datetime.now(timezone.utc):%Y%m%dT%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'metadata': metadata, 'configs': results}, f, indent=2)
+    print(f'\nResults written to {output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
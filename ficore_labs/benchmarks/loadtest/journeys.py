@@ -0,0 +1,170 @@
+"""
+Scripted user journeys for the load test.
+
+A journey is a function taking a VirtualUser; every HTTP exchange is wrapped in
+vu.step(name), which times it and records a sample. A step fails when its
+response is not what a browser would get on success (wrong status, a redirect
+back to the login page, a missing CSRF token); the journey then stops, since
+later steps depend on the earlier ones.
+"""
+import random
+import re
+import time
+from contextlib import contextmanager
+from datetime import date
+
+import requests
+
+CSRF_META_RE = re.compile(r'<meta name="csrf-token" content="([^"]+)"')
+DEBTOR_ID_RE = re.compile(r'data-id="([0-9a-f]{24})"')
+
+
+class StepFailed(Exception):
+    pass
+
+
+class VirtualUser:
+    """One simulated browser: its own cookie jar, credentials and sample list."""
+
+    def __init__(self, base_url, username, password, samples, timeout=60):
+        self.base_url = base_url.rstrip('/')
+        self.username = username
+        self.password = password
+        self.samples = samples
+        self.timeout = timeout
+        self.http = None
+        self.csrf_token = None
+
+    def new_session(self):
+        if self.http is not None:
+            self.http.close()
+        self.http = requests.Session()
+        self.csrf_token = None
+
+    @contextmanager
+    def step(self, journey, name):
+        started = time.perf_counter()
+        ok = False
+        error = None
+        try:
+            yield
+            ok = True
+        except StepFailed as e:
+            error = str(e)
+            raise
+        except requests.RequestException as e:
+            error = f'{type(e).__name__}: {e}'
+            raise StepFailed(error) from e
+        except Exception as e:
+            error = f'{type(e).__name__}: {e}'
+            raise
+        finally:
+            self.samples.append((journey, name, time.time(), time.perf_counter() - started, ok, error))
+
+    def request(self, method, path, expect=(200,), **kwargs):
+        kwargs.setdefault('allow_redirects', False)
+        kwargs.setdefault('timeout', self.timeout)
+        response = self.http.request(method, f'{self.base_url}{path}', **kwargs)
+        response.content  # the step includes downloading the body
+        if response.status_code not in expect:
+            raise StepFailed(f'{method} {path}: HTTP {response.status_code}')
+        location = response.headers.get('Location', '')
+        if response.is_redirect and '/users/login' in location:
+            raise StepFailed(f'{method} {path}: redirected to login')
+        match = CSRF_META_RE.search(response.text) if 'text/html' in response.headers.get('Content-Type', '') else None
+        if match:
+            self.csrf_token = match.group(1)
+        return response
+
+    def require_csrf(self):
+        if not self.csrf_token:
+            raise StepFailed('no CSRF token on the previous page')
+        return self.csrf_token
+
+    def login(self, journey):
+        self.new_session()
+        with self.step(journey, 'login'):
+            self.request('GET', '/users/login')
+            self.request('POST', '/users/login', expect=(302,), data={
+                'csrf_token': self.require_csrf(), 'username': self.username, 'password': self.password,
+            })
+
+
+def trader_receipts(vu):
+    """login -> dashboard -> add receipt -> list receipts -> profit/loss PDF"""
+    journey = 'trader_receipts'
+    vu.login(journey)
+    with vu.step(journey, 'dashboard'):
+        vu.request('GET', '/dashboard/')
+    with vu.step(journey, 'add receipt'):
+        vu.request('GET', '/receipts/add')
+        vu.request('POST', '/receipts/add', expect=(302,), data={
+            'csrf_token': vu.require_csrf(), 'party_name': 'Load Test Customer', 'date': date.today().isoformat(),
+            'amount': '2500', 'method': 'cash', 'category': 'sales',
+        })
+    with vu.step(journey, 'list receipts'):
+        vu.request('GET', '/receipts/')
+    with vu.step(journey, 'profit-loss pdf'):
+        vu.request('GET', '/reports/profit_loss')
+        response = vu.request('POST', '/reports/profit_loss', data={'csrf_token': vu.require_csrf(), 'format': 'pdf'})
+        if not response.headers.get('Content-Type', '').startswith('application/pdf'):
+            raise StepFailed('profit/loss report did not return a PDF')
+
+
+def debtor_reminder(vu):
+    """login -> debtors list -> debtor detail -> send SMS reminder -> notification count"""
+    journey = 'debtor_reminder'
+    vu.login(journey)
+    with vu.step(journey, 'debtors list'):
+        page = vu.request('GET', '/debtors/')
+        debtor_ids = DEBTOR_ID_RE.findall(page.text)
+    if not debtor_ids:
+        return
+    debtor_id = random.choice(debtor_ids)
+    with vu.step(journey, 'debtor detail'):
+        debtor = vu.request('GET', f'/debtors/view/{debtor_id}').json()
+    with vu.step(journey, 'send reminder'):
+        result = vu.request('POST', '/debtors/send_reminder', headers={'X-CSRFToken': vu.require_csrf()}, json={
+            'debtId': debtor_id, 'recipient': debtor.get('contact') or '08000000000',
+            'message': 'Friendly reminder about your balance', 'type': 'sms',
+        }).json()
+        if not result.get('success'):
+            raise StepFailed(f"reminder rejected: {result.get('message')}")
+    with vu.step(journey, 'notification count'):
+        vu.request('GET', '/debtors/notifications/count')
+
+
+def admin_users(vu):
+    """admin login -> admin dashboard -> users list -> audit log"""
+    journey = 'admin_users'
+    vu.login(journey)
+    with vu.step(journey, 'admin dashboard'):
+        vu.request('GET', '/admin/dashboard')
+    with vu.step(journey, 'admin users'):
+        vu.request('GET', '/admin/users')
+    with vu.step(journey, 'admin audit'):
+        vu.request('GET', '/admin/audit')
+
+
+def subscribe(vu):
+    """login -> initiate payment -> payment callback, against the Paystack stub"""
+    journey = 'subscribe'
+    vu.login(journey)
+    with vu.step(journey, 'subscribe page'):
+        vu.request('GET', '/subscribe/')
+    with vu.step(journey, 'initiate payment'):
+        authorization = vu.request('POST', '/subscribe/initiate-payment', data={
+            'csrf_token': vu.require_csrf(), 'plan_code': 'monthly',
+        }).json()
+    reference = authorization['authorization_url'].rsplit('/', 1)[-1]
+    with vu.step(journey, 'payment callback'):
+        vu.request('GET', f'/subscribe/callback?reference={reference}', expect=(302,))
+
+
+# name: (function, runs as admin)
+JOURNEYS = {
+    'trader_receipts': (trader_receipts, False),
+    'debtor_reminder': (debtor_reminder, False),
+    'admin_users': (admin_users, True),
+    'subscribe': (subscribe, False),
+}
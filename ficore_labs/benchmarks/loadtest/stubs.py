@@ -0,0 +1,79 @@
+"""
+Local stand-ins for third-party APIs.
+
+PaystackStub answers the two Paystack calls the app makes (transaction
+initialize and verify) with canned successes after an optional delay, so load
+tests never reach the real API and external latency is under our control.
+Point the app at it with PAYSTACK_API_BASE=<stub.url>.
+
+SMS and WhatsApp reminders (send_sms_reminder / send_whatsapp_reminder in
+blueprints/debtors/routes.py) do not call an external service yet, so there
+is nothing to stub for messaging.
+"""
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _PaystackHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, payload, call='unknown'):
+        with self.server.lock:
+            self.server.calls[call] += 1
+        time.sleep(self.server.latency)
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path != '/transaction/initialize':
+            return self._reply(404, {'status': False, 'message': 'Not found'})
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        reference = payload.get('reference', 'stub')
+        self._reply(200, {'status': True, 'message': 'Authorization URL created', 'data': {
+            'authorization_url': f'{self.server.url}/checkout/{reference}',
+            'access_code': f'stub-{reference}',
+            'reference': reference,
+        }}, 'initialize')
+
+    def do_GET(self):
+        if not self.path.startswith('/transaction/verify/'):
+            return self._reply(404, {'status': False, 'message': 'Not found'})
+        reference = self.path.rsplit('/', 1)[-1]
+        self._reply(200, {'status': True, 'message': 'Verification successful', 'data': {
+            'status': 'success', 'reference': reference, 'amount': 100000, 'currency': 'NGN',
+        }}, 'verify')
+
+
+class PaystackStub:
+    """Threaded HTTP server on 127.0.0.1; use as a context manager."""
+
+    def __init__(self, port=0, latency_ms=0):
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), _PaystackHandler)
+        self.server.daemon_threads = True
+        self.server.latency = latency_ms / 1000
+        self.server.calls = Counter()
+        self.server.lock = threading.Lock()
+        self.server.url = self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self._thread = threading.Thread(target=self.server.serve_forever, name='paystack-stub', daemon=True)
+
+    @property
+    def calls(self):
+        return dict(self.server.calls)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+        return False
@@ -0,0 +1,86 @@
+"""
+Run benchmark suites and write the results as JSON.
+
+    python -m benchmarks.run                                  # all suites, mongomock
+    python -m benchmarks.run --suite utils --suite converters
+    python -m benchmarks.run --mongo-uri mongodb://localhost:27017/bizdb --sizes 1000,10000
+    python -m benchmarks.compare benchmarks/results/<old>.json benchmarks/results/<new>.json
+
+Results go to benchmarks/results/<UTC timestamp>-<commit>.json (or --output):
+
+    {"metadata": {"created_at", "git_commit", "python", "platform", "mongo", "options"},
+     "suites": {"<suite>": [{"name", "number", "ns_per_call", ...}, ...]}}
+
+Set MONGO_TLS=false when pointing at a local mongod without TLS.
+"""
+import argparse
+import json
+import os
+from datetime import datetime, timezone
+
+from benchmarks import print_results
+from benchmarks import support
+
+SUITES = ('translations', 'utils', 'converters', 'reports', 'endpoints')
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def run_suite(suite, args, app=None):
+    if suite == 'translations':
+        from benchmarks import bench_translations
+        return bench_translations.collect(args.number)
+    if suite == 'utils':
+        from benchmarks import bench_utils
+        return bench_utils.collect(args.number)
+    if suite == 'converters':
+        from benchmarks import bench_converters
+        return bench_converters.collect(args.number)
+    if suite == 'reports':
+        from benchmarks import bench_reports
+        return bench_reports.collect(app, args.sizes)
+    if suite == 'endpoints':
+        from benchmarks import bench_endpoints
+        return bench_endpoints.collect(app, cashflows=args.cashflows, records=args.records)
+    raise ValueError(f'Unknown suite: {suite}')
+
+
+def default_output(metadata):
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')
+    return os.path.join(RESULTS_DIR, f"{stamp}-{metadata['git_commit'] or 'unknown'}.json")
+
+
+def main(argv=None):
+    from benchmarks.bench_reports import DEFAULT_SIZES, parse_sizes
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--suite', action='append', choices=SUITES, help='Suite to run (repeatable; default all)')
+    parser.add_argument('--number', type=int, default=20000, help='Calls per timing run for the micro-benchmarks')
+    parser.add_argument('--sizes', type=parse_sizes, default=DEFAULT_SIZES, help='Report row counts, comma-separated')
+    parser.add_argument('--cashflows', type=int, default=1000, help='Cashflows seeded for the endpoint suite')
+    parser.add_argument('--records', type=int, default=500, help='Records seeded for the endpoint suite')
+    parser.add_argument('--mongo-uri', help='mongodb:// URI of a local mongod, or mongomock:// (default)')
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/<timestamp>-<commit>.json)')
+    args = parser.parse_args(argv)
+
+    suites = args.suite or list(SUITES)
+    metadata = support.run_metadata(args.mongo_uri)
+    metadata['options'] = {
+        'suites': suites, 'number': args.number, 'sizes': list(args.sizes),
+        'cashflows': args.cashflows, 'records': args.records,
+    }
+    app = support.load_app(args.mongo_uri) if {'reports', 'endpoints'} & set(suites) else None
+
+    results = {}
+    for suite in suites:
+        print(f"== {suite}")
+        results[suite] = run_suite(suite, args, app)
+        print_results(results[suite])
+
+    output = args.output or default_output(metadata)
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'metadata': metadata, 'suites': results}, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,365 @@
+"""
+Shared setup for the benchmarks that need the full application.
+
+The app is created against either a local mongod (any mongodb:// URI; set
+MONGO_TLS=false for a plain local server) or an in-memory mongomock database
+(mongomock://, the default). mongomock is only imported in that mode and needs
+to be installed separately (pip install mongomock).
+
+Seed data is deterministic (fixed random seed) so that runs are comparable.
+"""
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+MOCK_URI = 'mongomock://'
+BENCH_USER_ID = 'bench_trader'
+BENCH_ADMIN_ID = 'bench_admin'
+
+PARTY_NAMES = ['Aisha Stores', 'Musa & Sons', 'Kano Textiles', 'Bello Farms', 'Zainab Foods', 'Ibrahim Motors']
+METHODS = ['cash', 'card', 'bank', None]
+
+_mongomock_installed = False
+
+# mongomock Collection methods and the command each sends to a real server
+MOCK_COMMANDS = {
+    'insert_one': 'insert', 'insert_many': 'insert',
+    'update_one': 'update', 'update_many': 'update', 'replace_one': 'update',
+    'delete_one': 'delete', 'delete_many': 'delete',
+    'find': 'find', 'find_one': 'find',
+    'find_one_and_update': 'findAndModify', 'find_one_and_delete': 'findAndModify',
+    'count_documents': 'aggregate', 'aggregate': 'aggregate', 'distinct': 'distinct',
+    # One command per batch as long as the batch holds a single kind of write
+    'bulk_write': 'update',
+}
+
+
+def _record_command(command_name, collection, duration_ms):
+    """Count a mongomock call in the current request's query stats, if any."""
+    query_metrics = sys.modules.get('helpers.query_metrics')
+    stats = query_metrics.get_query_stats() if query_metrics is not None else None
+    if stats is not None:
+        stats.record(command_name, collection, duration_ms)
+
+
+def use_mongomock():
+    """
+    Make pymongo.MongoClient return mongomock clients sharing one in-memory store.
+
+    Each collection call is counted in helpers.query_metrics like a command,
+    so query counts and budgets work without a server. Also papers over the
+    mongomock gaps the app runs into: client sessions and the session=
+    keyword, create_collection options (validators, capped) and $type aliases
+    mongomock does not implement.
+    """
+    global _mongomock_installed
+    if _mongomock_installed:
+        return
+    import mongomock
+    import mongomock.collection
+    import mongomock.database
+    import mongomock.filtering
+    import mongomock.gridfs
+    import pymongo
+    import pymongo.mongo_client
+
+    shared = {}
+
+    class _Session:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def start_transaction(self, *args, **kwargs):
+            return self
+
+        def commit_transaction(self):
+            pass
+
+        def abort_transaction(self):
+            pass
+
+        def end_session(self):
+            pass
+
+    class SharedMongoClient(mongomock.MongoClient):
+        def __init__(self, *args, **kwargs):
+            super().__init__()
+            self._store = shared.setdefault('store', self._store)
+
+        def start_session(self, *args, **kwargs):
+            return _Session()
+
+    in_command = threading.local()
+
+    def as_command(method, command_name):
+        # Drops session= and reports the call to helpers.query_metrics as one
+        # command, as pymongo's command monitoring does against a real server.
+        # Calls mongomock makes internally (find_one -> find) are not counted.
+        def wrapper(self, *args, **kwargs):
+            kwargs.pop('session', None)
+            if getattr(in_command, 'active', False):
+                return method(self, *args, **kwargs)
+            in_command.active = True
+            started = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                in_command.active = False
+                _record_command(command_name, self.name, (time.perf_counter() - started) * 1000)
+        return wrapper
+
+    for name, command_name in MOCK_COMMANDS.items():
+        setattr(mongomock.collection.Collection, name, as_command(getattr(mongomock.collection.Collection, name), command_name))
+
+    database_command = mongomock.database.Database.command
+
+    def command(self, command, *args, **kwargs):
+        # db.command('ping') and friends are commands too
+        name = command if isinstance(command, str) else next(iter(command), 'command')
+        return as_command(database_command, name)(self, command, *args, **kwargs)
+
+    mongomock.database.Database.command = command
+
+    create_collection = mongomock.database.Database.create_collection
+
+    def create_collection_ignoring_options(self, name, **kwargs):
+        if name in self.list_collection_names():
+            return self[name]
+        return create_collection(self, name)
+
+    mongomock.database.Database.create_collection = create_collection_ignoring_options
+    for alias, check in list(mongomock.filtering.TYPE_MAP.items()):
+        if check is None:
+            mongomock.filtering.TYPE_MAP[alias] = lambda value: False
+    mongomock.gridfs.enable_gridfs_integration()
+
+    pymongo.MongoClient = SharedMongoClient
+    pymongo.mongo_client.MongoClient = SharedMongoClient
+    _mongomock_installed = True
+
+
+def load_app(mongo_uri=None):
+    """
+    Import app.py against mongo_uri and configure it for benchmarking.
+
+    CSRF, secure cookies and rate limits are switched off so the test client can
+    post forms and repeat requests. The app module is imported once per process.
+
+    Args:
+        mongo_uri: mongodb:// URI, or mongomock:// (default, also via BENCH_MONGO_URI).
+
+    Returns:
+        Flask: the application.
+    """
+    mongo_uri = mongo_uri or os.getenv('BENCH_MONGO_URI', MOCK_URI)
+    if mongo_uri.startswith(MOCK_URI):
+        use_mongomock()
+        os.environ['MONGO_URI'] = 'mongodb://localhost/bizdb'
+    else:
+        os.environ['MONGO_URI'] = mongo_uri
+    os.environ.setdefault('SECRET_KEY', 'benchmark-secret-key-not-for-production')
+    os.environ.setdefault('SERVER_NAME', 'localhost')
+    os.environ.setdefault('PREFERRED_URL_SCHEME', 'http')
+
+    import app as app_module
+    import utils
+    app = app_module.app
+    app.config.update(WTF_CSRF_ENABLED=False, SESSION_COOKIE_SECURE=False)
+    app_module.limiter.enabled = False
+    utils.limiter.enabled = False
+    return app
+
+
+def get_db(app):
+    return app.extensions['mongo']['bizdb']
+
+
+def make_user_doc(user_id, role='trader'):
+    now = datetime.now(timezone.utc)
+    return {
+        '_id': user_id,
+        'email': f'{user_id}@example.com',
+        'password_hash': 'benchmark',
+        'role': role,
+        'display_name': user_id,
+        'setup_complete': True,
+        'language': 'en',
+        'is_trial': role != 'admin',
+        'trial_start': now,
+        'trial_end': now + timedelta(days=30),
+        'is_subscribed': False,
+        'created_at': now,
+        'business_details': {
+            'name': 'Benchmark Shop', 'address': '1 Market Road', 'industry': 'retail',
+            'products_services': 'Groceries', 'phone_number': '08000000000'
+        },
+    }
+
+
+def _created_at(rng, now):
+    return now - timedelta(days=rng.randrange(0, 365), seconds=rng.randrange(0, 86400))
+
+
+def make_cashflow_docs(user_id, count, seed=0):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    return [{
+        'user_id': user_id,
+        'type': rng.choice(['receipt', 'payment']),
+        'party_name': rng.choice(PARTY_NAMES),
+        'amount': round(rng.uniform(100, 500000), 2),
+        'method': rng.choice(METHODS),
+        'category': rng.choice(['sales', 'rent', 'salaries', 'supplies']),
+        'created_at': _created_at(rng, now),
+    } for _ in range(count)]
+
+
+def make_record_docs(user_id, count, seed=0):
+    """Debtor and creditor records."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    return [{
+        'user_id': user_id,
+        'type': rng.choice(['debtor', 'creditor']),
+        'name': rng.choice(PARTY_NAMES),
+        'contact': f'080{rng.randrange(10000000, 99999999)}',
+        'amount_owed': round(rng.uniform(100, 250000), 2),
+        'description': 'Goods supplied on credit',
+        'reminder_count': rng.randrange(0, 4),
+        'created_at': _created_at(rng, now),
+    } for _ in range(count)]
+
+
+def make_fund_docs(user_id, count, seed=0):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    return [{
+        'user_id': user_id,
+        'source': rng.choice(['Angel round', 'Grant', 'Bank loan', 'Founders']),
+        'amount': round(rng.uniform(10000, 5000000), 2),
+        'date_received': _created_at(rng, now),
+        'status': rng.choice(['received', 'pending']),
+        'created_at': _created_at(rng, now),
+    } for _ in range(count)]
+
+
+def make_forecast_docs(user_id, count, seed=0):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    docs = []
+    for _ in range(count):
+        start = _created_at(rng, now)
+        docs.append({
+            'user_id': user_id,
+            'scenario': rng.choice(['Base case', 'Optimistic', 'Pessimistic']),
+            'projected_revenue': round(rng.uniform(10000, 5000000), 2),
+            'projected_expenses': round(rng.uniform(10000, 3000000), 2),
+            'period_start': start,
+            'period_end': start + timedelta(days=90),
+            'created_at': start,
+        })
+    return docs
+
+
+def make_investor_report_docs(user_id, count, seed=0):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    return [{
+        'user_id': user_id,
+        'title': f'Q{rng.randrange(1, 5)} investor update',
+        'financial_metrics': {
+            'revenue': round(rng.uniform(10000, 5000000), 2),
+            'burn_rate': round(rng.uniform(1000, 500000), 2),
+            'runway': f'{rng.randrange(3, 24)} months',
+        },
+        'created_at': _created_at(rng, now),
+    } for _ in range(count)]
+
+
+def make_customer_report_rows(count, seed=0):
+    """Rows in the shape the customer report generators receive."""
+    rng = random.Random(seed)
+    return [{
+        'username': f'customer{i}',
+        'email': f'customer{i}@example.com',
+        'role': rng.choice(['trader', 'startup']),
+        'is_trial': rng.random() < 0.5,
+        'trial_end': '2026-12-31',
+        'is_subscribed': rng.random() < 0.3,
+        'total_debtors': round(rng.uniform(0, 500000), 2),
+        'total_creditors': round(rng.uniform(0, 500000), 2),
+        'total_receipts': round(rng.uniform(0, 5000000), 2),
+        'total_payments': round(rng.uniform(0, 5000000), 2),
+        'latest_fund_amount': round(rng.uniform(0, 5000000), 2),
+        'latest_forecast_revenue': round(rng.uniform(0, 5000000), 2),
+    } for i in range(count)]
+
+
+def seed_database(app, cashflows=1000, records=500):
+    """
+    (Re)create the benchmark trader and admin with the given amount of data.
+
+    Returns:
+        tuple: (trader id, admin id)
+    """
+    db = get_db(app)
+    for user_id in (BENCH_USER_ID, BENCH_ADMIN_ID):
+        db.users.delete_one({'_id': user_id})
+        db.cashflows.delete_many({'user_id': user_id})
+        db.records.delete_many({'user_id': user_id})
+    db.users.insert_many([make_user_doc(BENCH_USER_ID), make_user_doc(BENCH_ADMIN_ID, role='admin')])
+    if cashflows:
+        db.cashflows.insert_many(make_cashflow_docs(BENCH_USER_ID, cashflows))
+    if records:
+        db.records.insert_many(make_record_docs(BENCH_USER_ID, records))
+    return BENCH_USER_ID, BENCH_ADMIN_ID
+
+
+def login(client, user_id):
+    """Log the test client in as user_id without going through the login form."""
+    with client.session_transaction() as session:
+        session['_user_id'] = user_id
+        session['_fresh'] = True
+        session['sid'] = f'bench-{user_id}'
+        session['lang'] = 'en'
+
+
+@contextmanager
+def user_request_context(app, user_id):
+    """A request context in which current_user is user_id."""
+    from flask import session
+    from flask_login import current_user
+    with app.test_request_context('/'):
+        session['_user_id'] = user_id
+        session['sid'] = f'bench-{user_id}'
+        session['lang'] = 'en'
+        if not current_user.is_authenticated:
+            raise RuntimeError(f'Benchmark user {user_id} could not be loaded; call seed_database() first')
+        yield
+
+
+def run_metadata(mongo_uri=None):
+    """Environment details stored with every result file."""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    mongo_uri = mongo_uri or os.getenv('BENCH_MONGO_URI', MOCK_URI)
+    return {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'git_commit': commit,
+        'python': sys.version.split()[0],
+        'platform': sys.platform,
+        'mongo': 'mongomock' if mongo_uri.startswith(MOCK_URI) else 'mongod',
+    }
@@ -9,17 +9,24 @@ from translations import trans
 import utils
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import inch
 from io import BytesIO
 import csv
 from models import get_records, get_cashflows, get_feedback, to_dict_feedback, get_waitlist_entries, to_dict_waitlist
+from helpers.change_log import record_deletion
+from helpers.data_versions import bump_data_version
+from helpers.slow_queries import get_slow_query_groups, get_slow_query_recorder
+from helpers.memory_metrics import compare_snapshots, get_worker_memory, list_snapshots, take_snapshot
+from helpers.request_profiler import (
+    PROFILE_HEADER, PROFILES_BUCKET, build_flame_tree, get_profiler_settings, issue_profile_token, set_profiler_sample_rate
+)
 
 logger = logging.getLogger(__name__)
 
 admin_bp = Blueprint('admin', __name__, template_folder='templates/admin')
 
+# Data version resource of each record and cashflow type (helpers.data_versions)
+TYPE_RESOURCES = {'receipt': 'receipts', 'payment': 'payments', 'debtor': 'debtors', 'creditor': 'creditors'}
+
 # Error Handler
 @admin_bp.app_errorhandler(500)
 def error_500(error):
@@ -225,11 +232,14 @@ def delete_user(user_id):
             return redirect(url_for('admin.manage_users'))
         db.records.delete_many({'user_id': user_id})
         db.cashflows.delete_many({'user_id': user_id})
+        db.sync_tombstones.delete_many({'user_id': user_id})
         db.debtors.delete_many({'user_id': user_id})
         db.creditors.delete_many({'user_id': user_id})
         db.funds.delete_many({'user_id': user_id})
         db.feedback.delete_many({'user_id': user_id})
         db.audit_logs.delete_many({'details.user_id': user_id})
+        # Cached pages and ETags of the user's data must not outlive it
+        bump_data_version(db, user['_id'], *TYPE_RESOURCES.values(), 'notifications')
         result = db.users.delete_one(user_query)
         if result.deleted_count == 0:
             flash(trans('admin_user_not_deleted', default='User could not be deleted'), 'danger')
@@ -265,10 +275,16 @@ def delete_item(collection, item_id):
         db = utils.get_mongo_db()
         if db is None:
             raise Exception("Failed to connect to MongoDB")
-        result = db[collection].delete_one({'_id': ObjectId(item_id)})
-        if result.deleted_count == 0:
+        item = db[collection].find_one_and_delete({'_id': ObjectId(item_id)})
+        if item is None:
             flash(trans('admin_item_not_found', default='Item not found'), 'danger')
         else:
+            if item.get('user_id'):
+                if collection in ('records', 'cashflows'):
+                    # Delta-sync clients drop the document on their next sync
+                    record_deletion(db, collection, item)
+                resource = TYPE_RESOURCES.get(item.get('type')) or (collection if collection in ('debtors', 'creditors') else None)
+                bump_data_version(db, str(item['user_id']), *([resource] if resource else []))
             flash(trans('admin_item_deleted', default='Item deleted successfully'), 'success')
             logger.info(f"Admin {current_user.id} deleted {collection} item {item_id}",
                         extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': current_user.id})
@@ -686,6 +702,139 @@ def audit():
         flash(trans('admin_database_error', default='An error occurred while accessing the database'), 'danger')
         return render_template('error/500.html'), 500
 
+@admin_bp.route('/slow-queries', methods=['GET'])
+@login_required
+@utils.requires_role('admin')
+@utils.limiter.limit("50 per hour")
+def slow_queries():
+    """View slow MongoDB commands grouped by query shape."""
+    try:
+        db = utils.get_mongo_db()
+        groups = get_slow_query_groups(db)
+        return render_template(
+            'admin/slow_queries.html',
+            groups=groups,
+            threshold_ms=getattr(get_slow_query_recorder(), 'threshold_ms', None),
+            title=trans('admin_slow_queries', default='Slow Queries')
+        )
+    except Exception as e:
+        logger.error(f"Error fetching slow queries for admin {current_user.id}: {str(e)}",
+                     extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': current_user.id})
+        flash(trans('admin_database_error', default='An error occurred while accessing the database'), 'danger')
+        return render_template('error/500.html'), 500
+
+@admin_bp.route('/profiles', methods=['GET', 'POST'])
+@login_required
+@utils.requires_role('admin')
+@utils.limiter.limit("50 per hour")
+def profiles():
+    """List stored request profiles, set the sampling rate and issue profiling tokens."""
+    try:
+        db = utils.get_mongo_db()
+        profile_token = None
+        if request.method == 'POST':
+            action = request.form.get('action')
+            if action == 'set_rate':
+                try:
+                    rate = set_profiler_sample_rate(db, request.form.get('sample_rate', 0), current_user.id)
+                except ValueError:
+                    flash(trans('admin_invalid_input', default='Invalid input'), 'danger')
+                else:
+                    log_audit_action('set_profiler_sample_rate', {'sample_rate': rate})
+                    flash(trans('admin_profiler_rate_updated', default='Profiler sampling rate updated'), 'success')
+            elif action == 'issue_token':
+                profile_token = issue_profile_token(current_user.id)
+        recent = list(db[f'{PROFILES_BUCKET}.files'].find().sort('uploadDate', -1).limit(100))
+        return render_template(
+            'admin/profiles.html',
+            profiles=recent,
+            settings=get_profiler_settings(db),
+            profile_token=profile_token,
+            profile_header=PROFILE_HEADER,
+            title=trans('admin_profiles', default='Request Profiles')
+        )
+    except Exception as e:
+        logger.error(f"Error loading request profiles for admin {current_user.id}: {str(e)}",
+                     extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': current_user.id})
+        flash(trans('admin_database_error', default='An error occurred while accessing the database'), 'danger')
+        return render_template('error/500.html'), 500
+
+def _load_profile(profile_id):
+    from gridfs import GridFS
+    db = utils.get_mongo_db()
+    return GridFS(db, collection=PROFILES_BUCKET).get(ObjectId(profile_id))
+
+@admin_bp.route('/profiles/<profile_id>', methods=['GET'])
+@login_required
+@utils.requires_role('admin')
+def view_profile(profile_id):
+    """Show a stored request profile as a flamegraph."""
+    from gridfs.errors import NoFile
+    try:
+        grid_out = _load_profile(profile_id)
+        tree = build_flame_tree(grid_out.read().decode('utf-8'))
+        return render_template(
+            'admin/profile_flamegraph.html',
+            profile=grid_out,
+            tree=tree,
+            title=trans('admin_profile', default='Request Profile')
+        )
+    except (errors.InvalidId, NoFile):
+        flash(trans('admin_profile_not_found', default='Profile not found'), 'danger')
+        return redirect(url_for('admin.profiles'))
+
+@admin_bp.route('/profiles/<profile_id>/download', methods=['GET'])
+@login_required
+@utils.requires_role('admin')
+def download_profile(profile_id):
+    """Download a profile's collapsed stacks (flamegraph.pl / speedscope input)."""
+    from gridfs.errors import NoFile
+    try:
+        grid_out = _load_profile(profile_id)
+        return send_file(BytesIO(grid_out.read()), mimetype='text/plain', as_attachment=True, download_name=grid_out.filename)
+    except (errors.InvalidId, NoFile):
+        flash(trans('admin_profile_not_found', default='Profile not found'), 'danger')
+        return redirect(url_for('admin.profiles'))
+
+@admin_bp.route('/memory', methods=['GET', 'POST'])
+@login_required
+@utils.requires_role('admin')
+@utils.limiter.limit("50 per hour")
+def memory():
+    """Worker RSS, tracemalloc snapshots and snapshot diffs."""
+    import os
+    import tracemalloc
+    diff = None
+    try:
+        if request.method == 'POST':
+            action = request.form.get('action')
+            if action == 'snapshot':
+                name = take_snapshot()
+                log_audit_action('take_memory_snapshot', {'snapshot': name})
+                flash(trans('admin_memory_snapshot_taken', default='Snapshot saved') + f': {name}', 'success')
+            elif action == 'compare':
+                diff = compare_snapshots(request.form.get('base', ''), request.form.get('current', ''))
+        return render_template(
+            'admin/memory.html',
+            workers=get_worker_memory(),
+            tracing=tracemalloc.is_tracing(),
+            traced=tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else None,
+            pid=os.getpid(),
+            snapshots=list_snapshots(),
+            diff=diff,
+            selected_base=request.form.get('base'),
+            selected_current=request.form.get('current'),
+            title=trans('admin_memory', default='Worker Memory')
+        )
+    except (RuntimeError, ValueError) as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('admin.memory'))
+    except Exception as e:
+        logger.error(f"Error on memory page for admin {current_user.id}: {str(e)}",
+                     extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': current_user.id})
+        flash(trans('admin_database_error', default='An error occurred while accessing the database'), 'danger')
+        return render_template('error/500.html'), 500
+
 @admin_bp.route('/feedback', methods=['GET', 'POST'])
 @login_required
 @utils.requires_role('admin')
@@ -1090,6 +1239,9 @@ def contact_signup(entry_id):
 
 def generate_customer_report_pdf(users):
     """Generate a PDF report of customer data."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.units import inch
     try:
         buffer = BytesIO()
         p = canvas.Canvas(buffer, pagesize=A4)
@@ -1143,6 +1295,9 @@ def generate_customer_report_csv(users):
 
 def generate_investor_report_pdf(report_data):
     """Generate a PDF report for investors."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.units import inch
     try:
         buffer = BytesIO()
         p = canvas.Canvas(buffer, pagesize=A4)
@@ -0,0 +1,263 @@
+from flask import Blueprint, jsonify, request, session
+from flask_login import current_user
+from functools import wraps
+from bson import ObjectId
+from datetime import datetime, timedelta, timezone
+from werkzeug.datastructures import MultiDict
+import base64
+import logging
+import utils
+from translations import trans
+from helpers.sync import MAX_BATCH, SyncError, apply_upload
+from helpers.change_log import DEFAULT_LIMIT, CursorError, changes_since
+from helpers.conditional_get import conditional_get
+from blueprints.business.routes import _load_debt_summary, _load_cashflow_summary
+
+logger = logging.getLogger(__name__)
+
+api_bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+API_ROLES = ('trader', 'startup', 'admin')
+
+def api_login_required(f):
+    """Like login_required with requires_role, but answering with JSON errors instead of redirects."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_user.is_authenticated:
+            return jsonify({'error': trans('general_login_required', default='Please log in')}), 401
+        if current_user.role not in API_ROLES:
+            return jsonify({'error': trans('general_access_denied', default='Access denied')}), 403
+        return f(*args, **kwargs)
+    return decorated_function
+
+@api_bp.route('/sync/upload', methods=['POST'])
+@api_login_required
+@utils.limiter.limit('30 per minute')
+def sync_upload():
+    """Store a batch of entries captured offline (see helpers.sync); safe to retry."""
+    if not utils.get_entitlement().can_interact:
+        return jsonify({'error': trans('general_subscription_required', default='Your trial has expired. Please subscribe to continue.')}), 403
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    try:
+        results = apply_upload(utils.get_mongo_db(), str(current_user.id), payload.get('entries'))
+    except SyncError as e:
+        return jsonify({'error': str(e), 'max_batch': MAX_BATCH}), 400
+    except Exception as e:
+        logger.error(f"Sync upload failed for user {current_user.id}: {str(e)}", extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': current_user.id})
+        return jsonify({'error': trans('general_error', default='An error occurred')}), 500
+    counts = {}
+    for result in results:
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+    logger.info(f"Sync upload for user {current_user.id}: {counts}", extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': current_user.id})
+    return jsonify({'results': results, 'counts': counts})
+
+@api_bp.route('/sync/changes')
+@api_login_required
+@utils.limiter.limit('60 per minute')
+def sync_changes():
+    """Records and cashflows created, updated or deleted since the since cursor (see helpers.change_log)."""
+    limit = request.args.get('limit', DEFAULT_LIMIT, type=int)
+    try:
+        return jsonify(changes_since(utils.get_mongo_db(), str(current_user.id), request.args.get('since'), limit))
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Sync changes failed for user {current_user.id}: {str(e)}", extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': current_user.id})
+        return jsonify({'error': trans('general_error', default='An error occurred')}), 500
+
+# Read API. Handlers take the query parameters and return (body, status), so
+# /batch can run several of them in one request. Documents go to jsonify as
+# pymongo returns them; helpers.json_provider serialises ObjectId and datetime.
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+MAX_BATCH_READS = 10
+
+RECORD_TYPES = ('debtor', 'creditor', 'inventory')
+RECORD_FIELDS = frozenset({
+    'type', 'name', 'phone_number', 'email', 'contact', 'amount_owed', 'description', 'cost', 'expected_margin',
+    'reminder_count', 'reminder_date', 'last_reminder_sent', 'created_at', 'updated_at'
+})
+CASHFLOW_TYPES = ('receipt', 'payment')
+CASHFLOW_FIELDS = frozenset({
+    'type', 'party_name', 'amount', 'method', 'category', 'contact', 'description', 'created_at', 'updated_at'
+})
+NOTIFICATION_FIELDS = frozenset({'type', 'message', 'debt_id', 'read', 'timestamp'})
+
+class ApiError(ValueError):
+    """A bad request parameter; answered with 400."""
+
+def _projection(args, allowed):
+    """Projection for the comma-separated fields parameter, or all allowed fields."""
+    fields = [field.strip() for field in args.get('fields', '').split(',') if field.strip()]
+    unknown = sorted(set(fields) - allowed)
+    if unknown:
+        raise ApiError(f"Unknown fields: {', '.join(unknown)}")
+    return dict.fromkeys(fields or allowed, 1)
+
+def _page_size(args):
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ApiError('limit must be a number')
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+def _encode_after(document, sort_key):
+    value = document[sort_key]
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    payload = f"{int(value.timestamp() * 1000)}.{document['_id']}"
+    return base64.urlsafe_b64encode(payload.encode('ascii')).decode('ascii').rstrip('=')
+
+def _after_filter(args, sort_key):
+    """Keyset condition for the after cursor: documents older than the last one returned."""
+    after = args.get('after')
+    if not after:
+        return {}
+    try:
+        millis, doc_id = base64.urlsafe_b64decode(after + '=' * (-len(after) % 4)).decode('ascii').split('.')
+        value = datetime.fromtimestamp(int(millis) / 1000, tz=timezone.utc)
+        doc_id = ObjectId(doc_id)
+    except Exception:
+        raise ApiError('Invalid after cursor')
+    return {'$or': [{sort_key: {'$lt': value}}, {sort_key: value, '_id': {'$lt': doc_id}}]}
+
+def _date_range(args, key):
+    condition = {}
+    for param, operator, shift in (('from', '$gte', 0), ('to', '$lt', 1)):
+        if args.get(param):
+            try:
+                day = datetime.strptime(args[param], '%Y-%m-%d').replace(tzinfo=timezone.utc)
+            except ValueError:
+                raise ApiError(f'{param} must be a date (YYYY-MM-DD)')
+            condition[operator] = day + timedelta(days=shift)
+    return {key: condition} if condition else {}
+
+def _types(args, allowed):
+    requested = [value.strip() for value in args.get('type', '').split(',') if value.strip()]
+    unknown = sorted(set(requested) - set(allowed))
+    if unknown:
+        raise ApiError(f"Unknown type: {', '.join(unknown)}")
+    types = requested or list(allowed)
+    return types[0] if len(types) == 1 else {'$in': types}
+
+def _page(collection, query, projection, args, sort_key='created_at'):
+    """One page, newest first, with the cursor of the next page (keyset pagination on (sort_key, _id))."""
+    limit = _page_size(args)
+    query = dict(query, **_after_filter(args, sort_key))
+    projection = dict(projection, **{sort_key: 1})
+    documents = list(
+        utils.get_mongo_db()[collection].find(query, projection).sort([(sort_key, -1), ('_id', -1)]).limit(limit + 1)
+    )
+    next_cursor = _encode_after(documents[limit - 1], sort_key) if len(documents) > limit else None
+    items = []
+    for document in documents[:limit]:
+        document['id'] = document.pop('_id')
+        items.append(document)
+    return {'items': items, 'next': next_cursor}
+
+def read_records(args):
+    """Debtors, creditors and inventory items (type=debtor,creditor,inventory)."""
+    query = {'user_id': str(current_user.id), 'type': _types(args, RECORD_TYPES)}
+    return _page('records', query, _projection(args, RECORD_FIELDS), args), 200
+
+def read_cashflows(args):
+    """Receipts and payments (type=receipt,payment), optionally from/to a date."""
+    query = {'user_id': str(current_user.id), 'type': _types(args, CASHFLOW_TYPES)}
+    query.update(_date_range(args, 'created_at'))
+    return _page('cashflows', query, _projection(args, CASHFLOW_FIELDS), args), 200
+
+def read_notifications(args):
+    """Notifications, newest first; unread=1 for unread ones only."""
+    query = {'user_id': str(current_user.id)}
+    if args.get('unread') in ('1', 'true'):
+        query['read'] = False
+    return _page('notifications', query, _projection(args, NOTIFICATION_FIELDS), args, sort_key='timestamp'), 200
+
+def read_summaries(args):
+    """What the user owes and is owed, and this month's money in and out."""
+    db = utils.get_mongo_db()
+    user_id = str(current_user.id)
+    today = datetime.now(timezone.utc)
+    debt = _load_debt_summary(db, user_id)
+    cashflow = _load_cashflow_summary(db, user_id, datetime(today.year, today.month, 1, tzinfo=timezone.utc))
+    return {
+        'total_i_owe': debt['total_i_owe'],
+        'total_i_am_owed': debt['total_i_am_owed'],
+        'month': today.strftime('%Y-%m'),
+        'total_receipts': cashflow['total_receipts'],
+        'total_payments': cashflow['total_payments'],
+        'net_cashflow': cashflow['net_cashflow']
+    }, 200
+
+# Resource name: (handler, data version resources its ETag depends on, per_day)
+READ_RESOURCES = {
+    'records': (read_records, ('debtors', 'creditors', 'inventory'), False),
+    'cashflows': (read_cashflows, ('receipts', 'payments'), False),
+    'notifications': (read_notifications, ('notifications',), False),
+    'summaries': (read_summaries, ('debtors', 'creditors', 'receipts', 'payments'), True),
+}
+
+def _read(resource, args):
+    handler = READ_RESOURCES[resource][0]
+    try:
+        return handler(args)
+    except ApiError as e:
+        return {'error': str(e)}, 400
+    except Exception as e:
+        logger.error(f"API read of {resource} failed for user {current_user.id}: {str(e)}", extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': current_user.id})
+        return {'error': trans('general_error', default='An error occurred')}, 500
+
+def _register_read(resource):
+    handler, resources, per_day = READ_RESOURCES[resource]
+
+    def view():
+        body, status = _read(resource, request.args)
+        return jsonify(body), status
+
+    # Named before decorating: Flask-Limiter keys limits on the function name
+    view.__name__ = view.__qualname__ = handler.__name__
+    view.__doc__ = handler.__doc__
+    view = conditional_get(*resources, per_day=per_day, page=False)(view)
+    view = utils.limiter.limit('120 per minute')(view)
+    view = api_login_required(view)
+    api_bp.add_url_rule(f'/{resource}', view.__name__, view)
+
+for _resource in READ_RESOURCES:
+    _register_read(_resource)
+
+@api_bp.route('/batch')
+@api_login_required
+@utils.limiter.limit('60 per minute')
+@conditional_get(*sorted({name for _, resources, _ in READ_RESOURCES.values() for name in resources}), per_day=True, page=False)
+def batch():
+    """
+    Several reads in one round trip.
+
+    include lists the reads as resource or alias:resource; each read's
+    parameters are prefixed with its name:
+
+        /api/v1/batch?include=summaries,debtors:records,cashflows
+                     &debtors.type=debtor&debtors.limit=10&cashflows.limit=20
+
+    Each read is answered as {"status": ..., "body": ...} under its name.
+    """
+    reads = [item.strip() for item in request.args.get('include', '').split(',') if item.strip()]
+    if not reads:
+        return jsonify({'error': 'include is required', 'resources': list(READ_RESOURCES)}), 400
+    if len(reads) > MAX_BATCH_READS:
+        return jsonify({'error': f'At most {MAX_BATCH_READS} reads per batch'}), 400
+    results = {}
+    for item in reads:
+        name, _, resource = item.rpartition(':')
+        name = name or resource
+        if resource not in READ_RESOURCES:
+            results[name] = {'status': 404, 'body': {'error': f'Unknown resource {resource}'}}
+            continue
+        prefix = f'{name}.'
+        args = MultiDict((key[len(prefix):], value) for key, value in request.args.items(multi=True) if key.startswith(prefix))
+        body, status = _read(resource, args)
+        results[name] = {'status': status, 'body': body}
+    return jsonify(results)
@@ -5,9 +5,48 @@ from zoneinfo import ZoneInfo
 import utils
 from utils import logger
 from translations import trans
+from helpers.fragment_cache import render_fragment
+from helpers.conditional_get import conditional_get
 
 business = Blueprint('business', __name__, url_prefix='/business')
 
+def _load_debt_summary(db, user_id):
+    creditors_pipeline = [
+        {'$match': {'user_id': user_id, 'type': 'creditor'}},
+        {'$group': {'_id': None, 'total': {'$sum': '$amount_owed'}}}
+    ]
+    creditors_result = list(db.records.aggregate(creditors_pipeline))
+    debtors_pipeline = [
+        {'$match': {'user_id': user_id, 'type': 'debtor'}},
+        {'$group': {'_id': None, 'total': {'$sum': '$amount_owed'}}}
+    ]
+    debtors_result = list(db.records.aggregate(debtors_pipeline))
+    return {
+        'total_i_owe': utils.clean_currency(creditors_result[0]['total'] if creditors_result else 0),
+        'total_i_am_owed': utils.clean_currency(debtors_result[0]['total'] if debtors_result else 0),
+        'format_currency': utils.format_currency
+    }
+
+def _load_cashflow_summary(db, user_id, start_of_month):
+    receipts_pipeline = [
+        {'$match': {'user_id': user_id, 'type': 'receipt', 'created_at': {'$gte': start_of_month}}},
+        {'$group': {'_id': None, 'total': {'$sum': '$amount'}}}
+    ]
+    receipts_result = list(db.cashflows.aggregate(receipts_pipeline))
+    total_receipts = utils.clean_currency(receipts_result[0]['total'] if receipts_result else 0)
+    payments_pipeline = [
+        {'$match': {'user_id': user_id, 'type': 'payment', 'created_at': {'$gte': start_of_month}}},
+        {'$group': {'_id': None, 'total': {'$sum': '$amount'}}}
+    ]
+    payments_result = list(db.cashflows.aggregate(payments_pipeline))
+    total_payments = utils.clean_currency(payments_result[0]['total'] if payments_result else 0)
+    return {
+        'total_receipts': total_receipts,
+        'total_payments': total_payments,
+        'net_cashflow': total_receipts - total_payments,
+        'format_currency': utils.format_currency
+    }
+
 @business.route('/home')
 @login_required
 @utils.requires_role(['trader', 'startup', 'admin'])
@@ -19,55 +58,28 @@ def home():
         lang = session.get('lang', 'en')
 
         # Check trial/subscription status
-        is_read_only = not current_user.is_subscribed and not current_user.is_trial_active()
-
-        # Fetch debt summary
-        creditors_pipeline = [
-            {'$match': {'user_id': user_id, 'type': 'creditor'}},
-            {'$group': {'_id': None, 'total': {'$sum': '$amount_owed'}}}
-        ]
-        creditors_result = list(db.records.aggregate(creditors_pipeline))
-        total_i_owe = utils.clean_currency(creditors_result[0]['total'] if creditors_result else 0)
-
-        debtors_pipeline = [
-            {'$match': {'user_id': user_id, 'type': 'debtor'}},
-            {'$group': {'_id': None, 'total': {'$sum': '$amount_owed'}}}
-        ]
-        debtors_result = list(db.records.aggregate(debtors_pipeline))
-        total_i_am_owed = utils.clean_currency(debtors_result[0]['total'] if debtors_result else 0)
+        is_read_only = utils.get_entitlement().read_only
 
-        # Fetch cashflow summary
+        # Debt and cashflow cards are cached per user, language and data version
         today = datetime.now(timezone.utc)
         start_of_month = datetime(today.year, today.month, 1, tzinfo=timezone.utc)
-        receipts_pipeline = [
-            {'$match': {'user_id': user_id, 'type': 'receipt', 'created_at': {'$gte': start_of_month}}},
-            {'$group': {'_id': None, 'total': {'$sum': '$amount'}}}
-        ]
-        receipts_result = list(db.cashflows.aggregate(receipts_pipeline))
-        total_receipts = utils.clean_currency(receipts_result[0]['total'] if receipts_result else 0)
-
-        payments_pipeline = [
-            {'$match': {'user_id': user_id, 'type': 'payment', 'created_at': {'$gte': start_of_month}}},
-            {'$group': {'_id': None, 'total': {'$sum': '$amount'}}}
-        ]
-        payments_result = list(db.cashflows.aggregate(payments_pipeline))
-        total_payments = utils.clean_currency(payments_result[0]['total'] if payments_result else 0)
-        net_cashflow = total_receipts - total_payments
+        snapshots_html = render_fragment(
+            'business.home.snapshots', 'general/_home_snapshots.html', lambda: _load_debt_summary(db, user_id)
+        )
+        cashflow_html = render_fragment(
+            'business.home.cashflow', 'general/_home_cashflow.html', lambda: _load_cashflow_summary(db, user_id, start_of_month),
+            vary=(start_of_month.strftime('%Y-%m'),)
+        )
 
         logger.info(
-            f"Rendered business homepage for user {user_id}, read_only={is_read_only}, "
-            f"total_i_owe={total_i_owe}, total_i_am_owed={total_i_am_owed}, net_cashflow={net_cashflow}, "
-            f"total_receipts={total_receipts}, total_payments={total_payments}",
+            f"Rendered business homepage for user {user_id}, read_only={is_read_only}",
             extra={'session_id': session.get('sid', 'no-session-id'), 'ip_address': request.remote_addr}
         )
 
         return render_template(
             'general/home.html',
-            total_i_owe=total_i_owe,
-            total_i_am_owed=total_i_am_owed,
-            net_cashflow=net_cashflow,
-            total_receipts=total_receipts,
-            total_payments=total_payments,
+            snapshots_html=snapshots_html,
+            cashflow_html=cashflow_html,
             title=trans('business_home', lang=lang, default='Business Home'),
             format_currency=utils.format_currency,
             is_read_only=is_read_only,
@@ -134,6 +146,7 @@ def view_data():
 @business.route('/debt/summary')
 @login_required
 @utils.requires_role(['trader', 'startup', 'admin'])
+@conditional_get('debtors', 'creditors', page=False)
 def debt_summary():
     """Fetch debt summary (I Owe, I Am Owed) for the authenticated user."""
     try:
@@ -173,6 +186,7 @@ def debt_summary():
 @business.route('/cashflow/summary')
 @login_required
 @utils.requires_role(['trader', 'startup', 'admin'])
+@conditional_get('receipts', 'payments', per_day=True, page=False)
 def cashflow_summary():
     """Fetch the net cashflow (month-to-date) for the authenticated user."""
     try:
@@ -12,9 +12,9 @@ import re
 import urllib.parse
 import utils
 from translations import trans
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import inch
+from helpers.data_versions import bumps_data_version
+from helpers.conditional_get import conditional_get
+from helpers.change_log import record_deletion
 
 logger = logging.getLogger(__name__)
 
@@ -36,11 +36,26 @@ class CreditorForm(FlaskForm):
     description = TextAreaField(trans('general_description', default='Description'), validators=[Optional()])
     submit = SubmitField(trans('creditors_add_creditor', default='Add Creditor'))
 
+def creditor_document(form, user_id, created_at=None):
+    """The record for a validated CreditorForm (used by add and the sync API); created_at defaults to now."""
+    return {
+        'user_id': str(user_id),
+        'type': 'creditor',
+        'name': utils.sanitize_input(form.name.data, max_length=100),
+        'contact': utils.sanitize_input(form.contact.data, max_length=50) if form.contact.data else None,
+        'amount_owed': utils.clean_currency(form.amount_owed.data),
+        'description': utils.sanitize_input(form.description.data, max_length=500) if form.description.data else None,
+        'reminder_count': 0,
+        'created_at': created_at or datetime.now(timezone.utc),
+        'updated_at': datetime.now(timezone.utc)
+    }
+
 creditors_bp = Blueprint('creditors', __name__, url_prefix='/creditors')
 
 @creditors_bp.route('/')
 @login_required
 @utils.requires_role(['trader', 'startup', 'admin'])
+@conditional_get('creditors')
 def index():
     """List all creditor records for the current user (view-only post-trial)."""
     try:
@@ -217,6 +232,7 @@ def share(id):
 @creditors_bp.route('/send_reminder', methods=['POST'])
 @login_required
 @utils.requires_role(['trader', 'startup', 'admin'])
+@bumps_data_version('creditors')
 def send_reminder():
     """Send delivery reminder to creditor via SMS/WhatsApp or set snooze (requires active trial/subscription)."""
     try:
@@ -248,9 +264,9 @@ def send_reminder():
         if not creditor:
             return jsonify({'success': False, 'message': trans('creditors_record_not_found', default='Record not found')}), 404
         
-        update_data = {'$inc': {'reminder_count': 1}}
+        update_data = {'$inc': {'reminder_count': 1}, '$set': {'updated_at': datetime.now(timezone.utc)}}
         if snooze_days:
-            update_data['$set'] = {'reminder_date': datetime.now(timezone.utc) + timedelta(days=snooze_days)}
+            update_data['$set']['reminder_date'] = datetime.now(timezone.utc) + timedelta(days=snooze_days)
         
         success = True
         api_response = {}
@@ -290,6 +306,9 @@ def send_reminder():
 @utils.requires_role(['trader', 'startup', 'admin'])
 def generate_iou(id):
     """Generate PDF IOU for a creditor (requires active trial/subscription)."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.units import inch
     try:
         if not utils.can_user_interact(current_user):
             flash(trans('creditors_subscription_required', default='Your trial or subscription has expired. Please subscribe to generate IOUs.'), 'warning')
@@ -362,6 +381,7 @@ def generate_iou(id):
 @creditors_bp.route('/add', methods=['GET', 'POST'])
 @login_required
 @utils.requires_role(['trader', 'startup', 'admin'])
+@bumps_data_version('creditors')
 def add():
     """Add a new creditor record (requires active trial/subscription)."""
     if not utils.can_user_interact(current_user):
@@ -372,16 +392,7 @@ def add():
     if form.validate_on_submit():
         try:
             db = utils.get_mongo_db()
-            record = {
-                'user_id': str(current_user.id),
-                'type': 'creditor',
-                'name': utils.sanitize_input(form.name.data, max_length=100),
-                'contact': utils.sanitize_input(form.contact.data, max_length=50) if form.contact.data else None,
-                'amount_owed': utils.clean_currency(form.amount_owed.data),
-                'description': utils.sanitize_input(form.description.data, max_length=500) if form.description.data else None,
-                'reminder_count': 0,
-                'created_at': datetime.now(timezone.utc)
-            }
+            record = creditor_document(form, current_user.id)
             db.records.insert_one(record)
             flash(trans('creditors_create_success', default='Creditor created successfully'), 'success')
             return redirect(url_for('creditors.index'))
@@ -398,6 +409,7 @@ def add():
 @creditors_bp.route('/edit/<id>', methods=['GET', 'POST'])
 @login_required
 @utils.requires_role(['trader', 'startup', 'admin'])
+@bumps_data_version('creditors')
 def edit(id):
     """Edit an existing creditor record (requires active trial/subscription for POST)."""
     try:
@@ -466,6 +478,7 @@ def edit(id):
 @creditors_bp.route('/delete/<id>', methods=['POST'])
 @login_required
 @utils.requires_role(['trader', 'startup', 'admin'])
+@bumps_data_version('creditors')
 def delete(id):
     """Delete a creditor record (requires active trial/subscription)."""
     try:
@@ -481,6 +494,7 @@ def delete(id):
             return redirect(url_for('creditors.index'))
         result = db.records.delete_one(query)
         if result.deleted_count:
+            record_deletion(db, 'records', creditor)
             flash(trans('creditors_delete_success', default='Creditor deleted successfully'), 'success')
         else:
             flash(trans('creditors_record_not_found', default='Record not found'), 'danger')
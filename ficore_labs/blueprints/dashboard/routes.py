@@ -8,6 +8,10 @@ from translations import trans
 import utils
 from utils import format_date
 from helpers import reminders
+from helpers.query_metrics import query_budget
+from helpers.fragment_cache import render_fragment
+from markupsafe import Markup
+from helpers.conditional_get import conditional_get
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +20,7 @@ dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/dashboard')
 # API endpoint for weekly profit data (for dashboard chart)
 @dashboard_bp.route('/weekly_profit_data')
 @login_required
+@conditional_get(per_day=True, page=False)
 def weekly_profit_data():
     db = utils.get_mongo_db()
     user_id = str(current_user.id)
@@ -44,18 +49,8 @@ def weekly_profit_data():
         })
     return jsonify({'data': profit_per_day})
 
-@dashboard_bp.route('/')
-@login_required
-def index():
-    """Display the user's dashboard with recent activity and role-specific content."""
-    # Initialize data containers with defaults
-    recent_creditors = []
-    recent_debtors = []
-    recent_payments = []
-    recent_receipts = []
-    recent_funds = []
-    recent_inventory = []
-    stats = {
+def _default_stats():
+    return {
         'total_debtors': 0,
         'total_creditors': 0,
         'total_payments': 0,
@@ -71,129 +66,157 @@ def index():
         'total_inventory': 0,
         'total_inventory_cost': 0
     }
-    can_interact = False
-    show_daily_log_reminder = False
-    streak = 0
-    unpaid_debtors = []
-    unpaid_creditors = []
-    inventory_loss = False
 
-    try:
-        db = utils.get_mongo_db()
-        query = {'user_id': str(current_user.id)}
-        tax_prep_mode = request.args.get('tax_prep') == '1'
+def _as_utc(value):
+    if value and value.tzinfo is None:
+        return value.replace(tzinfo=ZoneInfo("UTC"))
+    return value
+
+def _load_alerts(db, user_id):
+    unpaid_debtors, unpaid_creditors = reminders.get_unpaid_debts_credits(db, user_id)
+    return {
+        'inventory_loss': reminders.detect_inventory_loss(db, user_id),
+        'unpaid_debtors': unpaid_debtors,
+        'unpaid_creditors': unpaid_creditors
+    }
+
+def _load_streak(db, user_id):
+    rewards_data = db.rewards.find_one({'user_id': user_id})
+    streak = rewards_data.get('streak', 0) if rewards_data else 0
+    logger.debug(f"Calculated streak: {streak} for user_id: {user_id}")
+    return {'streak': streak}
 
-        # Fetch reminders and streak data
+def _load_stats(db, user_id, tax_prep_mode):
+    query = {'user_id': user_id}
+    stats = _default_stats()
+    if tax_prep_mode:
+        sales = db.records.aggregate([
+            {'$match': {**query, 'type': 'sale'}},
+            {'$group': {'_id': None, 'total': {'$sum': '$amount'}}}
+        ])
+        expenses = db.records.aggregate([
+            {'$match': {**query, 'type': 'expense'}},
+            {'$group': {'_id': None, 'total': {'$sum': '$amount'}}}
+        ])
+        stats['profit_only'] = next(sales, {}).get('total', 0) - next(expenses, {}).get('total', 0)
+    stats.update({
+        'total_debtors': db.records.count_documents({**query, 'type': 'debtor'}),
+        'total_creditors': db.records.count_documents({**query, 'type': 'creditor'}),
+        'total_payments': db.cashflows.count_documents({**query, 'type': 'payment'}),
+        'total_receipts': db.cashflows.count_documents({**query, 'type': 'receipt'}),
+        'total_funds': db.records.count_documents({**query, 'type': 'fund'}),
+        'total_debtors_amount': sum(doc.get('amount_owed', 0) for doc in db.records.find({**query, 'type': 'debtor'})),
+        'total_creditors_amount': sum(doc.get('amount_owed', 0) for doc in db.records.find({**query, 'type': 'creditor'})),
+        'total_payments_amount': sum(doc.get('amount', 0) for doc in db.cashflows.find({**query, 'type': 'payment'})),
+        'total_receipts_amount': sum(doc.get('amount', 0) for doc in db.cashflows.find({**query, 'type': 'receipt'})),
+        'total_funds_amount': sum(doc.get('amount', 0) for doc in db.records.find({**query, 'type': 'fund'})),
+        'total_forecasts': db.records.count_documents({**query, 'type': 'forecast'}),
+        'total_forecasts_amount': sum(doc.get('projected_revenue', 0) for doc in db.records.find({**query, 'type': 'forecast'})),
+        'total_inventory': db.records.count_documents({**query, 'type': 'inventory'}),
+        'total_inventory_cost': sum(doc.get('cost', 0) for doc in db.records.find({**query, 'type': 'inventory'}))
+    })
+    return {
+        'stats': stats,
+        'tax_prep_mode': tax_prep_mode,
+        'show_daily_log_reminder': reminders.needs_daily_log_reminder(db, user_id)
+    }
+
+def _load_recent(db, user_id, can_interact):
+    query = {'user_id': user_id}
+    recent_creditors = list(db.records.find({**query, 'type': 'creditor'}).sort('created_at', -1).limit(5))
+    recent_debtors = list(db.records.find({**query, 'type': 'debtor'}).sort('created_at', -1).limit(5))
+    recent_payments = list(db.cashflows.find({**query, 'type': 'payment'}).sort('created_at', -1).limit(5))
+    recent_receipts = list(db.cashflows.find({**query, 'type': 'receipt'}).sort('created_at', -1).limit(5))
+    recent_funds = list(db.records.find({**query, 'type': 'fund'}).sort('created_at', -1).limit(5))
+    recent_inventory = list(db.records.find({**query, 'type': 'inventory'}).sort('created_at', -1).limit(5))
+
+    # Sanitize and convert datetimes
+    for item in recent_creditors + recent_debtors:
         try:
-            show_daily_log_reminder = reminders.needs_daily_log_reminder(db, current_user.id)
-            rewards_data = db.rewards.find_one({'user_id': str(current_user.id)})
-            streak = rewards_data.get('streak', 0) if rewards_data else 0
-            unpaid_debtors, unpaid_creditors = reminders.get_unpaid_debts_credits(db, current_user.id)
-            inventory_loss = reminders.detect_inventory_loss(db, current_user.id)
-            logger.debug(f"Calculated streak: {streak} for user_id: {current_user.id}")
+            item['created_at'] = _as_utc(item.get('created_at'))
+            item['reminder_date'] = _as_utc(item.get('reminder_date'))
+            item['name'] = utils.sanitize_input(item.get('name', ''), max_length=100)
+            item['description'] = utils.sanitize_input(item.get('description', 'No description provided'), max_length=500)
+            item['contact'] = utils.sanitize_input(item.get('contact', 'N/A'), max_length=50)
+            item['_id'] = str(item['_id'])
         except Exception as e:
-            logger.warning(f"Failed to calculate reminders or streak: {str(e)}", 
-                          extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': current_user.id})
-            streak = 0
-            flash(trans('reminder_load_error', default='Unable to load reminders or streak data.'), 'warning')
+            logger.warning(f"Error processing creditor/debtor item {item.get('_id')}: {str(e)}")
+            continue
 
-        # Fetch recent data with error handling
+    for item in recent_payments + recent_receipts:
         try:
-            if tax_prep_mode:
-                sales = db.records.aggregate([
-                    {'$match': {**query, 'type': 'sale'}},
-                    {'$group': {'_id': None, 'total': {'$sum': '$amount'}}}
-                ])
-                expenses = db.records.aggregate([
-                    {'$match': {**query, 'type': 'expense'}},
-                    {'$group': {'_id': None, 'total': {'$sum': '$amount'}}}
-                ])
-                stats['profit_only'] = next(sales, {}).get('total', 0) - next(expenses, {}).get('total', 0)
-                stats['total_receipts'] = stats['total_payments'] = stats['total_funds'] = 0
-                stats['total_receipts_amount'] = stats['total_payments_amount'] = stats['total_funds_amount'] = 0
-            recent_creditors = list(db.records.find({**query, 'type': 'creditor'}).sort('created_at', -1).limit(5))
-            recent_debtors = list(db.records.find({**query, 'type': 'debtor'}).sort('created_at', -1).limit(5))
-            recent_payments = list(db.cashflows.find({**query, 'type': 'payment'}).sort('created_at', -1).limit(5))
-            recent_receipts = list(db.cashflows.find({**query, 'type': 'receipt'}).sort('created_at', -1).limit(5))
-            recent_funds = list(db.records.find({**query, 'type': 'fund'}).sort('created_at', -1).limit(5))
-            recent_inventory = list(db.records.find({**query, 'type': 'inventory'}).sort('created_at', -1).limit(5))
+            item['created_at'] = _as_utc(item.get('created_at'))
+            item['description'] = utils.sanitize_input(item.get('description', 'No description provided'), max_length=500)
+            item['_id'] = str(item['_id'])
+            # Rename 'party_name' to match template
+            item['recipient' if item['type'] == 'payment' else 'payer'] = utils.sanitize_input(item.get('party_name', 'N/A'), max_length=100)
         except Exception as e:
-            logger.error(f"Error querying MongoDB for dashboard data: {str(e)}", 
-                        extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': current_user.id})
-            flash(trans('dashboard_load_error', default='Failed to load some dashboard data. Displaying available information.'), 'warning')
-
-        # Sanitize and convert datetimes
-        for item in recent_creditors + recent_debtors:
-            try:
-                if item.get('created_at') and item['created_at'].tzinfo is None:
-                    item['created_at'] = item['created_at'].replace(tzinfo=ZoneInfo("UTC"))
-                if item.get('reminder_date') and item['reminder_date'].tzinfo is None:
-                    item['reminder_date'] = item['reminder_date'].replace(tzinfo=ZoneInfo("UTC"))
-                item['name'] = utils.sanitize_input(item.get('name', ''), max_length=100)
-                item['description'] = utils.sanitize_input(item.get('description', 'No description provided'), max_length=500)
-                item['contact'] = utils.sanitize_input(item.get('contact', 'N/A'), max_length=50)
-                item['_id'] = str(item['_id'])
-            except Exception as e:
-                logger.warning(f"Error processing creditor/debtor item {item.get('_id')}: {str(e)}")
-                continue
-
-        for item in recent_payments + recent_receipts:
-            try:
-                if item.get('created_at') and item['created_at'].tzinfo is None:
-                    item['created_at'] = item['created_at'].replace(tzinfo=ZoneInfo("UTC"))
-                item['description'] = utils.sanitize_input(item.get('description', 'No description provided'), max_length=500)
-                item['_id'] = str(item['_id'])
-                # Rename 'party_name' to match template
-                item['recipient' if item['type'] == 'payment' else 'payer'] = utils.sanitize_input(item.get('party_name', 'N/A'), max_length=100)
-            except Exception as e:
-                logger.warning(f"Error processing payment/receipt item {item.get('_id')}: {str(e)}")
-                continue
-
-        for item in recent_funds:
-            try:
-                if item.get('created_at') and item['created_at'].tzinfo is None:
-                    item['created_at'] = item['created_at'].replace(tzinfo=ZoneInfo("UTC"))
-                item['name'] = utils.sanitize_input(item.get('source', ''), max_length=100)
-                item['description'] = utils.sanitize_input(item.get('description', 'No description provided'), max_length=500)
-                item['_id'] = str(item['_id'])
-            except Exception as e:
-                logger.warning(f"Error processing fund item {item.get('_id')}: {str(e)}")
-                continue
-
-        for item in recent_inventory:
-            try:
-                if item.get('created_at') and item['created_at'].tzinfo is None:
-                    item['created_at'] = item['created_at'].replace(tzinfo=ZoneInfo("UTC"))
-                item['name'] = utils.sanitize_input(item.get('name', ''), max_length=100)
-                item['cost'] = float(item.get('cost', 0))
-                item['expected_margin'] = float(item.get('expected_margin', 0))
-                item['_id'] = str(item['_id'])
-            except Exception as e:
-                logger.warning(f"Error processing inventory item {item.get('_id')}: {str(e)}")
-                continue
-
-        # Calculate stats with safe access
+            logger.warning(f"Error processing payment/receipt item {item.get('_id')}: {str(e)}")
+            continue
+
+    for item in recent_funds:
         try:
-            stats.update({
-                'total_debtors': db.records.count_documents({**query, 'type': 'debtor'}),
-                'total_creditors': db.records.count_documents({**query, 'type': 'creditor'}),
-                'total_payments': db.cashflows.count_documents({**query, 'type': 'payment'}),
-                'total_receipts': db.cashflows.count_documents({**query, 'type': 'receipt'}),
-                'total_funds': db.records.count_documents({**query, 'type': 'fund'}),
-                'total_debtors_amount': sum(doc.get('amount_owed', 0) for doc in db.records.find({**query, 'type': 'debtor'})),
-                'total_creditors_amount': sum(doc.get('amount_owed', 0) for doc in db.records.find({**query, 'type': 'creditor'})),
-                'total_payments_amount': sum(doc.get('amount', 0) for doc in db.cashflows.find({**query, 'type': 'payment'})),
-                'total_receipts_amount': sum(doc.get('amount', 0) for doc in db.cashflows.find({**query, 'type': 'receipt'})),
-                'total_funds_amount': sum(doc.get('amount', 0) for doc in db.records.find({**query, 'type': 'fund'})),
-                'total_forecasts': db.records.count_documents({**query, 'type': 'forecast'}),
-                'total_forecasts_amount': sum(doc.get('projected_revenue', 0) for doc in db.records.find({**query, 'type': 'forecast'})),
-                'total_inventory': db.records.count_documents({**query, 'type': 'inventory'}),
-                'total_inventory_cost': sum(doc.get('cost', 0) for doc in db.records.find({**query, 'type': 'inventory'}))
-            })
+            item['created_at'] = _as_utc(item.get('created_at'))
+            item['name'] = utils.sanitize_input(item.get('source', ''), max_length=100)
+            item['description'] = utils.sanitize_input(item.get('description', 'No description provided'), max_length=500)
+            item['_id'] = str(item['_id'])
         except Exception as e:
-            logger.error(f"Error calculating stats for dashboard: {str(e)}", 
-                        extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': current_user.id})
-            flash(trans('dashboard_stats_error', default='Unable to calculate dashboard statistics. Displaying defaults.'), 'warning')
+            logger.warning(f"Error processing fund item {item.get('_id')}: {str(e)}")
+            continue
+
+    for item in recent_inventory:
+        try:
+            item['created_at'] = _as_utc(item.get('created_at'))
+            item['name'] = utils.sanitize_input(item.get('name', ''), max_length=100)
+            item['cost'] = float(item.get('cost', 0))
+            item['expected_margin'] = float(item.get('expected_margin', 0))
+            item['_id'] = str(item['_id'])
+        except Exception as e:
+            logger.warning(f"Error processing inventory item {item.get('_id')}: {str(e)}")
+            continue
+
+    return {
+        'recent_creditors': recent_creditors,
+        'recent_debtors': recent_debtors,
+        'recent_payments': recent_payments,
+        'recent_receipts': recent_receipts,
+        'recent_funds': recent_funds,
+        'recent_inventory': recent_inventory,
+        'can_interact': can_interact
+    }
+
+def _empty_recent(can_interact):
+    return {
+        'recent_creditors': [],
+        'recent_debtors': [],
+        'recent_payments': [],
+        'recent_receipts': [],
+        'recent_funds': [],
+        'recent_inventory': [],
+        'can_interact': can_interact
+    }
+
+def _flash_fallback(message_key, default, context):
+    """Fragment fallback that flashes a warning and renders context."""
+    def fallback():
+        flash(trans(message_key, default=default), 'warning')
+        return context
+    return fallback
+
+@dashboard_bp.route('/')
+@login_required
+@query_budget(32)
+def index():
+    """Display the user's dashboard with recent activity and role-specific content."""
+    can_interact = False
+    tax_prep_mode = False
+
+    try:
+        db = utils.get_mongo_db()
+        user_id = str(current_user.id)
+        tax_prep_mode = request.args.get('tax_prep') == '1'
+        # The daily log reminder depends on the date as well as the user's data
+        today = datetime.now(timezone.utc).date().isoformat()
 
         # Check subscription status
         try:
@@ -203,23 +226,42 @@ def index():
                         extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': current_user.id})
             flash(trans('interaction_check_error', default='Unable to verify interaction status.'), 'warning')
 
+        # Each card is cached per user, language and data version
+        reminder_error = ('reminder_load_error', 'Unable to load reminders or streak data.')
+        alerts_html = render_fragment(
+            'dashboard.alerts', 'dashboard/_alerts.html', lambda: _load_alerts(db, user_id),
+            fallback=_flash_fallback(*reminder_error, {'inventory_loss': False, 'unpaid_debtors': [], 'unpaid_creditors': []})
+        )
+        streak_html = render_fragment(
+            'dashboard.streak', 'dashboard/_streak.html', lambda: _load_streak(db, user_id),
+            fallback=_flash_fallback(*reminder_error, {'streak': 0})
+        )
+        stats_html = render_fragment(
+            'dashboard.stats', 'dashboard/_stats.html', lambda: _load_stats(db, user_id, tax_prep_mode),
+            vary=(int(tax_prep_mode), today),
+            fallback=_flash_fallback(
+                'dashboard_stats_error', 'Unable to calculate dashboard statistics. Displaying defaults.',
+                {'stats': _default_stats(), 'tax_prep_mode': tax_prep_mode, 'show_daily_log_reminder': False}
+            )
+        )
+        recent_html = render_fragment(
+            'dashboard.recent', 'dashboard/_recent.html', lambda: _load_recent(db, user_id, can_interact),
+            vary=(int(can_interact),),
+            fallback=_flash_fallback(
+                'dashboard_load_error', 'Failed to load some dashboard data. Displaying available information.',
+                _empty_recent(can_interact)
+            )
+        )
+
         # Render dashboard with all required variables
         return render_template(
             'dashboard/index.html',
-            recent_creditors=recent_creditors,
-            recent_debtors=recent_debtors,
-            recent_payments=recent_payments,
-            recent_receipts=recent_receipts,
-            recent_funds=recent_funds,
-            recent_inventory=recent_inventory,
-            stats=stats,
+            alerts_html=alerts_html,
+            streak_html=streak_html,
+            stats_html=stats_html,
+            recent_html=recent_html,
             can_interact=can_interact,
-            show_daily_log_reminder=show_daily_log_reminder,
-            streak=streak,
-            unpaid_debtors=unpaid_debtors,
-            unpaid_creditors=unpaid_creditors,
-            tax_prep_mode=tax_prep_mode,
-            inventory_loss=inventory_loss
+            tax_prep_mode=tax_prep_mode
         )
 
     except Exception as e:
@@ -228,18 +270,10 @@ def index():
         flash(trans('dashboard_critical_error', default='An error occurred while loading the dashboard. Please try again later.'), 'danger')
         return render_template(
             'dashboard/index.html',
-            recent_creditors=[],
-            recent_debtors=[],
-            recent_payments=[],
-            recent_receipts=[],
-            recent_funds=[],
-            recent_inventory=[],
-            stats=stats,
+            alerts_html='',
+            streak_html=Markup(render_template('dashboard/_streak.html', streak=0)),
+            stats_html=Markup(render_template('dashboard/_stats.html', stats=_default_stats(), tax_prep_mode=False, show_daily_log_reminder=False)),
+            recent_html=Markup(render_template('dashboard/_recent.html', **_empty_recent(False))),
             can_interact=False,
-            show_daily_log_reminder=False,
-            streak=0,
-            unpaid_debtors=[],
-            unpaid_creditors=[],
-            tax_prep_mode=False,
-            inventory_loss=False
+            tax_prep_mode=False
         )
@@ -4,6 +4,7 @@ from flask_wtf import FlaskForm
 from wtforms import StringField, FloatField, TextAreaField, SubmitField
 from wtforms.validators import DataRequired, Optional
 from bson import ObjectId
+from pymongo import UpdateOne
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 import logging
@@ -12,12 +13,13 @@ import re
 import urllib.parse
 import utils
 from translations import trans
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import inch
 from helpers.branding_helpers import draw_ficore_pdf_header, ficore_csv_header
 import csv
 from models import get_user  # Added import for get_user
+from helpers.query_metrics import query_budget
+from helpers.data_versions import bump_data_version, bumps_data_version
+from helpers.conditional_get import conditional_get
+from helpers.change_log import record_deletion
 
 logger = logging.getLogger(__name__)
 
@@ -40,6 +42,21 @@ class DebtorForm(FlaskForm):
     description = TextAreaField(trans('debtors_description', default='Description of Transaction'), validators=[Optional()])
     submit = SubmitField(trans('debtors_add_debtor', default='Add Debtor'))
 
+def debtor_document(form, user_id, created_at=None):
+    """The record for a validated DebtorForm (used by add and the sync API); created_at defaults to now."""
+    return {
+        'user_id': str(user_id),
+        'type': 'debtor',
+        'name': utils.sanitize_input(form.name.data, max_length=100),
+        'phone_number': utils.sanitize_input(form.phone_number.data, max_length=50),
+        'email': utils.sanitize_input(form.email.data, max_length=100) if form.email.data else None,
+        'amount_owed': utils.clean_currency(form.amount_owed.data),
+        'description': utils.sanitize_input(form.description.data, max_length=500) if form.description.data else None,
+        'created_at': created_at or datetime.now(timezone.utc),
+        'updated_at': datetime.now(timezone.utc),
+        'reminder_count': 0
+    }
+
 debtors_bp = Blueprint('debtors', __name__, url_prefix='/debtors')
 
 # Define default aging thresholds (in days)
@@ -76,6 +93,8 @@ def generate_debt_notifications(user_id):
     query = {'user_id': str(user_id), 'type': 'debtor'}
     debtors = list(db.records.find(query))
     notifications = []
+    # One write for all reminded debtors rather than one per debtor
+    reminded = {}
     reminder_frequencies = get_user_reminder_frequency(user_id)
     selected_thresholds = [DEFAULT_AGING_THRESHOLDS[freq] for freq in reminder_frequencies if freq in DEFAULT_AGING_THRESHOLDS]
 
@@ -101,13 +120,17 @@ def generate_debt_notifications(user_id):
                     }
                     notifications.append(notification)
                     # Update debtor with last reminder sent
-                    db.records.update_one(
+                    reminded[debtor['_id']] = UpdateOne(
                         {'_id': debtor['_id']},
-                        {'$set': {'last_reminder_sent': datetime.now(timezone.utc), 'reminder_count': debtor.get('reminder_count', 0) + 1}}
+                        {'$set': {'last_reminder_sent': datetime.now(timezone.utc), 'reminder_count': debtor.get('reminder_count', 0) + 1, 'updated_at': datetime.now(timezone.utc)}}
                     )
 
+    if reminded:
+        db.records.bulk_write(list(reminded.values()), ordered=False)
     if notifications:
         db.notifications.insert_many(notifications)
+        # reminder_count changed on the debtors shown on the dashboard
+        bump_data_version(db, str(user_id), 'debtors', 'notifications')
         logger.info(
             f"Generated {len(notifications)} debt notifications for user {user_id}",
             extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': user_id}
@@ -117,6 +140,9 @@ def generate_debt_notifications(user_id):
 @debtors_bp.route('/')
 @login_required
 @utils.requires_role(['trader', 'startup', 'admin'])
+# Ages are shown in days and overdue notifications are generated here, so vary by day
+@conditional_get('debtors', per_day=True)
+@query_budget(12)
 def index():
     """List all debtor records for the current user (view-only post-trial)."""
     try:
@@ -298,6 +324,7 @@ def share(id):
 @debtors_bp.route('/send_reminder', methods=['POST'])
 @login_required
 @utils.requires_role(['trader', 'startup', 'admin'])
+@bumps_data_version('debtors')
 def send_reminder():
     """Send reminder to debtor via SMS/WhatsApp or set snooze (requires active trial/subscription)."""
     try:
@@ -329,9 +356,9 @@ def send_reminder():
         if not debtor:
             return jsonify({'success': False, 'message': trans('debtors_record_not_found', default='Record not found')}), 404
         
-        update_data = {'$inc': {'reminder_count': 1}}
+        update_data = {'$inc': {'reminder_count': 1}, '$set': {'updated_at': datetime.now(timezone.utc)}}
         if snooze_days:
-            update_data['$set'] = {'reminder_date': datetime.now(timezone.utc) + timedelta(days=snooze_days)}
+            update_data['$set']['reminder_date'] = datetime.now(timezone.utc) + timedelta(days=snooze_days)
         
         success = True
         api_response = {}
@@ -371,6 +398,9 @@ def send_reminder():
 @utils.requires_role(['trader', 'startup', 'admin'])
 def generate_iou(id):
     """Generate PDF IOU for a debtor (requires active trial/subscription)."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.units import inch
     try:
         if not utils.can_user_interact(current_user):
             flash(trans('debtors_subscription_required', default='Your trial or subscription has expired. Please subscribe to generate IOUs.'), 'warning')
@@ -517,6 +547,7 @@ def generate_iou_csv(id):
 @debtors_bp.route('/add', methods=['GET', 'POST'])
 @login_required
 @utils.requires_role(['trader', 'startup', 'admin'])
+@bumps_data_version('debtors')
 def add():
     """Add a new debtor record (requires active trial/subscription)."""
     if not utils.can_user_interact(current_user):
@@ -527,17 +558,7 @@ def add():
     if form.validate_on_submit():
         try:
             db = utils.get_mongo_db()
-            debtor_data = {
-                'user_id': str(current_user.id),
-                'type': 'debtor',
-                'name': utils.sanitize_input(form.name.data, max_length=100),
-                'phone_number': utils.sanitize_input(form.phone_number.data, max_length=50),
-                'email': utils.sanitize_input(form.email.data, max_length=100) if form.email.data else None,
-                'amount_owed': utils.clean_currency(form.amount_owed.data),
-                'description': utils.sanitize_input(form.description.data, max_length=500) if form.description.data else None,
-                'created_at': datetime.now(timezone.utc),
-                'reminder_count': 0
-            }
+            debtor_data = debtor_document(form, current_user.id)
             db.records.insert_one(debtor_data)
             
             flash(trans('debtors_add_success', default='Debtor added successfully'), 'success')
@@ -556,6 +577,7 @@ def add():
 @debtors_bp.route('/edit/<id>', methods=['GET', 'POST'])
 @login_required
 @utils.requires_role(['trader', 'startup', 'admin'])
+@bumps_data_version('debtors')
 def edit(id):
     """Edit an existing debtor record (requires active trial/subscription for POST)."""
     try:
@@ -629,6 +651,7 @@ def edit(id):
 @debtors_bp.route('/delete/<id>', methods=['POST'])
 @login_required
 @utils.requires_role(['trader', 'startup', 'admin'])
+@bumps_data_version('debtors')
 def delete(id):
     """Delete a debtor record (requires active trial/subscription)."""
     try:
@@ -644,6 +667,7 @@ def delete(id):
             return redirect(url_for('debtors.index'))
         result = db.records.delete_one(query)
         if result.deleted_count:
+            record_deletion(db, 'records', debtor)
             flash(trans('debtors_delete_success', default='Debtor deleted successfully'), 'success')
         else:
             flash(trans('debtors_record_not_found', default='Record not found'), 'danger')
@@ -658,6 +682,7 @@ def delete(id):
 @debtors_bp.route('/notifications/count')
 @login_required
 @utils.requires_role(['trader', 'startup', 'admin'])
+@conditional_get('notifications', page=False)
 def notification_count():
     """Return the count of unread notifications."""
     try:
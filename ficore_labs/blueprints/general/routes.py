@@ -10,6 +10,7 @@ from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
 from models import create_feedback, get_mongo_db, get_user, create_waitlist_entry, get_waitlist_entries
 from flask import current_app
+from markupsafe import Markup
 import utils
 from blueprints.users.routes import get_post_login_redirect
 
@@ -48,8 +49,8 @@ def landing():
             return redirect(url_for('users.login')), 500
     try:
         current_app.logger.info(
-            f"Accessing general.landing - User: {current_user.id if current_user.is_authenticated else 'anonymous'}, Authenticated: {current_user.is_authenticated}, Session: {dict(session)}",
-            extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': current_user.id if current_user.is_authenticated else 'anonymous'}
+            "Accessing general.landing - User: %s, Authenticated: %s",
+            current_user.id if current_user.is_authenticated else 'anonymous', current_user.is_authenticated
         )
         explore_features = utils.get_explore_features()
         response = make_response(render_template(
@@ -93,10 +94,10 @@ def landing():
 def home():
     """Trader homepage with trial/subscription check."""
     try:
-        user = get_user(get_mongo_db(), current_user.id)
-        if not user.is_trial_active():
+        if not utils.get_entitlement().can_interact:
             flash(trans('general_subscription_required', default='Your trial has expired. Please subscribe to continue.'), 'warning')
             return redirect(url_for('subscribe_bp.subscribe'))
+        user = get_user(get_mongo_db(), current_user.id)
         
         if user.trial_end and user.trial_end.tzinfo is None:
             user.trial_end = user.trial_end.replace(tzinfo=ZoneInfo("UTC"))
@@ -115,11 +116,13 @@ def home():
             title=trans('general_business_home', lang=session.get('lang', 'en'), default='Business Dashboard'),
             is_trial=user.is_trial,
             trial_end=user.trial_end,
-            total_i_owe=total_i_owe,
-            total_i_am_owed=total_i_am_owed,
-            net_cashflow=net_cashflow,
-            total_receipts=total_receipts,
-            total_payments=total_payments,
+            snapshots_html=Markup(render_template(
+                'general/_home_snapshots.html', total_i_owe=total_i_owe, total_i_am_owed=total_i_am_owed
+            )),
+            cashflow_html=Markup(render_template(
+                'general/_home_cashflow.html', net_cashflow=net_cashflow,
+                total_receipts=total_receipts, total_payments=total_payments
+            )),
             tools_for_template=tools_for_template,
             explore_features_for_template=explore_features_for_template,
             is_read_only=is_read_only
@@ -276,11 +279,9 @@ def feedback():
                 flash(trans('general_invalid_input', default='Please provide a rating between 1 and 5'), 'danger')
                 return render_template('general/feedback.html', tool_options=tool_options, title=trans('general_feedback', lang=lang))
             
-            if current_user.is_authenticated:
-                user = get_user(get_mongo_db(), current_user.id)
-                if not user.is_trial_active():
-                    flash(trans('general_subscription_required', default='Your trial has expired. Please subscribe to submit feedback.'), 'warning')
-                    return redirect(url_for('subscribe_bp.subscribe'))
+            if utils.get_entitlement().read_only:
+                flash(trans('general_subscription_required', default='Your trial has expired. Please subscribe to submit feedback.'), 'warning')
+                return redirect(url_for('subscribe_bp.subscribe'))
             
             with current_app.app_context():
                 db = get_mongo_db()
@@ -0,0 +1,156 @@
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, session, send_file, current_app
+from flask_login import login_required, current_user
+from flask_wtf import FlaskForm
+from flask_wtf.file import FileAllowed, FileRequired
+from wtforms import SelectField, FileField, SubmitField
+from bson import ObjectId, errors
+from io import BytesIO
+import logging
+import utils
+from translations import trans
+from helpers.bulk_import import IMPORTS_BUCKET, IMPORT_KINDS, BulkImportError, active_import, create_import, start_import
+
+logger = logging.getLogger(__name__)
+
+imports_bp = Blueprint('imports', __name__, url_prefix='/imports')
+
+# Where to send the user once an import of each kind is done
+KIND_INDEX = {
+    'receipt': 'receipts.index',
+    'payment': 'payments.index',
+    'debtor': 'debtors.index',
+    'inventory': 'inventory.index',
+}
+
+class ImportForm(FlaskForm):
+    kind = SelectField(trans('general_import_kind', default='What are you importing?'), choices=[
+        ('receipt', trans('receipts_title', default='Money In')),
+        ('payment', trans('payments_title', default='Money Out')),
+        ('debtor', trans('debtors_title', default='Debtors')),
+        ('inventory', trans('general_inventory', default='Inventory'))
+    ])
+    file = FileField(trans('general_import_file', default='CSV or Excel file'), validators=[
+        FileRequired(),
+        FileAllowed(['csv', 'xlsx'], trans('general_import_file_type', default='Only .csv and .xlsx files can be imported'))
+    ])
+    submit = SubmitField(trans('general_import_upload', default='Upload'))
+
+def _get_job(job_id):
+    try:
+        return utils.get_mongo_db().import_jobs.find_one({'_id': ObjectId(job_id), 'user_id': str(current_user.id)})
+    except errors.InvalidId:
+        return None
+
+def _job_status(job):
+    status = {key: job.get(key, 0) for key in ('processed', 'created', 'invalid', 'failed', 'percent')}
+    status['status'] = job['status']
+    status['truncated'] = job.get('truncated', False)
+    status['error'] = job.get('error')
+    status['errors_url'] = url_for('imports.errors_file', job_id=str(job['_id'])) if job.get('errors_id') else None
+    status['done_url'] = url_for(KIND_INDEX[job['kind']])
+    return status
+
+@imports_bp.route('/', methods=['GET', 'POST'])
+@login_required
+@utils.requires_role(['trader', 'startup', 'admin'])
+@utils.limiter.limit('10 per hour', methods=['POST'])
+def upload():
+    """Upload a spreadsheet to import; the next page maps its columns."""
+    if not utils.can_user_interact(current_user):
+        flash(trans('general_subscription_required', default='Your trial has expired. Please subscribe to continue.'), 'warning')
+        return redirect(url_for('subscribe_bp.subscribe'))
+    form = ImportForm(kind=request.args.get('kind') if request.args.get('kind') in IMPORT_KINDS else None)
+    if form.validate_on_submit():
+        db = utils.get_mongo_db()
+        running = active_import(db, current_user.id)
+        if running:
+            flash(trans('general_import_running', default='An import is already running. Please wait for it to finish.'), 'warning')
+            return redirect(url_for('imports.job', job_id=str(running['_id'])))
+        try:
+            job_id = create_import(db, current_user.id, form.kind.data, form.file.data)
+            return redirect(url_for('imports.job', job_id=str(job_id)))
+        except BulkImportError as e:
+            flash(str(e), 'danger')
+        except Exception as e:
+            logger.error(f"Error uploading import for user {current_user.id}: {str(e)}", extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': current_user.id})
+            flash(trans('general_error', default='An error occurred'), 'danger')
+    return render_template('imports/upload.html', form=form, title=trans('general_import_title', default='Import from a Spreadsheet'))
+
+@imports_bp.route('/<job_id>')
+@login_required
+@utils.requires_role(['trader', 'startup', 'admin'])
+def job(job_id):
+    """Column mapping for a new import, progress for a started one."""
+    import_job = _get_job(job_id)
+    if import_job is None:
+        flash(trans('general_import_not_found', default='Import not found'), 'danger')
+        return redirect(url_for('imports.upload'))
+    spec = IMPORT_KINDS[import_job['kind']]
+    # The add form's labels, so fields read the same as on the add page
+    form = spec['form'](formdata=None, meta={'csrf': False})
+    return render_template(
+        'imports/job.html',
+        job=import_job,
+        fields=list(spec['fields']),
+        labels={field: form[field].label.text for field in spec['fields']},
+        required=spec['required'],
+        mapping=import_job.get('mapping') or import_job.get('suggested_mapping') or {},
+        status=_job_status(import_job),
+        title=trans('general_import_title', default='Import from a Spreadsheet')
+    )
+
+@imports_bp.route('/<job_id>/start', methods=['POST'])
+@login_required
+@utils.requires_role(['trader', 'startup', 'admin'])
+def start(job_id):
+    """Start an import with the columns chosen on the mapping page."""
+    import_job = _get_job(job_id)
+    if import_job is None:
+        flash(trans('general_import_not_found', default='Import not found'), 'danger')
+        return redirect(url_for('imports.upload'))
+    if not utils.can_user_interact(current_user):
+        flash(trans('general_subscription_required', default='Your trial has expired. Please subscribe to continue.'), 'warning')
+        return redirect(url_for('subscribe_bp.subscribe'))
+    mapping = {}
+    for field in IMPORT_KINDS[import_job['kind']]['fields']:
+        column = request.form.get(f'map_{field}', '')
+        if column.isdigit() and int(column) < len(import_job['headers']):
+            mapping[field] = int(column)
+    try:
+        if active_import(utils.get_mongo_db(), current_user.id):
+            flash(trans('general_import_running', default='An import is already running. Please wait for it to finish.'), 'warning')
+        elif start_import(current_app._get_current_object(), utils.get_mongo_db(), import_job, mapping):
+            logger.info(f"Started import {job_id} of {import_job['kind']} for user {current_user.id}", extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': current_user.id})
+    except BulkImportError as e:
+        flash(str(e), 'danger')
+    return redirect(url_for('imports.job', job_id=job_id))
+
+@imports_bp.route('/<job_id>/status')
+@login_required
+@utils.requires_role(['trader', 'startup', 'admin'])
+def status(job_id):
+    """Progress of an import, polled by the progress page."""
+    import_job = _get_job(job_id)
+    if import_job is None:
+        return jsonify({'error': trans('general_import_not_found', default='Import not found')}), 404
+    response = jsonify(_job_status(import_job))
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@imports_bp.route('/<job_id>/errors')
+@login_required
+@utils.requires_role(['trader', 'startup', 'admin'])
+def errors_file(job_id):
+    """Download the rows an import rejected, with the reason for each."""
+    from gridfs import GridFS
+    from gridfs.errors import NoFile
+    import_job = _get_job(job_id)
+    if import_job is None or not import_job.get('errors_id'):
+        flash(trans('general_import_not_found', default='Import not found'), 'danger')
+        return redirect(url_for('imports.upload'))
+    try:
+        grid_out = GridFS(utils.get_mongo_db(), collection=IMPORTS_BUCKET).get(import_job['errors_id'])
+    except NoFile:
+        flash(trans('general_import_not_found', default='Import not found'), 'danger')
+        return redirect(url_for('imports.upload'))
+    return send_file(BytesIO(grid_out.read()), mimetype='text/csv', as_attachment=True, download_name=grid_out.filename)
@@ -6,6 +6,8 @@ from wtforms.validators import DataRequired, NumberRange
 from translations import trans
 import utils
 from datetime import datetime, timezone
+from helpers.data_versions import bumps_data_version
+from helpers.conditional_get import conditional_get
 
 inventory_bp = Blueprint('inventory', __name__, url_prefix='/inventory')
 
@@ -15,8 +17,21 @@ class InventoryForm(FlaskForm):
     expected_margin = FloatField('Expected Margin', validators=[DataRequired(), NumberRange(min=0)])
     submit = SubmitField('Add Item')
 
+def inventory_document(form, user_id):
+    """The record for a validated InventoryForm (used by add and bulk import)."""
+    return {
+        'user_id': str(user_id),
+        'type': 'inventory',
+        'name': form.name.data,
+        'cost': form.cost.data,
+        'expected_margin': form.expected_margin.data,
+        'created_at': datetime.now(timezone.utc),
+        'updated_at': datetime.now(timezone.utc)
+    }
+
 @inventory_bp.route('/')
 @login_required
+@conditional_get('inventory')
 def index():
     db = utils.get_mongo_db()
     user_id = str(current_user.id)
@@ -25,6 +40,7 @@ def index():
 
 @inventory_bp.route('/add', methods=['GET', 'POST'])
 @login_required
+@bumps_data_version('inventory')
 def add():
     form = InventoryForm()
     try:
@@ -37,14 +53,7 @@ def add():
         try:
             db = utils.get_mongo_db()
             user_id = str(current_user.id)
-            db.records.insert_one({
-                'user_id': user_id,
-                'type': 'inventory',
-                'name': form.name.data,
-                'cost': form.cost.data,
-                'expected_margin': form.expected_margin.data,
-                'created_at': datetime.now(timezone.utc)
-            })
+            db.records.insert_one(inventory_document(form, user_id))
             flash(trans('inventory_added', default='Inventory item added!'), 'success')
             return redirect(url_for('inventory.index'))
         except Exception as e:
@@ -11,9 +11,9 @@ from wtforms import StringField, DateField, FloatField, SelectField, SubmitField
 from wtforms.validators import DataRequired, Optional, Length, NumberRange
 import logging
 import io
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import inch
+from helpers.data_versions import bumps_data_version
+from helpers.conditional_get import conditional_get
+from helpers.change_log import record_deletion
 
 logger = logging.getLogger(__name__)
 
@@ -31,11 +31,28 @@ class PaymentForm(FlaskForm):
     description = StringField(trans('general_description', default='Description'), validators=[Optional(), Length(max=1000)])
     submit = SubmitField(trans('payments_add_payment', default='Add Payment'))
 
+def payment_document(form, user_id):
+    """The cashflow document for a validated PaymentForm (used by add and the sync API)."""
+    return {
+        'user_id': str(user_id),
+        'type': 'payment',
+        'party_name': utils.sanitize_input(form.party_name.data, max_length=100),
+        'amount': form.amount.data,
+        'method': form.method.data,
+        'category': utils.sanitize_input(form.category.data, max_length=50) if form.category.data else None,
+        'contact': utils.sanitize_input(form.contact.data, max_length=100) if form.contact.data else None,
+        'description': utils.sanitize_input(form.description.data, max_length=1000) if form.description.data else None,
+        # The form date, as a UTC datetime
+        'created_at': datetime.combine(form.date.data, datetime.min.time(), tzinfo=ZoneInfo("UTC")),
+        'updated_at': datetime.now(timezone.utc)
+    }
+
 payments_bp = Blueprint('payments', __name__, url_prefix='/payments')
 
 @payments_bp.route('/')
 @login_required
 @utils.requires_role(['trader', 'startup', 'admin'])
+@conditional_get('payments')
 def index():
     """List all payment cashflows for the current user."""
     try:
@@ -132,6 +149,9 @@ def view(id):
 @utils.requires_role(['trader', 'startup', 'admin'])
 def generate_pdf(id):
     """Generate PDF receipt for a payment transaction."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.units import inch
     try:
         if not utils.can_user_interact(current_user):
             flash(trans('payments_subscription_required', default='Your trial has expired or you do not have an active subscription. Please subscribe to generate a PDF receipt.'), 'warning')
@@ -209,6 +229,7 @@ def generate_pdf(id):
 @login_required
 @utils.requires_role(['trader', 'startup', 'admin'])
 @utils.limiter.limit('10 per minute')
+@bumps_data_version('payments')
 def add():
     """Add a new payment cashflow."""
     try:
@@ -220,20 +241,7 @@ def add():
         if form.validate_on_submit():
             try:
                 db = utils.get_mongo_db()
-                # Convert date to datetime with UTC timezone
-                payment_date = datetime.combine(form.date.data, datetime.min.time(), tzinfo=ZoneInfo("UTC"))
-                cashflow = {
-                    'user_id': str(current_user.id),
-                    'type': 'payment',
-                    'party_name': utils.sanitize_input(form.party_name.data, max_length=100),
-                    'amount': form.amount.data,
-                    'method': form.method.data,
-                    'category': utils.sanitize_input(form.category.data, max_length=50) if form.category.data else None,
-                    'contact': utils.sanitize_input(form.contact.data, max_length=100) if form.contact.data else None,
-                    'description': utils.sanitize_input(form.description.data, max_length=1000) if form.description.data else None,
-                    'created_at': payment_date,
-                    'updated_at': datetime.now(timezone.utc)
-                }
+                cashflow = payment_document(form, current_user.id)
                 db.cashflows.insert_one(cashflow)
                 logger.info(
                     f"Payment added for user {current_user.id}",
@@ -270,6 +278,7 @@ def add():
 @login_required
 @utils.requires_role(['trader', 'startup', 'admin'])
 @utils.limiter.limit('10 per minute')
+@bumps_data_version('payments')
 def edit(id):
     """Edit an existing payment cashflow."""
     try:
@@ -367,6 +376,7 @@ def edit(id):
 @login_required
 @utils.requires_role(['trader', 'startup', 'admin'])
 @utils.limiter.limit('10 per minute')
+@bumps_data_version('payments')
 def delete(id):
     """Delete a payment cashflow."""
     try:
@@ -376,8 +386,9 @@ def delete(id):
         
         db = utils.get_mongo_db()
         query = {'_id': ObjectId(id), 'user_id': str(current_user.id), 'type': 'payment'}
-        result = db.cashflows.delete_one(query)
-        if result.deleted_count:
+        payment = db.cashflows.find_one_and_delete(query, projection={'user_id': 1, 'type': 1})
+        if payment:
+            record_deletion(db, 'cashflows', payment)
             logger.info(
                 f"Payment {id} deleted for user {current_user.id}",
                 extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': current_user.id}
@@ -11,9 +11,9 @@ from wtforms import StringField, DateField, FloatField, SelectField, SubmitField
 from wtforms.validators import DataRequired, Optional, Length, NumberRange
 import logging
 import io
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import inch
+from helpers.data_versions import bumps_data_version
+from helpers.conditional_get import conditional_get
+from helpers.change_log import record_deletion
 
 logger = logging.getLogger(__name__)
 
@@ -31,11 +31,28 @@ class ReceiptForm(FlaskForm):
     description = StringField(trans('general_description', default='Description'), validators=[Optional(), Length(max=1000)])
     submit = SubmitField(trans('receipts_add_receipt', default='Record Sale'))
 
+def receipt_document(form, user_id):
+    """The cashflow document for a validated ReceiptForm (used by add and the sync API)."""
+    return {
+        'user_id': str(user_id),
+        'type': 'receipt',
+        'party_name': utils.sanitize_input(form.party_name.data, max_length=100),
+        'amount': form.amount.data,
+        'method': form.method.data,
+        'category': utils.sanitize_input(form.category.data, max_length=50) if form.category.data else None,
+        'contact': utils.sanitize_input(form.contact.data, max_length=100) if form.contact.data else None,
+        'description': utils.sanitize_input(form.description.data, max_length=1000) if form.description.data else None,
+        # The form date, as a UTC datetime
+        'created_at': datetime.combine(form.date.data, datetime.min.time(), tzinfo=ZoneInfo("UTC")),
+        'updated_at': datetime.now(timezone.utc)
+    }
+
 receipts_bp = Blueprint('receipts', __name__, url_prefix='/receipts')
 
 @receipts_bp.route('/')
 @login_required
 @utils.requires_role(['trader', 'startup', 'admin'])
+@conditional_get('receipts')
 def index():
     """List all sales income cashflows for the current user."""
     try:
@@ -148,6 +165,9 @@ def view(id):
 @utils.requires_role(['trader', 'startup', 'admin'])
 def generate_pdf(id):
     """Generate PDF receipt for a receipt transaction."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.units import inch
     try:
         if not utils.can_user_interact(current_user):
             flash(trans('receipts_subscription_required', default='Your trial has expired or you do not have an active subscription. Please subscribe to generate a PDF receipt.'), 'warning')
@@ -233,6 +253,7 @@ def generate_pdf(id):
 @login_required
 @utils.requires_role(['trader', 'startup', 'admin'])
 @utils.limiter.limit('10 per minute')
+@bumps_data_version('receipts')
 def add():
     """Add a new receipt cashflow."""
     try:
@@ -244,20 +265,7 @@ def add():
         if form.validate_on_submit():
             try:
                 db = utils.get_mongo_db()
-                # Convert date to datetime with UTC timezone
-                receipt_date = datetime.combine(form.date.data, datetime.min.time(), tzinfo=ZoneInfo("UTC"))
-                cashflow = {
-                    'user_id': str(current_user.id),
-                    'type': 'receipt',
-                    'party_name': utils.sanitize_input(form.party_name.data, max_length=100),
-                    'amount': form.amount.data,
-                    'method': form.method.data,
-                    'category': utils.sanitize_input(form.category.data, max_length=50) if form.category.data else None,
-                    'contact': utils.sanitize_input(form.contact.data, max_length=100) if form.contact.data else None,
-                    'description': utils.sanitize_input(form.description.data, max_length=1000) if form.description.data else None,
-                    'created_at': receipt_date,
-                    'updated_at': datetime.now(timezone.utc)
-                }
+                cashflow = receipt_document(form, current_user.id)
                 db.cashflows.insert_one(cashflow)
                 logger.info(
                     f"Receipt added for user {current_user.id}",
@@ -294,6 +302,7 @@ def add():
 @login_required
 @utils.requires_role(['trader', 'startup', 'admin'])
 @utils.limiter.limit('10 per minute')
+@bumps_data_version('receipts')
 def edit(id):
     """Edit an existing receipt cashflow."""
     try:
@@ -391,6 +400,7 @@ def edit(id):
 @login_required
 @utils.requires_role(['trader', 'startup', 'admin'])
 @utils.limiter.limit('10 per minute')
+@bumps_data_version('receipts')
 def delete(id):
     """Delete a receipt cashflow."""
     try:
@@ -400,8 +410,9 @@ def delete(id):
         
         db = utils.get_mongo_db()
         query = {'_id': ObjectId(id), 'user_id': str(current_user.id), 'type': 'receipt'}
-        result = db.cashflows.delete_one(query)
-        if result.deleted_count:
+        receipt = db.cashflows.find_one_and_delete(query, projection={'user_id': 1, 'type': 1})
+        if receipt:
+            record_deletion(db, 'cashflows', receipt)
             logger.info(
                 f"Receipt {id} deleted for user {current_user.id}",
                 extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': current_user.id}
@@ -7,16 +7,13 @@ import utils
 from bson import ObjectId
 from datetime import datetime, date, timezone
 from zoneinfo import ZoneInfo
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from reportlab.lib import colors
-from reportlab.lib.units import inch
 from io import BytesIO, StringIO
 from wtforms import DateField, StringField, SubmitField, SelectField
 from wtforms.validators import Optional, Length
 import csv
 import logging
 from helpers.branding_helpers import draw_ficore_pdf_header, ficore_csv_header
+from helpers.metrics import timed_report
 import pymongo.errors
 
 logger = logging.getLogger(__name__)
@@ -826,7 +823,12 @@ def customer_reports():
         flash(trans('reports_csrf_error', default='Invalid CSRF token. Please try again.'), 'danger')
         return render_template('reports/customer_reports_form.html', form=form, title='Generate Customer Report', can_interact=can_interact), 400
 
+@timed_report('profit_loss', 'pdf')
 def generate_profit_loss_pdf(cashflows):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    from reportlab.lib import colors
+    from reportlab.lib.units import inch
     buffer = BytesIO()
     p = canvas.Canvas(buffer, pagesize=A4)
     header_height = 0.7
@@ -838,12 +840,18 @@ def generate_profit_loss_pdf(cashflows):
     page_height = (max_y - bottom_margin) * inch
     rows_per_page = int((page_height - (title_y - 0.6) * inch) / (row_height * inch))
 
+    # Header labels are resolved once per document rather than on every page
+    header_labels = [
+        (1 * inch, trans('general_date', default='Date')),
+        (2.5 * inch, trans('general_party_name', default='Party Name')),
+        (4 * inch, trans('general_type', default='Type')),
+        (5 * inch, trans('general_amount', default='Amount'))
+    ]
+
     def draw_table_headers(y):
         p.setFillColor(colors.black)
-        p.drawString(1 * inch, y * inch, trans('general_date', default='Date'))
-        p.drawString(2.5 * inch, y * inch, trans('general_party_name', default='Party Name'))
-        p.drawString(4 * inch, y * inch, trans('general_type', default='Type'))
-        p.drawString(5 * inch, y * inch, trans('general_amount', default='Amount'))
+        for x, label in header_labels:
+            p.drawString(x, y * inch, label)
         return y - row_height
 
     draw_ficore_pdf_header(p, current_user, y_start=max_y)
@@ -901,6 +909,7 @@ def generate_profit_loss_pdf(cashflows):
     )
     return Response(buffer, mimetype='application/pdf', headers={'Content-Disposition': 'attachment;filename=profit_loss.pdf'})
 
+@timed_report('profit_loss', 'csv')
 def generate_profit_loss_csv(cashflows):
     output = []
     output.extend(ficore_csv_header(current_user))
@@ -926,7 +935,12 @@ def generate_profit_loss_csv(cashflows):
     )
     return Response(buffer.getvalue(), mimetype='text/csv', headers={'Content-Disposition': 'attachment;filename=profit_loss.csv'})
 
+@timed_report('debtors_creditors', 'pdf')
 def generate_debtors_creditors_pdf(records):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    from reportlab.lib import colors
+    from reportlab.lib.units import inch
     buffer = BytesIO()
     p = canvas.Canvas(buffer, pagesize=A4)
     header_height = 0.7
@@ -938,13 +952,19 @@ def generate_debtors_creditors_pdf(records):
     page_height = (max_y - bottom_margin) * inch
     rows_per_page = int((page_height - (title_y - 0.6) * inch) / (row_height * inch))
 
+    # Header labels are resolved once per document rather than on every page
+    header_labels = [
+        (1 * inch, trans('general_date', default='Date')),
+        (2.5 * inch, trans('general_name', default='Name')),
+        (4 * inch, trans('general_type', default='Type')),
+        (5 * inch, trans('general_amount_owed', default='Amount Owed')),
+        (6.5 * inch, trans('general_description', default='Description'))
+    ]
+
     def draw_table_headers(y):
         p.setFillColor(colors.black)
-        p.drawString(1 * inch, y * inch, trans('general_date', default='Date'))
-        p.drawString(2.5 * inch, y * inch, trans('general_name', default='Name'))
-        p.drawString(4 * inch, y * inch, trans('general_type', default='Type'))
-        p.drawString(5 * inch, y * inch, trans('general_amount_owed', default='Amount Owed'))
-        p.drawString(6.5 * inch, y * inch, trans('general_description', default='Description'))
+        for x, label in header_labels:
+            p.drawString(x, y * inch, label)
         return y - row_height
 
     draw_ficore_pdf_header(p, current_user, y_start=max_y)
@@ -999,6 +1019,7 @@ def generate_debtors_creditors_pdf(records):
     )
     return Response(buffer, mimetype='application/pdf', headers={'Content-Disposition': 'attachment;filename=debtors_creditors.pdf'})
 
+@timed_report('debtors_creditors', 'csv')
 def generate_debtors_creditors_csv(records):
     output = []
     output.extend(ficore_csv_header(current_user))
@@ -1023,7 +1044,12 @@ def generate_debtors_creditors_csv(records):
     )
     return Response(buffer.getvalue(), mimetype='text/csv', headers={'Content-Disposition': 'attachment;filename=debtors_creditors.csv'})
 
+@timed_report('funds', 'pdf')
 def generate_funds_pdf(funds):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    from reportlab.lib import colors
+    from reportlab.lib.units import inch
     buffer = BytesIO()
     p = canvas.Canvas(buffer, pagesize=A4)
     header_height = 0.7
@@ -1035,12 +1061,18 @@ def generate_funds_pdf(funds):
     page_height = (max_y - bottom_margin) * inch
     rows_per_page = int((page_height - (title_y - 0.6) * inch) / (row_height * inch))
 
+    # Header labels are resolved once per document rather than on every page
+    header_labels = [
+        (1 * inch, trans('general_date', default='Date')),
+        (2.5 * inch, trans('funds_source', default='Source')),
+        (4 * inch, trans('general_amount', default='Amount')),
+        (5 * inch, trans('general_status', default='Status'))
+    ]
+
     def draw_table_headers(y):
         p.setFillColor(colors.black)
-        p.drawString(1 * inch, y * inch, trans('general_date', default='Date'))
-        p.drawString(2.5 * inch, y * inch, trans('funds_source', default='Source'))
-        p.drawString(4 * inch, y * inch, trans('general_amount', default='Amount'))
-        p.drawString(5 * inch, y * inch, trans('general_status', default='Status'))
+        for x, label in header_labels:
+            p.drawString(x, y * inch, label)
         return y - row_height
 
     draw_ficore_pdf_header(p, current_user, y_start=max_y)
@@ -1086,6 +1118,7 @@ def generate_funds_pdf(funds):
     )
     return Response(buffer, mimetype='application/pdf', headers={'Content-Disposition': 'attachment;filename=funds.pdf'})
 
+@timed_report('funds', 'csv')
 def generate_funds_csv(funds):
     output = []
     output.extend(ficore_csv_header(current_user))
@@ -1105,7 +1138,12 @@ def generate_funds_csv(funds):
     )
     return Response(buffer.getvalue(), mimetype='text/csv', headers={'Content-Disposition': 'attachment;filename=funds.csv'})
 
+@timed_report('forecasts', 'pdf')
 def generate_forecasts_pdf(forecasts):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    from reportlab.lib import colors
+    from reportlab.lib.units import inch
     buffer = BytesIO()
     p = canvas.Canvas(buffer, pagesize=A4)
     header_height = 0.7
@@ -1117,13 +1155,19 @@ def generate_forecasts_pdf(forecasts):
     page_height = (max_y - bottom_margin) * inch
     rows_per_page = int((page_height - (title_y - 0.6) * inch) / (row_height * inch))
 
+    # Header labels are resolved once per document rather than on every page
+    header_labels = [
+        (1 * inch, trans('general_date', default='Date')),
+        (2 * inch, trans('forecasts_scenario', default='Scenario')),
+        (3.5 * inch, trans('forecasts_projected_revenue', default='Projected Revenue')),
+        (4.5 * inch, trans('forecasts_projected_expenses', default='Projected Expenses')),
+        (5.5 * inch, trans('forecasts_period', default='Period'))
+    ]
+
     def draw_table_headers(y):
         p.setFillColor(colors.black)
-        p.drawString(1 * inch, y * inch, trans('general_date', default='Date'))
-        p.drawString(2 * inch, y * inch, trans('forecasts_scenario', default='Scenario'))
-        p.drawString(3.5 * inch, y * inch, trans('forecasts_projected_revenue', default='Projected Revenue'))
-        p.drawString(4.5 * inch, y * inch, trans('forecasts_projected_expenses', default='Projected Expenses'))
-        p.drawString(5.5 * inch, y * inch, trans('forecasts_period', default='Period'))
+        for x, label in header_labels:
+            p.drawString(x, y * inch, label)
         return y - row_height
 
     draw_ficore_pdf_header(p, current_user, y_start=max_y)
@@ -1177,6 +1221,7 @@ def generate_forecasts_pdf(forecasts):
     )
     return Response(buffer, mimetype='application/pdf', headers={'Content-Disposition': 'attachment;filename=forecasts.pdf'})
 
+@timed_report('forecasts', 'csv')
 def generate_forecasts_csv(forecasts):
     output = []
     output.extend(ficore_csv_header(current_user))
@@ -1211,7 +1256,12 @@ def generate_forecasts_csv(forecasts):
     )
     return Response(buffer.getvalue(), mimetype='text/csv', headers={'Content-Disposition': 'attachment;filename=forecasts.csv'})
 
+@timed_report('investor_reports', 'pdf')
 def generate_investor_reports_pdf(reports):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    from reportlab.lib import colors
+    from reportlab.lib.units import inch
     buffer = BytesIO()
     p = canvas.Canvas(buffer, pagesize=A4)
     header_height = 0.7
@@ -1223,11 +1273,17 @@ def generate_investor_reports_pdf(reports):
     page_height = (max_y - bottom_margin) * inch
     rows_per_page = int((page_height - (title_y - 0.6) * inch) / (row_height * inch))
 
+    # Header labels are resolved once per document rather than on every page
+    header_labels = [
+        (1 * inch, trans('general_date', default='Date')),
+        (2.5 * inch, trans('investor_report_title', default='Report Title')),
+        (4 * inch, trans('investor_report_metrics', default='Key Metrics'))
+    ]
+
     def draw_table_headers(y):
         p.setFillColor(colors.black)
-        p.drawString(1 * inch, y * inch, trans('general_date', default='Date'))
-        p.drawString(2.5 * inch, y * inch, trans('investor_report_title', default='Report Title'))
-        p.drawString(4 * inch, y * inch, trans('investor_report_metrics', default='Key Metrics'))
+        for x, label in header_labels:
+            p.drawString(x, y * inch, label)
         return y - row_height
 
     draw_ficore_pdf_header(p, current_user, y_start=max_y)
@@ -1257,6 +1313,7 @@ def generate_investor_reports_pdf(reports):
     buffer.seek(0)
     return Response(buffer, mimetype='application/pdf', headers={'Content-Disposition': 'attachment;filename=investor_reports.pdf'})
 
+@timed_report('investor_reports', 'csv')
 def generate_investor_reports_csv(reports):
     output = []
     output.extend(ficore_csv_header(current_user))
@@ -1270,7 +1327,12 @@ def generate_investor_reports_csv(reports):
     buffer.seek(0)
     return Response(buffer.getvalue(), mimetype='text/csv', headers={'Content-Disposition': 'attachment;filename=investor_reports.csv'})
 
+@timed_report('customer_report', 'pdf')
 def generate_customer_report_pdf(report_data):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    from reportlab.lib import colors
+    from reportlab.lib.units import inch
     buffer = BytesIO()
     p = canvas.Canvas(buffer, pagesize=A4)
     header_height = 0.7
@@ -1332,6 +1394,7 @@ def generate_customer_report_pdf(report_data):
     buffer.seek(0)
     return Response(buffer, mimetype='application/pdf', headers={'Content-Disposition': 'attachment;filename=customer_report.pdf'})
 
+@timed_report('customer_report', 'csv')
 def generate_customer_report_csv(report_data):
     output = []
     output.extend(ficore_csv_header(current_user))
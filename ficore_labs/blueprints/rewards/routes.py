@@ -4,6 +4,7 @@ from datetime import datetime, timedelta, timezone
 from utils import get_mongo_db, logger
 from translations import trans
 from bson import ObjectId
+from helpers.data_versions import bump_data_version
 
 rewards_bp = Blueprint('rewards', __name__, url_prefix='/rewards')
 
@@ -66,6 +67,7 @@ def index():
                 },
                 upsert=True
             )
+            bump_data_version(db, user_id, 'rewards')
         elif last_activity_date and last_activity_date < today - timedelta(days=1):
             # Reset streak if no activity today and last activity was before yesterday
             db.rewards.update_one(
@@ -73,6 +75,7 @@ def index():
                 {'$set': {'streak': 0, 'updated_at': datetime.now(timezone.utc)}},
                 upsert=True
             )
+            bump_data_version(db, user_id, 'rewards')
             streak = 0
 
         # Check for redemption eligibility
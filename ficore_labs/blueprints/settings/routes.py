@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, session, jsonify, send_file
+from flask import Blueprint, render_template, redirect, url_for, flash, request, session, jsonify, current_app
 from flask_login import login_required, current_user
 from flask_wtf import FlaskForm
 from flask_wtf.file import FileAllowed
@@ -13,9 +13,9 @@ from wtforms.validators import DataRequired, Length, Email, Optional
 from wtforms.widgets import ListWidget, CheckboxInput
 from gridfs import GridFS
 from io import BytesIO
-from PIL import Image
 import logging
 import utils
+from helpers.profile_pictures import VARIANTS, picture_hash, picture_key, profile_picture_url, start_variants, delete_variants, picture_response
 
 logger = logging.getLogger(__name__)
 
@@ -234,6 +234,7 @@ def profile():
 @utils.limiter.limit('10 per minute')
 def upload_profile_picture():
     """API endpoint to handle profile picture uploads."""
+    from PIL import Image
     try:
         db = get_mongo_db()
         fs = GridFS(db)
@@ -299,13 +300,20 @@ def upload_profile_picture():
                     extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': current_user.id}
                 )
 
-        # Store new profile picture
-        file_id = fs.put(file_content, filename=sanitize_input(file.filename, max_length=100), content_type=file.content_type)
+        # Store new profile picture; its resized variants are made in the background
+        digest = picture_hash(file_content)
+        file_id = fs.put(
+            file_content, filename=sanitize_input(file.filename, max_length=100), content_type=Image.MIME[img.format],
+            metadata={'user_id': user_id, 'hash': digest}
+        )
         update_data = {
             'profile_picture': str(file_id),
+            'profile_picture_hash': digest,
             'updated_at': datetime.now(timezone.utc)
         }
         if update_user(db, user_id, update_data):
+            delete_variants(db, user_id, keep=digest)
+            start_variants(current_app._get_current_object(), db, user_id, digest, file_content)
             logger.info(
                 f"Profile picture uploaded for user {user_id}, file_id: {file_id}",
                 extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': current_user.id}
@@ -313,7 +321,8 @@ def upload_profile_picture():
             return jsonify({
                 "success": True,
                 "message": trans('settings_profile_picture_updated', default='Profile picture updated successfully.'),
-                "image_url": url_for('settings.get_profile_picture', user_id=user_id)
+                "image_url": profile_picture_url({'_id': user_id, 'profile_picture_hash': digest}, 'medium'),
+                "thumb_url": profile_picture_url({'_id': user_id, 'profile_picture_hash': digest}, 'thumb')
             })
         else:
             logger.error(
@@ -341,34 +350,36 @@ def upload_profile_picture():
 @login_required
 @requires_role(['trader', 'startup', 'admin'])
 def get_profile_picture(user_id):
-    """Serve the user's profile picture."""
+    """Redirect to the cacheable URL of the user's current profile picture."""
     try:
-        db = get_mongo_db()
-        fs = GridFS(db)
-        user = get_user(db, str(user_id))
-        if not user or not user.profile_picture:
-            logger.info(
-                f"No profile picture found for user {user_id}",
-                extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': current_user.id}
-            )
-            return redirect(url_for('static', filename='img/default_profile.png'))
-
-        file_id = ObjectId(user.profile_picture)
-        grid_out = fs.get(file_id)
-        logger.info(
-            f"Serving profile picture for user {user_id}, file_id: {file_id}",
-            extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': current_user.id}
-        )
-        return send_file(BytesIO(grid_out.read()), mimetype=grid_out.content_type)
-    except ValueError:
+        user = get_mongo_db().users.find_one({'_id': str(user_id)}, {'profile_picture': 1, 'profile_picture_hash': 1})
+        size = request.args.get('size', 'medium')
+        return redirect(profile_picture_url(user or {}, size if size in VARIANTS else 'medium'))
+    except Exception as e:
         logger.error(
-            f"Invalid user ID or profile picture ID for user {user_id}",
+            f"Error retrieving profile picture for user {user_id}: {str(e)}",
             exc_info=True, extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': current_user.id}
         )
         return redirect(url_for('static', filename='img/default_profile.png'))
+
+@settings_bp.route('/profile-picture/<user_id>/<digest>/<any(thumb, medium):size>')
+@login_required
+@requires_role(['trader', 'startup', 'admin'])
+def profile_picture_file(user_id, digest, size):
+    """Serve a resized profile picture; the URL changes with the picture, so it is cached for good."""
+    try:
+        db = get_mongo_db()
+        response = picture_response(db, str(user_id), digest, size)
+        if response is not None:
+            return response
+        # An outdated URL: send the browser to the current picture, if any
+        user = db.users.find_one({'_id': str(user_id)}, {'profile_picture': 1, 'profile_picture_hash': 1})
+        if user and user.get('profile_picture') and picture_key(user) != digest:
+            return redirect(profile_picture_url(user, size))
+        return redirect(url_for('static', filename='img/default_profile.png'))
     except Exception as e:
         logger.error(
-            f"Error retrieving profile picture for user {user_id}: {str(e)}",
+            f"Error serving profile picture for user {user_id}: {str(e)}",
             exc_info=True, extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': current_user.id}
         )
         return redirect(url_for('static', filename='img/default_profile.png'))
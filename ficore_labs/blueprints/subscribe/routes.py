@@ -3,7 +3,6 @@ from flask_login import login_required, current_user
 from flask_wtf.csrf import CSRFError
 from translations import trans
 from models import update_user, get_mongo_db
-import requests
 import utils
 import os
 from datetime import datetime, timedelta, timezone
@@ -15,6 +14,9 @@ logger.setLevel(logging.INFO)
 
 subscribe_bp = Blueprint('subscribe_bp', __name__, url_prefix='/subscribe')
 
+# Overridable so load tests can point payments at a local stub
+PAYSTACK_API_BASE = os.getenv('PAYSTACK_API_BASE', 'https://api.paystack.co').rstrip('/')
+
 @subscribe_bp.route('/')
 @login_required
 @utils.requires_role(['trader', 'startup', 'admin'])
@@ -62,6 +64,7 @@ def subscribe():
 @utils.limiter.limit('10 per minute')
 def initiate_payment():
     """Initiate payment with Paystack."""
+    import requests
     try:
         if not os.getenv('PAYSTACK_SECRET_KEY'):
             logger.error(
@@ -97,7 +100,7 @@ def initiate_payment():
 
         # Initialize Paystack transaction
         response = requests.post(
-            'https://api.paystack.co/transaction/initialize',
+            f'{PAYSTACK_API_BASE}/transaction/initialize',
             headers=headers,
             json=payload
         )
@@ -151,6 +154,7 @@ def initiate_payment():
 @utils.requires_role(['trader', 'startup', 'admin'])
 def callback():
     """Handle Paystack payment callback."""
+    import requests
     try:
         reference = request.args.get('reference')
         pending_transaction = session.get('pending_transaction')
@@ -170,7 +174,7 @@ def callback():
             'Content-Type': 'application/json'
         }
         response = requests.get(
-            f"https://api.paystack.co/transaction/verify/{reference}",
+            f"{PAYSTACK_API_BASE}/transaction/verify/{reference}",
             headers=headers
         )
         response_data = response.json()
@@ -270,7 +270,7 @@ def login():
                         session.pop('is_anonymous', None)
                         session['is_anonymous'] = False
                         log_audit_action('login_without_2fa', {'user_id': username, 'reason': 'email_failure_test_mode'})
-                        logger.info(f"User {username} logged in without 2FA due to email failure (test mode). Session: {dict(session)}")
+                        logger.info("User %s logged in without 2FA due to email failure (test mode)", username)
                         if not user.get('setup_complete', False):
                             setup_route = get_setup_wizard_route(user.get('role', 'trader'))
                             return redirect(url_for(setup_route))
@@ -302,7 +302,7 @@ def login():
                 session.pop('is_anonymous', None)
                 session['is_anonymous'] = False
                 log_audit_action('login', {'user_id': username})
-                logger.info(f"User {username} logged in successfully. Session: {dict(session)}")
+                logger.info("User %s logged in successfully", username)
                 if not user.get('setup_complete', False):
                     setup_route = get_setup_wizard_route(user.get('role', 'trader'))
                     return redirect(url_for(setup_route))
@@ -380,7 +380,7 @@ def verify_2fa():
                     {'$unset': {'otp': '', 'otp_expiry': ''}}
                 )
                 log_audit_action('verify_2fa', {'user_id': username})
-                logger.info(f"User {username} verified 2FA successfully. Session: {dict(session)}")
+                logger.info("User %s verified 2FA successfully", username)
                 session.pop('pending_user_id', None)
                 if not user.get('setup_complete', False):
                     setup_route = get_setup_wizard_route(user.get('role', 'trader'))
@@ -491,7 +491,7 @@ def signup():
             session['lang'] = language
             session.pop('is_anonymous', None)
             session['is_anonymous'] = False
-            logger.info(f"New user created and logged in: {username} (role: {role}). Session: {dict(session)}")
+            logger.info("New user created and logged in: %s (role: %s)", username, role)
             setup_route = get_setup_wizard_route(role)
             return redirect(url_for(setup_route))
         except pymongo.errors.PyMongoError as e:
@@ -694,7 +694,7 @@ def logout():
     user_id = current_user.id
     lang = session.get('lang', 'en')
     sid = session.get('sid', 'no-session-id')
-    logger.info(f"Before logout - User: {user_id}, Session: {dict(session)}, Authenticated: {current_user.is_authenticated}")
+    logger.info("Before logout - User: %s, Authenticated: %s", user_id, current_user.is_authenticated)
     try:
         logout_user()
         if current_app.config.get('SESSION_TYPE') == 'mongodb':
@@ -707,7 +707,7 @@ def logout():
         session.clear()
         session['lang'] = lang
         log_audit_action('logout', {'user_id': user_id, 'session_id': sid})
-        logger.info(f"User {user_id} logged out successfully. After logout - Session: {dict(session)}, Authenticated: {current_user.is_authenticated}")
+        logger.info("User %s logged out successfully. After logout - Authenticated: %s", user_id, current_user.is_authenticated)
         response = make_response(redirect(url_for('general_bp.landing')))
         response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
         response.headers['Pragma'] = 'no-cache'
@@ -0,0 +1,22 @@
+"""
+Gunicorn settings picked up automatically from the working directory.
+
+Sets up prometheus_client's multiprocess mode so /metrics aggregates all
+workers: each worker writes to PROMETHEUS_MULTIPROC_DIR, the directory is
+emptied when the master starts, and a dead worker's live gauges are dropped.
+"""
+import os
+import shutil
+import tempfile
+
+# Must be in the environment before the app (and prometheus_client) is imported
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'bizcore-prometheus'))
+
+def on_starting(server):
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
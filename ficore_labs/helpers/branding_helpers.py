@@ -1,6 +1,4 @@
 from flask import current_app
-from reportlab.lib.utils import ImageReader
-from reportlab.lib import colors
 
 # Colors from your CSS
 FICORE_PRIMARY_COLOR = "#b88a44"
@@ -16,6 +14,8 @@ def draw_ficore_pdf_header(canvas, user, y_start=10.5):
     """
     Draw Ficore branding and user info at the top of a PDF page with a shaded background and separator line.
     """
+    from reportlab.lib.utils import ImageReader
+    from reportlab.lib import colors
     inch = 72  # 1 inch in points
     static_folder = current_app.static_folder
     logo_path = f"{static_folder}/{FICORE_LOGO_PATH}"
@@ -0,0 +1,452 @@
+"""
+Bulk import of receipts, payments, debtors and inventory from CSV or XLSX.
+
+An import is a job document in import_jobs that moves through
+mapping -> queued -> running -> done (or failed):
+
+1. The upload is stored in the GridFS bucket 'imports' and only its header
+   row is read; the job suggests which column feeds which field
+   (suggest_mapping, by header name).
+2. The user confirms the mapping and start_import runs the job in a
+   background thread. Because the file lives in GridFS, any worker can
+   serve the progress page while another one runs the import.
+3. The thread streams rows from GridFS (csv.reader over the stored file, or
+   openpyxl in read-only mode), never holding the whole sheet in memory.
+   Each row is cleaned (currency columns through utils.parse_currency, dates
+   to YYYY-MM-DD), validated with the same form as the add page and turned
+   into a document by the same builder. Valid rows go in with one
+   insert_many(ordered=False) per BATCH_SIZE rows; after each batch the
+   job's counters are updated (the progress page polls them) and the user's
+   data version is bumped once, so summaries and cached cards refresh per
+   batch rather than per row.
+4. Rejected rows are written, with the reason, to a CSV stored next to the
+   upload for download; the upload itself is deleted when the job ends.
+
+A job whose heartbeat (updated_at) is older than STALE_AFTER is treated as
+dead, e.g. after a worker restart, and no longer blocks new imports.
+"""
+import csv
+import io
+import logging
+import os
+import re
+import tempfile
+import threading
+from datetime import date, datetime, timedelta, timezone
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from werkzeug.datastructures import MultiDict
+from wtforms.validators import ValidationError
+
+import utils
+from blueprints.debtors.routes import DebtorForm, debtor_document
+from blueprints.inventory.routes import InventoryForm, inventory_document
+from blueprints.payments.routes import PaymentForm, payment_document
+from blueprints.receipts.routes import ReceiptForm, receipt_document
+from helpers.data_versions import bump_data_version
+
+logger = logging.getLogger(__name__)
+
+IMPORTS_BUCKET = 'imports'
+BATCH_SIZE = 500
+MAX_ROWS = 50000
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+STALE_AFTER = timedelta(minutes=10)
+JOB_RETENTION = timedelta(days=7)
+FORMATS = {'.csv': 'csv', '.xlsx': 'xlsx'}
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y', '%Y/%m/%d', '%d %b %Y', '%d %B %Y')
+METHODS = {
+    'cash': 'cash',
+    'card': 'card', 'pos': 'card',
+    'bank': 'bank', 'transfer': 'bank', 'bank transfer': 'bank'
+}
+
+_CASHFLOW_FIELDS = {
+    'date': ('date', 'transaction date', 'day'),
+    'amount': ('amount', 'total', 'sale amount', 'value', 'price'),
+    'method': ('method', 'payment method', 'mode', 'channel'),
+    'category': ('category',),
+    'contact': ('contact', 'phone', 'phone number'),
+    'description': ('description', 'details', 'note', 'notes', 'narration')
+}
+
+# kind: form, document builder, collection, data version resource, required
+# fields, currency fields, date fields and fields with the header names they
+# are recognised by
+IMPORT_KINDS = {
+    'receipt': {
+        'form': ReceiptForm, 'build': receipt_document, 'collection': 'cashflows', 'resource': 'receipts',
+        'required': ('party_name', 'date', 'amount'), 'currency': ('amount',), 'dates': ('date',),
+        'fields': dict({'party_name': ('customer', 'customer name', 'party', 'party name', 'client', 'name')}, **_CASHFLOW_FIELDS)
+    },
+    'payment': {
+        'form': PaymentForm, 'build': payment_document, 'collection': 'cashflows', 'resource': 'payments',
+        'required': ('party_name', 'date', 'amount'), 'currency': ('amount',), 'dates': ('date',),
+        'fields': dict({'party_name': ('recipient', 'recipient name', 'supplier', 'vendor', 'payee', 'party', 'party name', 'name')}, **_CASHFLOW_FIELDS)
+    },
+    'debtor': {
+        'form': DebtorForm, 'build': debtor_document, 'collection': 'records', 'resource': 'debtors',
+        'required': ('name', 'phone_number', 'amount_owed'), 'currency': ('amount_owed',), 'dates': (),
+        'fields': {
+            'name': ('name', 'customer', 'customer name', 'debtor'),
+            'phone_number': ('phone number', 'phone', 'mobile', 'contact'),
+            'email': ('email', 'e mail'),
+            'amount_owed': ('amount owed', 'amount', 'balance', 'owed', 'debt'),
+            'description': ('description', 'details', 'note', 'notes')
+        }
+    },
+    'inventory': {
+        'form': InventoryForm, 'build': inventory_document, 'collection': 'records', 'resource': 'inventory',
+        'required': ('name', 'cost', 'expected_margin'), 'currency': ('cost',), 'dates': (),
+        'fields': {
+            'name': ('name', 'item', 'item name', 'product'),
+            'cost': ('cost', 'cost price', 'unit cost', 'price'),
+            'expected_margin': ('expected margin', 'margin', 'markup')
+        }
+    }
+}
+
+class BulkImportError(ValueError):
+    """The upload cannot be imported (format, size or header)."""
+
+def _normalize_header(value):
+    return re.sub(r'\s+', ' ', re.sub(r'[_\-.]+', ' ', str(value or ''))).strip().lower()
+
+def _cell(value):
+    """A spreadsheet cell as the string a form field expects."""
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        # Phone numbers and amounts typed as numbers come back as 8031234567.0
+        return str(int(value))
+    return str(value).strip()
+
+def _date(value):
+    if not value:
+        return value
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return value
+
+def detect_format(filename):
+    """'csv' or 'xlsx' for an upload's filename."""
+    fmt = FORMATS.get(os.path.splitext(filename or '')[1].lower())
+    if fmt is None:
+        raise BulkImportError('Only .csv and .xlsx files can be imported')
+    return fmt
+
+def _open_xlsx(fileobj):
+    try:
+        import openpyxl
+    except ImportError:
+        raise BulkImportError('Excel import needs the openpyxl package; upload a CSV instead')
+    workbook = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    return workbook, workbook.active
+
+def iter_rows(fileobj, fmt, progress=None):
+    """
+    Stream the non-empty rows of a CSV or XLSX file as lists of strings.
+
+    progress, if given, is called with each row's position as a fraction of
+    the file (bytes read for CSV, row number for XLSX).
+    """
+    if fmt == 'csv':
+        length = getattr(fileobj, 'length', None)
+        text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', errors='replace', newline='')
+        sample = text.read(4096)
+        text.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        for row in csv.reader(text, dialect):
+            if progress and length:
+                progress(min(fileobj.tell() / length, 1.0))
+            if any(cell.strip() for cell in row):
+                yield [cell.strip() for cell in row]
+        text.detach()
+    else:
+        workbook, sheet = _open_xlsx(fileobj)
+        try:
+            total = sheet.max_row
+            for index, row in enumerate(sheet.iter_rows(values_only=True), start=1):
+                if progress and total:
+                    progress(min(index / total, 1.0))
+                cells = [_cell(value) for value in row]
+                if any(cells):
+                    yield cells
+        finally:
+            workbook.close()
+
+def read_headers(fileobj, fmt):
+    """The first non-empty row of the file."""
+    for row in iter_rows(fileobj, fmt):
+        return row
+    raise BulkImportError('The file is empty')
+
+def suggest_mapping(headers, kind):
+    """{field: column index} for the columns whose header names a field of kind."""
+    normalized = [_normalize_header(header) for header in headers]
+    mapping = {}
+    used = set()
+    for field, names in IMPORT_KINDS[kind]['fields'].items():
+        for name in names:
+            if name in normalized and normalized.index(name) not in used:
+                mapping[field] = normalized.index(name)
+                used.add(mapping[field])
+                break
+    return mapping
+
+def _prepare(row, mapping, spec):
+    """Form data for a row, or the reason it cannot be imported."""
+    formdata = MultiDict()
+    for field, column in mapping.items():
+        value = row[column] if column < len(row) else ''
+        if not value:
+            continue
+        if field in spec['currency']:
+            try:
+                # parse_currency does not log: a bad cell is expected user data,
+                # already reported in the error CSV
+                value = str(utils.parse_currency(value))
+            except ValidationError as e:
+                return f'{field}: {e}'
+        elif field in spec['dates']:
+            value = _date(value)
+        elif field == 'method':
+            value = METHODS.get(value.strip().lower(), value)
+        formdata[field] = value
+    return formdata
+
+def _row_error(form):
+    return '; '.join(f"{field}: {', '.join(str(message) for message in messages)}" for field, messages in form.errors.items())
+
+class _ImportRun:
+    """State of one import while its thread runs."""
+
+    def __init__(self, db, job):
+        self.db = db
+        self.job = job
+        self.user_id = job['user_id']
+        self.spec = IMPORT_KINDS[job['kind']]
+        self.mapping = {field: int(column) for field, column in job['mapping'].items()}
+        self.counts = {'processed': 0, 'created': 0, 'invalid': 0, 'failed': 0}
+        self.fraction = 0.0
+        self.batch = []
+        self.error_file = tempfile.SpooledTemporaryFile(max_size=1024 * 1024, mode='w+', newline='', encoding='utf-8')
+        self.errors = csv.writer(self.error_file)
+        self.errors.writerow(list(job['headers']) + ['error'])
+
+    def reject(self, row, reason):
+        self.errors.writerow(row + [reason])
+
+    def report(self, **fields):
+        fields.update(self.counts)
+        fields['percent'] = int(self.fraction * 100)
+        fields['updated_at'] = datetime.now(timezone.utc)
+        self.db.import_jobs.update_one({'_id': self.job['_id']}, {'$set': fields})
+
+    def flush(self):
+        if self.batch:
+            documents = [document for _, document in self.batch]
+            failed = {}
+            try:
+                self.db[self.spec['collection']].insert_many(documents, ordered=False)
+            except BulkWriteError as e:
+                failed = {error['index']: error.get('errmsg', 'write error') for error in e.details.get('writeErrors', [])}
+                logger.error(f"Import {self.job['_id']} batch insert failed for {len(failed)} rows: {str(e)}", extra={'user_id': self.user_id})
+            for index, reason in failed.items():
+                self.reject(self.batch[index][0], reason)
+            self.counts['created'] += len(documents) - len(failed)
+            self.counts['failed'] += len(failed)
+            if len(documents) > len(failed):
+                bump_data_version(self.db, self.user_id, self.spec['resource'])
+            self.batch = []
+        self.report()
+
+    def run(self, fileobj):
+        rows = iter_rows(fileobj, self.job['format'], progress=lambda fraction: setattr(self, 'fraction', fraction))
+        next(rows, None)  # header
+        for row in rows:
+            if self.counts['processed'] >= MAX_ROWS:
+                self.job['truncated'] = True
+                break
+            self.counts['processed'] += 1
+            formdata = _prepare(row, self.mapping, self.spec)
+            if isinstance(formdata, str):
+                self.counts['invalid'] += 1
+                self.reject(row, formdata)
+            else:
+                form = self.spec['form'](formdata=formdata, meta={'csrf': False})
+                if form.validate():
+                    self.batch.append((row, self.spec['build'](form, self.user_id)))
+                else:
+                    self.counts['invalid'] += 1
+                    self.reject(row, _row_error(form))
+            if self.counts['processed'] % BATCH_SIZE == 0:
+                self.flush()
+        self.fraction = 1.0
+        self.flush()
+
+    def save_errors(self, fs):
+        if not (self.counts['invalid'] or self.counts['failed']):
+            return None
+        self.error_file.seek(0)
+        return fs.put(
+            self.error_file.read().encode('utf-8'),
+            filename=f"{os.path.splitext(self.job['filename'])[0]}-errors.csv",
+            content_type='text/csv',
+            user_id=self.user_id,
+            job_id=self.job['_id']
+        )
+
+def run_import(app, job_id):
+    """Thread target: run the queued import job_id to completion."""
+    from gridfs import GridFS
+    # sanitize_input and the forms log through the request session, so the
+    # import runs in a request context of its own
+    with app.test_request_context():
+        db = app.extensions['mongo']['bizdb']
+        fs = GridFS(db, collection=IMPORTS_BUCKET)
+        job = db.import_jobs.find_one_and_update(
+            {'_id': job_id, 'status': 'queued'},
+            {'$set': {'status': 'running', 'updated_at': datetime.now(timezone.utc)}}
+        )
+        if job is None:
+            return
+        run = _ImportRun(db, job)
+        try:
+            run.run(fs.get(job['upload_id']))
+            run.report(
+                status='done',
+                truncated=job.get('truncated', False),
+                errors_id=run.save_errors(fs),
+                finished_at=datetime.now(timezone.utc)
+            )
+            logger.info(f"Import {job_id} for user {run.user_id} finished: {run.counts}", extra={'user_id': run.user_id})
+        except Exception as e:
+            logger.error(f"Import {job_id} for user {run.user_id} failed: {str(e)}", exc_info=True, extra={'user_id': run.user_id})
+            try:
+                run.report(status='failed', error=str(e), errors_id=run.save_errors(fs), finished_at=datetime.now(timezone.utc))
+            except Exception:
+                logger.error(f"Could not record failure of import {job_id}", exc_info=True, extra={'user_id': run.user_id})
+        finally:
+            run.error_file.close()
+            try:
+                fs.delete(job['upload_id'])
+            except Exception:
+                logger.warning(f"Could not delete upload of import {job_id}", extra={'user_id': run.user_id})
+
+def create_import(db, user_id, kind, upload):
+    """
+    Store an uploaded file and create its job in the mapping state.
+
+    Args:
+        db: The bizdb database.
+        user_id: Owner of the import.
+        kind: A key of IMPORT_KINDS.
+        upload: The werkzeug FileStorage from the form.
+
+    Returns:
+        ObjectId: The job id.
+
+    Raises:
+        BulkImportError: The file is not a CSV/XLSX, too large, or has no header row.
+    """
+    from gridfs import GridFS
+    fmt = detect_format(upload.filename)
+    upload.stream.seek(0, os.SEEK_END)
+    size = upload.stream.tell()
+    upload.stream.seek(0)
+    if size > MAX_UPLOAD_BYTES:
+        raise BulkImportError(f'Files up to {MAX_UPLOAD_BYTES // (1024 * 1024)} MB can be imported')
+    purge_old_imports(db, user_id)
+    fs = GridFS(db, collection=IMPORTS_BUCKET)
+    upload_id = fs.put(upload.stream, filename=upload.filename, content_type=upload.mimetype, user_id=str(user_id))
+    try:
+        headers = read_headers(fs.get(upload_id), fmt)
+    except BulkImportError:
+        fs.delete(upload_id)
+        raise
+    except Exception as e:
+        fs.delete(upload_id)
+        logger.warning(f"Unreadable import upload from user {user_id}: {str(e)}", extra={'user_id': user_id})
+        raise BulkImportError('The file could not be read')
+    now = datetime.now(timezone.utc)
+    result = db.import_jobs.insert_one({
+        'user_id': str(user_id),
+        'kind': kind,
+        'filename': upload.filename,
+        'format': fmt,
+        'status': 'mapping',
+        'headers': headers,
+        'suggested_mapping': suggest_mapping(headers, kind),
+        'upload_id': upload_id,
+        'created_at': now,
+        'updated_at': now
+    })
+    return result.inserted_id
+
+def active_import(db, user_id):
+    """The user's queued or running job, unless its heartbeat has stopped."""
+    return db.import_jobs.find_one({
+        'user_id': str(user_id),
+        'status': {'$in': ['queued', 'running']},
+        'updated_at': {'$gte': datetime.now(timezone.utc) - STALE_AFTER}
+    })
+
+def start_import(app, db, job, mapping):
+    """
+    Queue job with mapping ({field: column index}) and start its thread.
+
+    Returns:
+        bool: False if the job was already started.
+
+    Raises:
+        BulkImportError: mapping misses a required field or names a column twice.
+    """
+    spec = IMPORT_KINDS[job['kind']]
+    missing = [field for field in spec['required'] if field not in mapping]
+    if missing:
+        raise BulkImportError(f"Choose a column for: {', '.join(missing)}")
+    if len(set(mapping.values())) != len(mapping):
+        raise BulkImportError('Each column can feed only one field')
+    started = db.import_jobs.update_one(
+        {'_id': job['_id'], 'status': 'mapping'},
+        {'$set': {
+            'status': 'queued',
+            'mapping': {field: int(column) for field, column in mapping.items()},
+            'updated_at': datetime.now(timezone.utc)
+        }}
+    )
+    if not started.modified_count:
+        return False
+    threading.Thread(target=run_import, args=(app, job['_id']), name=f"import-{job['_id']}", daemon=True).start()
+    return True
+
+def purge_old_imports(db, user_id):
+    """Delete the user's jobs older than JOB_RETENTION with their files."""
+    from gridfs import GridFS
+    fs = GridFS(db, collection=IMPORTS_BUCKET)
+    cutoff = datetime.now(timezone.utc) - JOB_RETENTION
+    for job in db.import_jobs.find({'user_id': str(user_id), 'created_at': {'$lt': cutoff}}, {'upload_id': 1, 'errors_id': 1}):
+        for file_id in (job.get('upload_id'), job.get('errors_id')):
+            if isinstance(file_id, ObjectId):
+                try:
+                    fs.delete(file_id)
+                except Exception:
+                    pass
+        db.import_jobs.delete_one({'_id': job['_id']})
+
+__all__ = [
+    'IMPORTS_BUCKET', 'IMPORT_KINDS', 'BATCH_SIZE', 'MAX_ROWS', 'BulkImportError',
+    'create_import', 'active_import', 'start_import', 'run_import', 'suggest_mapping', 'iter_rows'
+]
@@ -0,0 +1,183 @@
+"""
+Per-user change feed of records and cashflows for delta sync.
+
+Every write to records and cashflows sets updated_at, and every delete leaves
+a tombstone in sync_tombstones (record_deletion). Together they form a change
+log that /api/v1/sync/changes reads in (updated_at, _id) order from the
+(user_id, updated_at, _id) indexes in models.py, so a client only downloads
+what changed since its last sync:
+
+    GET /api/v1/sync/changes                    -> everything, in batches
+    GET /api/v1/sync/changes?since=<cursor>     -> changes after cursor
+
+The cursor is opaque to clients. It holds one (updated_at, _id) position per
+source, so changes that share a timestamp are never skipped or repeated
+across batches. Changes younger than SETTLE_SECONDS are held back until the
+next call: a write stamped earlier but committed later than a newer one
+would otherwise fall behind a cursor that already moved past it.
+
+Tombstones expire after TOMBSTONE_RETENTION (TTL index). A cursor older than
+that may have missed deletions, so the feed starts over with reset set and
+the client replaces its local copy.
+"""
+import base64
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMIT = 200
+MAX_LIMIT = 500
+SETTLE_SECONDS = 2
+TOMBSTONE_RETENTION = timedelta(days=90)
+
+TOMBSTONES = 'sync_tombstones'
+# Cursor key for each source of the feed
+SOURCES = (('r', 'records'), ('c', 'cashflows'), ('t', TOMBSTONES))
+# Sorts after every ObjectId stored at the same updated_at
+LAST_ID = ObjectId('f' * 24)
+
+class CursorError(ValueError):
+    """The since cursor was not issued by changes_since."""
+
+def record_deletion(db, collection, document):
+    """
+    Leave a tombstone for document, just deleted from collection.
+
+    Call after a successful delete_one, with the document as found (it needs
+    _id and user_id). A failure is logged, not raised: the delete itself
+    already succeeded.
+    """
+    try:
+        db[TOMBSTONES].insert_one({
+            'user_id': str(document['user_id']),
+            'collection': collection,
+            'doc_id': document['_id'],
+            'type': document.get('type'),
+            'updated_at': datetime.now(timezone.utc)
+        })
+    except Exception as e:
+        logger.error(f"Error recording deletion of {collection} {document.get('_id')}: {str(e)}", extra={'user_id': document.get('user_id')})
+
+def _to_millis(value):
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+def _from_millis(millis):
+    return datetime.fromtimestamp(millis / 1000, tz=timezone.utc)
+
+def encode_cursor(positions, issued_at):
+    payload = {'i': _to_millis(issued_at)}
+    payload.update({key: [_to_millis(updated_at), str(doc_id)] for key, (updated_at, doc_id) in positions.items()})
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """(positions, issued_at) of a cursor from encode_cursor."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        issued_at = _from_millis(payload['i'])
+        positions = {
+            key: (_from_millis(payload[key][0]), ObjectId(payload[key][1]))
+            for key, _ in SOURCES if key in payload
+        }
+    except Exception:
+        raise CursorError('Invalid cursor')
+    return positions, issued_at
+
+def _serialize(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).isoformat()
+    if isinstance(value, dict):
+        return {k: _serialize(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_serialize(v) for v in value]
+    return value
+
+def _change(collection, document):
+    if collection == TOMBSTONES:
+        return {
+            'collection': document['collection'],
+            'id': str(document['doc_id']),
+            'type': document.get('type'),
+            'deleted': True,
+            'updated_at': _serialize(document['updated_at'])
+        }
+    data = _serialize(document)
+    data.pop('user_id', None)
+    return {
+        'collection': collection,
+        'id': data.pop('_id'),
+        'type': data.get('type'),
+        'deleted': False,
+        'updated_at': data.get('updated_at'),
+        'data': data
+    }
+
+def changes_since(db, user_id, cursor=None, limit=DEFAULT_LIMIT):
+    """
+    The next batch of changes to user_id's records and cashflows.
+
+    Args:
+        db: The bizdb database.
+        user_id: Owner of the data.
+        cursor: The cursor returned by the previous call, or None for a full download.
+        limit: Maximum number of changes per source (records, cashflows, deletions).
+
+    Returns:
+        dict: 'changes' (documents, or deletions with deleted set), 'cursor'
+            for the next call, 'has_more' when another call would return more
+            right away, and 'reset' when the client must drop its local copy
+            first.
+
+    Raises:
+        CursorError: cursor is malformed.
+    """
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    now = datetime.now(timezone.utc)
+    horizon = now - timedelta(seconds=SETTLE_SECONDS)
+    reset = False
+    positions = {}
+    if cursor:
+        positions, issued_at = decode_cursor(cursor)
+        if now - issued_at > TOMBSTONE_RETENTION:
+            logger.info(f"Sync cursor from {issued_at.isoformat()} is past tombstone retention, resetting", extra={'user_id': user_id})
+            positions = {}
+            reset = True
+    if not positions:
+        # A full download has nothing to delete on the client
+        positions['t'] = (horizon, LAST_ID)
+
+    changes = []
+    has_more = False
+    for key, collection in SOURCES:
+        query = {'user_id': str(user_id), 'updated_at': {'$lte': horizon}}
+        if key in positions:
+            updated_at, doc_id = positions[key]
+            query['$or'] = [
+                {'updated_at': {'$gt': updated_at}},
+                {'updated_at': updated_at, '_id': {'$gt': doc_id}}
+            ]
+        documents = list(
+            db[collection].find(query).sort([('updated_at', 1), ('_id', 1)]).limit(limit + 1)
+        )
+        if len(documents) > limit:
+            has_more = True
+            documents = documents[:limit]
+        if documents:
+            positions[key] = (documents[-1]['updated_at'], documents[-1]['_id'])
+        changes.extend(_change(collection, document) for document in documents)
+
+    return {
+        'changes': changes,
+        'cursor': encode_cursor(positions, now),
+        'has_more': has_more,
+        'reset': reset
+    }
+
+__all__ = ['DEFAULT_LIMIT', 'MAX_LIMIT', 'CursorError', 'record_deletion', 'changes_since']
@@ -0,0 +1,144 @@
+"""
+Conditional GET for per-user list pages and JSON endpoints.
+
+Reloading an unchanged list used to re-run its queries and resend the whole
+body, which is slow on mobile data. Views decorated with @conditional_get get
+a strong ETag computed from the user's resource versions
+(helpers.data_versions) before the view runs:
+
+    @receipts_bp.route('/')
+    @login_required
+    @utils.requires_role(['trader', 'startup', 'admin'])
+    @conditional_get('receipts')
+    def index():
+        ...
+
+A request whose If-None-Match matches gets an empty 304 straight away, so no
+collection is queried and nothing is rendered. Responses carry
+Cache-Control: private, no-cache, so browsers keep the body but revalidate on
+every use.
+
+Besides the resource versions, the ETag covers the user, the path and query
+string, the language, the build and:
+- with per_day=True, the UTC date, for views that show ages or rolling windows
+- for pages (page=True, the default), everything base.html shows that is not
+  in the data: role, display name, profile picture, entitlement, dark mode,
+  and the session's CSRF secret. A time bucket of half of WTF_CSRF_TIME_LIMIT is also included,
+  so a page served from the browser cache never holds a CSRF token that is
+  about to expire.
+
+Pages are not validated while flashed messages are pending, and responses
+that displayed a flashed message get no ETag, since the message is shown
+only once.
+"""
+import hashlib
+import os
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import current_app, get_flashed_messages, make_response, request, session
+from flask_login import current_user
+
+from helpers.data_versions import data_version, resource_version
+from helpers.metrics import record_cache_lookup
+from helpers.profile_pictures import picture_key
+from translations import get_request_language
+from utils import get_entitlement
+
+CACHE_CONTROL = 'private, no-cache'
+
+# Folders whose contents change what a page looks like; their newest mtime identifies the build
+BUILD_DIRS = ('templates', 'translations', 'static')
+
+def _build_id(root):
+    newest = 0.0
+    for folder in BUILD_DIRS:
+        for dirpath, _, filenames in os.walk(os.path.join(root, folder)):
+            for filename in filenames:
+                try:
+                    newest = max(newest, os.path.getmtime(os.path.join(dirpath, filename)))
+                except OSError:
+                    continue
+    return str(int(newest))
+
+def init_conditional_get(app):
+    """Work out the build id used in ETags (ETAG_BUILD_ID overrides it)."""
+    app.config.setdefault('ETAG_BUILD_ID', os.getenv('ETAG_BUILD_ID') or _build_id(app.root_path))
+
+def _page_state():
+    entitlement = get_entitlement()
+    state = [
+        getattr(current_user, 'role', ''),
+        getattr(current_user, 'display_name', ''),
+        # The header avatar's URL changes with the picture (helpers.profile_pictures)
+        picture_key(current_user) or '',
+        entitlement.reason,
+        int(bool(session.get('dark_mode', False))),
+        hashlib.sha1(str(session.get('csrf_token', '')).encode('utf-8')).hexdigest(),
+    ]
+    time_limit = current_app.config.get('WTF_CSRF_TIME_LIMIT', 3600)
+    if time_limit:
+        state.append(int(time.time() // max(time_limit // 2, 1)))
+    return state
+
+def compute_etag(resources, per_day=False, page=True):
+    """
+    Strong ETag for the current request as seen by current_user.
+
+    Args:
+        resources: Resource names whose versions the response depends on; with
+            none, the user's total data version is used.
+        per_day: Include the UTC date.
+        page: Include the page state rendered by base.html.
+    """
+    parts = [
+        current_app.config.get('ETAG_BUILD_ID', ''),
+        str(current_user.id),
+        request.full_path,
+        get_request_language(),
+    ]
+    if resources:
+        parts.extend(f'{resource}={resource_version(resource)}' for resource in resources)
+    else:
+        parts.append(f'*={data_version()}')
+    if per_day:
+        parts.append(datetime.now(timezone.utc).date().isoformat())
+    if page:
+        parts.extend(_page_state())
+    digest = hashlib.sha256('\x1f'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return digest[:32]
+
+def _match(etag, if_none_match):
+    """The tag in If-None-Match that validates etag, or None."""
+    # Flask-Compress sends compressed bodies with the tag "<etag>:<algorithm>"
+    for tag in if_none_match.as_set(include_weak=True):
+        if tag.split(':', 1)[0] == etag:
+            return tag
+    return None
+
+def conditional_get(*resources, per_day=False, page=True):
+    """Answer matching If-None-Match with 304 before the view runs (see module docstring)."""
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET' or not current_user.is_authenticated or (page and '_flashes' in session):
+                return f(*args, **kwargs)
+            etag = compute_etag(resources, per_day=per_day, page=page)
+            if request.if_none_match:
+                matched = _match(etag, request.if_none_match)
+                record_cache_lookup('conditional_get', matched is not None)
+                if matched is not None:
+                    response = current_app.response_class(status=304)
+                    response.set_etag(matched)
+                    response.headers['Cache-Control'] = CACHE_CONTROL
+                    return response
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200 and not (page and get_flashed_messages()):
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = CACHE_CONTROL
+            return response
+        return wrapper
+    return decorator
+
+__all__ = ['init_conditional_get', 'compute_etag', 'conditional_get']
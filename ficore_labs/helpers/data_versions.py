@@ -0,0 +1,71 @@
+"""
+Per-user data version counters.
+
+Each user document carries a total data_version and a data_versions map with
+one counter per resource ('receipts', 'payments', 'debtors', 'creditors',
+'inventory', 'notifications', 'rewards'). Routes that change a user's data
+bump the counters for what they touched:
+
+    @receipts_bp.route('/add', methods=['GET', 'POST'])
+    @login_required
+    @bumps_data_version('receipts')
+    def add():
+        ...
+
+or call bump_data_version(db, user_id, 'debtors') directly for writes made
+outside a write request. The user loader reads both fields with the user, so
+checking a version costs no query. Fragment caching keys on the total version
+(helpers.fragment_cache); ETags on the resource counters
+(helpers.conditional_get).
+
+Counters only ever go up and are compared for equality, so a lost or
+duplicated bump costs at most a cache miss.
+"""
+import logging
+from functools import wraps
+
+from flask import current_app, has_request_context, make_response, request
+from flask_login import current_user
+
+logger = logging.getLogger(__name__)
+
+def data_version(user=None):
+    """Total data version of user (default: current_user)."""
+    if user is None:
+        user = current_user
+    return getattr(user, 'data_version', 0)
+
+def resource_version(resource, user=None):
+    """Version of one resource for user (default: current_user)."""
+    if user is None:
+        user = current_user
+    return (getattr(user, 'data_versions', None) or {}).get(resource, 0)
+
+def bump_data_version(db, user_id, *resources):
+    """Move user_id to a new total version and new versions of resources."""
+    increments = {'data_version': 1}
+    increments.update({f'data_versions.{resource}': 1 for resource in resources})
+    try:
+        db.users.update_one({'_id': user_id}, {'$inc': increments})
+    except Exception as e:
+        logger.error(f"Error bumping data version for user {user_id}: {str(e)}", extra={'user_id': user_id})
+
+def bumps_data_version(*resources):
+    """
+    Bump the current user's versions of resources after a successful write request.
+
+    GET and HEAD requests, error responses and anonymous requests leave the
+    versions alone, so the decorator can go on routes that also render forms.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            response = make_response(f(*args, **kwargs))
+            if has_request_context() and request.method not in ('GET', 'HEAD') \
+                    and response.status_code < 400 and current_user.is_authenticated:
+                bump_data_version(current_app.extensions['mongo']['bizdb'], current_user.id, *resources)
+            return response
+        return wrapper
+    return decorator
+
+__all__ = ['data_version', 'resource_version', 'bump_data_version', 'bumps_data_version']
@@ -0,0 +1,212 @@
+"""
+Per-user fragment caching for dashboard cards.
+
+The dashboard and business home re-run a dozen queries and re-render every
+card on every view although the underlying data rarely changes between views.
+Pages now render each card through render_fragment():
+
+    stats_html = render_fragment('dashboard.stats', 'dashboard/_stats.html', load_stats,
+                                 vary=(tax_prep_mode, today))
+
+which returns the cached HTML when there is a hit and otherwise calls
+load_stats() for the template context, renders the partial and stores it. A hit
+skips both the queries and the Jinja work.
+
+Keys are built from the user, the request language, the fragment name, any
+extra vary values and the user's data version. The version is loaded with the
+user and bumped by routes that change the user's data (helpers.data_versions),
+so checking it costs no query. Bumping never deletes anything: stale entries
+become unreachable and age out of the LRU or hit their TTL.
+
+Storage is an in-process LRU capped at FRAGMENT_CACHE_MAX_MB (default 32) per
+worker. With FRAGMENT_CACHE_REDIS_URI set, fragments are also written to Redis
+so the other workers can use them; Redis errors are logged and treated as
+misses. Every entry expires after FRAGMENT_CACHE_TTL seconds (default 3600),
+which bounds staleness for writes made outside the routes (scripts, admin
+tools). Set FRAGMENT_CACHE_ENABLED=false to render every fragment fresh.
+
+Fragments must not contain anything specific to the session or request, such
+as csrf_token(), flashed messages or the query string, unless those values are
+passed in vary.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, render_template
+from flask_login import current_user
+from markupsafe import Markup
+
+from helpers.data_versions import data_version
+from helpers.metrics import record_cache_lookup
+from translations import get_request_language
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_MB = 32
+DEFAULT_TTL = 3600
+KEY_PREFIX = 'frag'
+
+class LocalFragmentStore:
+    """Thread-safe LRU of rendered fragments, bounded by total string size."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, html, size = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.size -= size
+                return None
+            self._entries.move_to_end(key)
+            return html
+
+    def set(self, key, html, ttl, size=None):
+        if size is None:
+            size = sys.getsizeof(html)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[2]
+            self._entries[key] = (time.monotonic() + ttl, html, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+class RedisFragmentStore:
+    """Shared store so that workers reuse each other's fragments."""
+
+    def __init__(self, url):
+        import redis
+        self._client = redis.Redis.from_url(url, socket_timeout=0.25, socket_connect_timeout=0.25)
+
+    def get(self, key):
+        try:
+            value = self._client.get(key)
+        except Exception as e:
+            logger.warning(f"Fragment cache read failed: {e}")
+            return None
+        return value.decode('utf-8') if value is not None else None
+
+    def set(self, key, html, ttl):
+        try:
+            self._client.set(key, html.encode('utf-8'), ex=ttl)
+        except Exception as e:
+            logger.warning(f"Fragment cache write failed: {e}")
+
+class FragmentCache:
+    """The local LRU in front of the optional shared store."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_MB * 1024 * 1024, ttl=DEFAULT_TTL, shared=None):
+        self.local = LocalFragmentStore(max_bytes)
+        self.shared = shared
+        self.ttl = ttl
+
+    def get(self, key):
+        html = self.local.get(key)
+        if html is None and self.shared is not None:
+            html = self.shared.get(key)
+            if html is not None:
+                self.local.set(key, html, self.ttl)
+        return html
+
+    def set(self, key, html):
+        self.local.set(key, html, self.ttl)
+        if self.shared is not None:
+            self.shared.set(key, html, self.ttl)
+
+def init_fragment_cache(app):
+    """Create the app's fragment cache from FRAGMENT_CACHE_* settings."""
+    app.config.setdefault('FRAGMENT_CACHE_ENABLED', os.getenv('FRAGMENT_CACHE_ENABLED', 'true').lower() != 'false')
+    app.config.setdefault('FRAGMENT_CACHE_MAX_MB', float(os.getenv('FRAGMENT_CACHE_MAX_MB', DEFAULT_MAX_MB)))
+    app.config.setdefault('FRAGMENT_CACHE_TTL', int(os.getenv('FRAGMENT_CACHE_TTL', DEFAULT_TTL)))
+    app.config.setdefault('FRAGMENT_CACHE_REDIS_URI', os.getenv('FRAGMENT_CACHE_REDIS_URI'))
+    shared = None
+    if app.config['FRAGMENT_CACHE_REDIS_URI']:
+        try:
+            shared = RedisFragmentStore(app.config['FRAGMENT_CACHE_REDIS_URI'])
+        except ImportError:
+            logger.warning('FRAGMENT_CACHE_REDIS_URI is set but redis is not installed; using the local cache only')
+    cache = FragmentCache(
+        max_bytes=int(app.config['FRAGMENT_CACHE_MAX_MB'] * 1024 * 1024),
+        ttl=app.config['FRAGMENT_CACHE_TTL'],
+        shared=shared
+    )
+    app.extensions['fragment_cache'] = cache
+    return cache
+
+def get_fragment_cache():
+    """The current app's cache, or None when fragment caching is off."""
+    if not current_app.config.get('FRAGMENT_CACHE_ENABLED', False):
+        return None
+    return current_app.extensions.get('fragment_cache')
+
+def fragment_key(name, vary=(), user=None):
+    """Cache key for fragment name as seen by user (default: current_user) in this request."""
+    if user is None:
+        user = current_user
+    parts = [KEY_PREFIX, str(user.id), f"v{data_version(user)}", get_request_language(), name]
+    parts.extend(str(value) for value in vary)
+    return ':'.join(parts)
+
+def render_fragment(name, template, load, vary=(), fallback=None):
+    """
+    Render a per-user page fragment, reusing the cached HTML when possible.
+
+    Args:
+        name: Fragment name, unique across the app (e.g. 'dashboard.stats').
+        template: Partial template rendered with the context from load().
+        load: Callable returning the template context; only called on a miss.
+        vary: Extra values the fragment depends on besides the user's data
+            (dates, flags, entitlement).
+        fallback: Optional callable returning a context to render, uncached,
+            when load() raises. Without it the exception propagates.
+
+    Returns:
+        Markup: The rendered fragment.
+    """
+    cache = get_fragment_cache()
+    key = fragment_key(name, vary) if cache is not None else None
+    if cache is not None:
+        html = cache.get(key)
+        record_cache_lookup('fragments', html is not None)
+        if html is not None:
+            return Markup(html)
+    try:
+        context = load()
+    except Exception as e:
+        if fallback is None:
+            raise
+        logger.error(f"Error loading fragment {name}: {str(e)}", extra={'user_id': getattr(current_user, 'id', None)})
+        return Markup(render_template(template, **fallback()))
+    html = render_template(template, **context)
+    if cache is not None:
+        cache.set(key, html)
+    return Markup(html)
+
+__all__ = [
+    'FragmentCache', 'LocalFragmentStore', 'RedisFragmentStore', 'init_fragment_cache', 'get_fragment_cache',
+    'fragment_key', 'render_fragment'
+]
@@ -0,0 +1,77 @@
+"""
+JSON provider that serialises MongoDB documents as they come from pymongo.
+
+Views used to convert every ObjectId and datetime by hand before jsonify
+(str(doc['_id']), created_at.isoformat()), and Flask's default provider goes
+through the pure-Python json encoder. FastJSONProvider encodes with orjson,
+which handles datetime, date and UUID in C, and adds ObjectId:
+
+    return jsonify({'items': list(db.records.find(query, projection))})
+
+- ObjectId -> its hex string;
+- datetime -> ISO 8601; naive datetimes (pymongo returns them unless the
+  client is tz_aware) are UTC and get +00:00;
+- date -> YYYY-MM-DD.
+
+orjson is optional: without it the stdlib encoder is used with the same
+conversions. Output is compact and keys keep their insertion order; with
+app.debug the output is indented as before.
+"""
+import json
+from datetime import date, datetime, timezone
+
+from bson import ObjectId
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+def _default(o):
+    """Types neither encoder handles natively."""
+    if isinstance(o, ObjectId):
+        return str(o)
+    if isinstance(o, datetime):
+        return (o if o.tzinfo else o.replace(tzinfo=timezone.utc)).isoformat()
+    if isinstance(o, date):
+        return o.isoformat()
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    return DefaultJSONProvider.default(o)
+
+class FastJSONProvider(DefaultJSONProvider):
+    """DefaultJSONProvider with orjson and ObjectId/datetime support (see module docstring)."""
+
+    default = staticmethod(_default)
+
+    def _options(self):
+        options = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+        if self._app.debug:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            kwargs.setdefault('default', self.default)
+            kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+            return json.dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return json.loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=self._options() | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+def init_json_provider(app):
+    """Make jsonify, request.get_json and the tojson filter use FastJSONProvider."""
+    app.json = FastJSONProvider(app)
+
+__all__ = ['FastJSONProvider', 'init_json_provider']
@@ -0,0 +1,264 @@
+"""
+Non-blocking, structured logging.
+
+Loggers get a QueueHandler that only captures the record on the calling thread;
+a single QueueListener thread per process does the formatting (JSON by default)
+and the I/O. Request context (session id, role, IP) is captured once per
+request and attached to every record, and high-volume INFO loggers can be
+sampled with LOG_SAMPLE_RATES, e.g. "bizcore_app=0.2,werkzeug=0.1".
+
+The queue holds at most LOG_QUEUE_SIZE records (default 10000). If the output
+stalls, further records are dropped and counted (dropped_records, and
+bizcore_log_records_dropped_total in /metrics) rather than held in memory.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, has_request_context, request, session
+
+CONTEXT_FIELDS = ('session_id', 'user_role', 'ip_address')
+
+NON_REQUEST_LOG_CONTEXT = {
+    'session_id': f'non-request-{os.getpid()}',
+    'user_role': 'anonymous',
+    'ip_address': 'unknown',
+}
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+# Records waiting for the listener; beyond this they are dropped (and counted)
+# rather than growing worker memory while the output stream is stalled
+MAX_QUEUE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+# How long stop_logging waits to hand a full queue its stop marker
+STOP_TIMEOUT = 5
+
+# The layout setup_logging always used, so existing log parsers keep working
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s [session: %(session_id)s, role: %(user_role)s, ip: %(ip_address)s]'
+
+def get_log_context():
+    """
+    Return the logging context for the current request, captured once and cached on g.
+
+    Returns:
+        dict: session_id, user_role and ip_address.
+    """
+    if not has_request_context():
+        return NON_REQUEST_LOG_CONTEXT
+    context = g.get('log_context')
+    # A session id issued mid-request invalidates the cached context
+    if context is None or context['session_id'] != session.get('sid', 'no-session-id'):
+        from flask_login import current_user
+        try:
+            user_role = current_user.role if current_user.is_authenticated else 'anonymous'
+        except Exception:
+            user_role = 'anonymous'
+        context = {
+            'session_id': session.get('sid', 'no-session-id'),
+            'user_role': user_role,
+            'ip_address': request.remote_addr or 'unknown',
+        }
+        g.log_context = context
+    return context
+
+def reset_log_context(*args, **kwargs):
+    """Drop the cached context; connected to Flask-Login's login/logout signals."""
+    if has_request_context():
+        g.pop('log_context', None)
+
+class RequestContextFilter(logging.Filter):
+    """Attach request context to records that were not given it explicitly."""
+
+    def filter(self, record):
+        if not hasattr(record, 'session_id'):
+            context = get_log_context()
+            for field in CONTEXT_FIELDS:
+                if not hasattr(record, field):
+                    setattr(record, field, context[field])
+        return True
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of INFO-and-below records for selected loggers.
+
+    Warnings and errors are never sampled out.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = dict(rates)
+
+    def filter(self, record):
+        if record.levelno > logging.INFO:
+            return True
+        rate = self.rates.get(record.name)
+        return rate is None or random.random() < rate
+
+def parse_sample_rates(value):
+    """Parse "logger=rate,logger=rate" into a dict, ignoring malformed entries."""
+    rates = {}
+    for item in (value or '').split(','):
+        name, _, rate = item.partition('=')
+        try:
+            rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+        except ValueError:
+            continue
+    return rates
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves message formatting to the listener thread.
+
+    The stock handler merges args and renders tracebacks before enqueueing;
+    here the record is queued as-is, so the request thread only pays for
+    record creation and the filters. When the queue is full the record is
+    dropped and counted instead of blocking the request.
+    """
+
+    def __init__(self, queue):
+        super().__init__(queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            try:
+                from helpers.metrics import LOG_RECORDS_DROPPED
+                LOG_RECORDS_DROPPED.inc()
+            except Exception:
+                pass
+
+class BoundedQueueListener(QueueListener):
+    """QueueListener whose stop() waits for room in a full queue, for up to STOP_TIMEOUT seconds."""
+
+    def stop(self):
+        if self._thread is None:
+            return
+        try:
+            self.queue.put(self._sentinel, timeout=STOP_TIMEOUT)
+        except queue.Full:
+            # The output is stalled; give up on the backlog rather than hang
+            return
+        self._thread.join()
+        self._thread = None
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record):
+        payload = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            payload['stack_info'] = self.formatStack(record.stack_info)
+        return json.dumps(payload, default=str)
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        for field in CONTEXT_FIELDS:
+            if not hasattr(record, field):
+                setattr(record, field, NON_REQUEST_LOG_CONTEXT[field])
+        return super().format(record)
+
+_listener = None
+_queue_handler = None
+_output_settings = {}
+
+def _start_listener():
+    global _listener, _queue_handler
+    output = logging.StreamHandler(_output_settings['stream'])
+    output.setFormatter(JsonFormatter() if _output_settings['format'] == 'json' else TextFormatter(TEXT_FORMAT))
+    log_queue = queue.Queue(maxsize=MAX_QUEUE)
+    _listener = BoundedQueueListener(log_queue, output, respect_handler_level=False)
+    _listener.start()
+    if _queue_handler is None:
+        _queue_handler = DeferredQueueHandler(log_queue)
+    else:
+        _queue_handler.queue = log_queue
+    return _queue_handler
+
+def _restart_after_fork():
+    # The listener thread does not survive fork (gunicorn --preload), so the
+    # child starts its own on a fresh queue.
+    global _listener
+    NON_REQUEST_LOG_CONTEXT['session_id'] = f'non-request-{os.getpid()}'
+    if _listener is not None:
+        _listener = None
+        _start_listener()
+
+def queue_depth():
+    """Number of records waiting for the listener thread."""
+    return _queue_handler.queue.qsize() if _queue_handler is not None else 0
+
+def dropped_records():
+    """Number of records dropped because the queue was full."""
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+def stop_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+atexit.register(stop_logging)
+
+def configure_logging(logger_names, level=logging.INFO, stream=None, log_format=None, sample_rates=None):
+    """
+    Route the named loggers through a shared queue and background listener.
+
+    Args:
+        logger_names: Names of the loggers to configure.
+        level: Level set on each logger.
+        stream: Output stream; defaults to sys.stderr.
+        log_format: 'json' (default, or LOG_FORMAT) or 'text'.
+        sample_rates: {logger_name: keep_fraction}; defaults to LOG_SAMPLE_RATES.
+
+    Returns:
+        The QueueHandler attached to the loggers.
+    """
+    stream = stream or sys.stderr
+    log_format = log_format or os.getenv('LOG_FORMAT', 'json')
+    if sample_rates is None:
+        sample_rates = parse_sample_rates(os.getenv('LOG_SAMPLE_RATES'))
+
+    stop_logging()
+    _output_settings.update(stream=stream, format=log_format)
+    handler = _start_listener()
+    handler.filters = []
+    if sample_rates:
+        handler.addFilter(SamplingFilter(sample_rates))
+    handler.addFilter(RequestContextFilter())
+
+    for name in logger_names:
+        target = logging.getLogger(name)
+        target.handlers = [handler]
+        target.setLevel(level)
+        target.propagate = False
+    return handler
+
+__all__ = [
+    'configure_logging', 'stop_logging', 'queue_depth', 'dropped_records', 'get_log_context', 'reset_log_context',
+    'RequestContextFilter', 'SamplingFilter', 'JsonFormatter', 'parse_sample_rates'
+]
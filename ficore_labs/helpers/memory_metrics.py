@@ -0,0 +1,161 @@
+"""
+Worker memory instrumentation.
+
+- Worker RSS is sampled at most every MEMORY_RSS_INTERVAL seconds (default 10)
+  after a request and exported as bizcore_worker_rss_bytes (one series per pid).
+- With MEMORY_TRACE=1, tracemalloc runs in every worker and each request's peak
+  Python allocation is exported as bizcore_request_peak_alloc_bytes. Requests
+  whose peak exceeds MEMORY_ALLOC_BUDGET_MB (default 50) are logged and
+  counted. tracemalloc's peak is per process, so with threaded workers
+  concurrent requests share it; numbers are exact for sync workers.
+- Admins can dump tracemalloc snapshots of the worker serving the request to
+  MEMORY_SNAPSHOT_DIR and diff any two snapshots from the same worker to find
+  the allocation sites that grew (see /admin/memory).
+
+tracemalloc slows allocation-heavy code noticeably, so it stays off unless
+MEMORY_TRACE is set; RSS sampling is always on.
+"""
+import glob
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from flask import current_app, g, request
+
+from helpers.metrics import REQUEST_ALLOC_BUDGET_EXCEEDED, REQUEST_PEAK_ALLOC, UNMATCHED_ENDPOINT, WORKER_RSS
+
+SNAPSHOT_SUFFIX = '.tracemalloc'
+
+_last_rss_sample = {'at': 0.0}
+
+def get_rss(pid=None):
+    """Resident set size in bytes of pid (default: this process)."""
+    import psutil
+    return psutil.Process(pid).memory_info().rss
+
+def get_worker_memory():
+    """
+    RSS for this worker and its sibling workers.
+
+    Under gunicorn the siblings are the master's other children; elsewhere
+    only the current process is listed.
+
+    Returns:
+        list: dicts with pid, rss and current (True for this process).
+    """
+    import psutil
+    current = psutil.Process()
+    processes = [current]
+    try:
+        parent = current.parent()
+        if parent is not None and 'gunicorn' in ' '.join(parent.cmdline()):
+            processes = parent.children()
+    except psutil.Error:
+        pass
+    workers = []
+    for process in processes:
+        try:
+            workers.append({'pid': process.pid, 'rss': process.memory_info().rss, 'current': process.pid == current.pid})
+        except psutil.Error:
+            continue
+    return sorted(workers, key=lambda worker: worker['pid'])
+
+def snapshot_dir():
+    path = current_app.config.get('MEMORY_SNAPSHOT_DIR') or os.path.join(tempfile.gettempdir(), 'bizcore-memory-snapshots')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def take_snapshot():
+    """Dump a tracemalloc snapshot of this worker; returns its file name."""
+    if not tracemalloc.is_tracing():
+        raise RuntimeError('tracemalloc is not running (set MEMORY_TRACE=1)')
+    name = f"{os.getpid()}-{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}{SNAPSHOT_SUFFIX}"
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    ))
+    snapshot.dump(os.path.join(snapshot_dir(), name))
+    return name
+
+def list_snapshots():
+    """Snapshots on disk, newest first, as dicts with name, pid and created_at."""
+    snapshots = []
+    for path in glob.glob(os.path.join(snapshot_dir(), f'*{SNAPSHOT_SUFFIX}')):
+        name = os.path.basename(path)
+        pid, _, stamp = name[:-len(SNAPSHOT_SUFFIX)].partition('-')
+        try:
+            created_at = datetime.strptime(stamp, '%Y%m%dT%H%M%S%f').replace(tzinfo=timezone.utc)
+        except ValueError:
+            continue
+        snapshots.append({'name': name, 'pid': int(pid), 'created_at': created_at, 'size': os.path.getsize(path)})
+    return sorted(snapshots, key=lambda snapshot: snapshot['created_at'], reverse=True)
+
+def _snapshot_path(name):
+    # Names come from the admin form; only accept files listed in the directory
+    if name not in {snapshot['name'] for snapshot in list_snapshots()}:
+        raise ValueError(f'Unknown snapshot: {name}')
+    return os.path.join(snapshot_dir(), name)
+
+def compare_snapshots(base_name, current_name, limit=25, key_type='lineno'):
+    """
+    Top allocation sites that grew between two snapshots.
+
+    Returns:
+        list: dicts with location, size_diff, size, count_diff and count.
+    """
+    base = tracemalloc.Snapshot.load(_snapshot_path(base_name))
+    current = tracemalloc.Snapshot.load(_snapshot_path(current_name))
+    rows = []
+    for stat in current.compare_to(base, key_type)[:limit]:
+        frame = stat.traceback[0]
+        rows.append({
+            'location': f"{frame.filename}:{frame.lineno}",
+            'size_diff': stat.size_diff,
+            'size': stat.size,
+            'count_diff': stat.count_diff,
+            'count': stat.count,
+        })
+    return rows
+
+def init_memory_metrics(app):
+    """Start tracemalloc if MEMORY_TRACE is set and register the request hooks."""
+    trace = os.getenv('MEMORY_TRACE', str(app.config.get('MEMORY_TRACE', ''))).lower() in ('1', 'true', 'yes')
+    if trace and not tracemalloc.is_tracing():
+        tracemalloc.start(int(os.getenv('MEMORY_TRACE_FRAMES', 1)))
+    budget_bytes = float(os.getenv('MEMORY_ALLOC_BUDGET_MB', app.config.get('MEMORY_ALLOC_BUDGET_MB', 50))) * 1024 * 1024
+    rss_interval = float(os.getenv('MEMORY_RSS_INTERVAL', app.config.get('MEMORY_RSS_INTERVAL', 10)))
+
+    @app.before_request
+    def start_allocation_tracking():
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            g.alloc_baseline = tracemalloc.get_traced_memory()[0]
+
+    @app.after_request
+    def record_memory_metrics(response):
+        baseline = g.pop('alloc_baseline', None)
+        if baseline is not None and tracemalloc.is_tracing():
+            peak = max(tracemalloc.get_traced_memory()[1] - baseline, 0)
+            endpoint = request.endpoint or UNMATCHED_ENDPOINT
+            REQUEST_PEAK_ALLOC.labels(endpoint).observe(peak)
+            if peak > budget_bytes:
+                REQUEST_ALLOC_BUDGET_EXCEEDED.labels(endpoint).inc()
+                app.logger.warning(
+                    "%s %s allocated %.1f MB at peak (budget %.0f MB)",
+                    request.method, request.path, peak / 1048576, budget_bytes / 1048576,
+                    extra={'endpoint': endpoint, 'peak_alloc_bytes': peak}
+                )
+        now = time.monotonic()
+        if now - _last_rss_sample['at'] >= rss_interval:
+            _last_rss_sample['at'] = now
+            try:
+                WORKER_RSS.set(get_rss())
+            except Exception:
+                pass
+        return response
+
+__all__ = [
+    'init_memory_metrics', 'get_rss', 'get_worker_memory', 'take_snapshot', 'list_snapshots', 'compare_snapshots'
+]
@@ -0,0 +1,214 @@
+"""
+Prometheus metrics.
+
+Exposed at /metrics in the Prometheus text format to scrapers that send
+'Authorization: Bearer <METRICS_TOKEN>'; without METRICS_TOKEN set the endpoint
+answers 404. Under gunicorn every worker records into its own memory-mapped
+files in PROMETHEUS_MULTIPROC_DIR (set up by gunicorn.conf.py) and a scrape of
+any worker aggregates all of them. Without that variable, e.g. under the
+development server, metrics live in-process.
+
+Recorded:
+- request latency per endpoint and method, and request counts by status
+- MongoDB command latency by collection and command
+- connection pool checkout wait
+- cache lookups by cache and result (record_cache_lookup)
+- report render durations by report and format (@timed_report)
+- depth of the background queues (logging, slow-query recorder) and log
+  records dropped when the logging queue is full
+- worker RSS and per-request peak allocation (helpers.memory_metrics)
+"""
+import os
+import time
+from functools import wraps
+
+from flask import g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+from pymongo import monitoring
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+REQUEST_LATENCY = Histogram(
+    'bizcore_request_duration_seconds', 'Request latency by endpoint',
+    ['endpoint', 'method'], buckets=REQUEST_BUCKETS
+)
+REQUESTS = Counter(
+    'bizcore_requests_total', 'Requests by endpoint and status',
+    ['endpoint', 'method', 'status']
+)
+MONGO_COMMAND_LATENCY = Histogram(
+    'bizcore_mongo_command_duration_seconds', 'MongoDB command latency',
+    ['collection', 'command'], buckets=MONGO_BUCKETS
+)
+MONGO_COMMAND_FAILURES = Counter(
+    'bizcore_mongo_command_failures_total', 'Failed MongoDB commands',
+    ['collection', 'command']
+)
+MONGO_POOL_CHECKOUT = Histogram(
+    'bizcore_mongo_pool_checkout_seconds', 'Time spent waiting for a pooled MongoDB connection',
+    buckets=MONGO_BUCKETS
+)
+MONGO_POOL_CHECKOUT_FAILURES = Counter(
+    'bizcore_mongo_pool_checkout_failures_total', 'Failed MongoDB connection checkouts',
+    ['reason']
+)
+CACHE_LOOKUPS = Counter(
+    'bizcore_cache_lookups_total', 'Cache lookups by cache and result',
+    ['cache', 'result']
+)
+REPORT_RENDER = Histogram(
+    'bizcore_report_render_seconds', 'Report generation time',
+    ['report', 'format'], buckets=REQUEST_BUCKETS
+)
+QUEUE_DEPTH = Gauge(
+    'bizcore_queue_depth', 'Items waiting in background queues',
+    ['queue'], multiprocess_mode='livesum'
+)
+LOG_RECORDS_DROPPED = Counter(
+    'bizcore_log_records_dropped_total', 'Log records dropped because the logging queue was full'
+)
+WORKER_RSS = Gauge(
+    'bizcore_worker_rss_bytes', 'Resident set size of each worker process',
+    # One series per live worker; gunicorn.conf.py drops those of exited workers
+    multiprocess_mode='liveall'
+)
+REQUEST_PEAK_ALLOC = Histogram(
+    'bizcore_request_peak_alloc_bytes', 'Peak Python allocation during a request (tracemalloc)',
+    ['endpoint'], buckets=(256e3, 1e6, 4e6, 16e6, 32e6, 64e6, 128e6, 256e6, 512e6)
+)
+REQUEST_ALLOC_BUDGET_EXCEEDED = Counter(
+    'bizcore_request_alloc_budget_exceeded_total', 'Requests whose peak allocation exceeded MEMORY_ALLOC_BUDGET_MB',
+    ['endpoint']
+)
+
+# Endpoint label for requests that matched no route, to bound cardinality
+UNMATCHED_ENDPOINT = '<unmatched>'
+
+_queue_depth_sources = {}
+
+def record_cache_lookup(cache, hit):
+    """Count a lookup in the named cache as a hit or a miss."""
+    CACHE_LOOKUPS.labels(cache, 'hit' if hit else 'miss').inc()
+
+def register_queue_depth(name, depth):
+    """Report depth() as bizcore_queue_depth{queue=name}, sampled after each request."""
+    _queue_depth_sources[name] = depth
+
+def timed_report(report, fmt):
+    """Record how long the decorated report generator takes."""
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                REPORT_RENDER.labels(report, fmt).observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+class MongoMetricsListener(monitoring.CommandListener):
+    """Command latency for every command, inside a request or not."""
+
+    def __init__(self):
+        self._collections = {}
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        self._collections[(event.connection_id, event.request_id)] = collection if isinstance(collection, str) else ''
+
+    def succeeded(self, event):
+        collection = self._collections.pop((event.connection_id, event.request_id), '')
+        MONGO_COMMAND_LATENCY.labels(collection, event.command_name).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        collection = self._collections.pop((event.connection_id, event.request_id), '')
+        MONGO_COMMAND_LATENCY.labels(collection, event.command_name).observe(event.duration_micros / 1e6)
+        MONGO_COMMAND_FAILURES.labels(collection, event.command_name).inc()
+
+class MongoPoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Connection checkout wait; the other pool events are ignored."""
+
+    def connection_checked_out(self, event):
+        MONGO_POOL_CHECKOUT.observe(event.duration)
+
+    def connection_check_out_failed(self, event):
+        MONGO_POOL_CHECKOUT.observe(event.duration)
+        MONGO_POOL_CHECKOUT_FAILURES.labels(str(event.reason)).inc()
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_checked_in(self, event):
+        pass
+
+def render_metrics():
+    """Return (body, content_type) for a scrape, merging all workers when multiprocess."""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+_listeners_registered = False
+
+def init_metrics(app):
+    """
+    Register the MongoDB listeners and the request timing hooks.
+
+    Like init_query_metrics, this must run before the MongoClient is created.
+    """
+    global _listeners_registered
+    if not _listeners_registered:
+        monitoring.register(MongoMetricsListener())
+        monitoring.register(MongoPoolMetricsListener())
+        _listeners_registered = True
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started_at = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started_at = g.pop('request_started_at', None)
+        if started_at is not None:
+            endpoint = request.endpoint or UNMATCHED_ENDPOINT
+            REQUEST_LATENCY.labels(endpoint, request.method).observe(time.perf_counter() - started_at)
+            REQUESTS.labels(endpoint, request.method, str(response.status_code)).inc()
+        for name, depth in _queue_depth_sources.items():
+            try:
+                QUEUE_DEPTH.labels(name).set(depth())
+            except Exception:
+                pass
+        return response
+
+__all__ = [
+    'init_metrics', 'render_metrics', 'record_cache_lookup', 'register_queue_depth', 'timed_report',
+    'REQUEST_LATENCY', 'REQUESTS', 'MONGO_COMMAND_LATENCY', 'MONGO_POOL_CHECKOUT', 'CACHE_LOOKUPS',
+    'REPORT_RENDER', 'QUEUE_DEPTH', 'WORKER_RSS', 'REQUEST_PEAK_ALLOC', 'REQUEST_ALLOC_BUDGET_EXCEEDED',
+    'UNMATCHED_ENDPOINT'
+]
@@ -0,0 +1,158 @@
+"""
+Full-page cache for the public marketing pages.
+
+The landing, about, contact, privacy, terms and business finance tips pages
+are the same for every anonymous visitor in a given language, yet each view
+ran every before_request hook, opened a session, resolved navigation and
+rendered the page. Crawlers and marketing spikes hit exactly these pages.
+
+init_page_cache(app) wraps app.wsgi_app in PageCacheMiddleware, which answers
+GET and HEAD requests for PUBLIC_PAGE_ENDPOINTS from an in-process cache keyed
+by host, path and language, before Flask opens the session or loads the user.
+Only visitors that cannot be logged in take this path: requests carrying a
+session or remember-me cookie go to the app as usual. The language comes from
+the bookkeeping cookie kept by the session interface
+(helpers.session_interface) or, without one, from Accept-Language, the same
+way translations.set_default_language picks it. The query string is ignored;
+none of these pages read it.
+
+On a miss the page is rendered by the app with page_cache_render set in the
+template context, so base.html leaves out the CSRF token and rendering does
+not put anything in the session. Only 200 responses are stored; Set-Cookie is
+dropped from what is stored and from what the visitor gets, so a visitor
+without cookies never has a session created. The body is stored plain and
+gzipped, and served gzipped to clients that accept it.
+
+Entries expire after PAGE_CACHE_TTL seconds (default 60) and the cache is
+capped at PAGE_CACHE_MAX_MB (default 8) per worker. Set
+PAGE_CACHE_ENABLED=false to render every request.
+"""
+import gzip
+import logging
+import os
+
+from flask import Request, has_request_context, request
+from werkzeug.datastructures import Headers
+from werkzeug.wrappers import Response
+
+from helpers.fragment_cache import LocalFragmentStore
+from helpers.metrics import record_cache_lookup
+from translations import SUPPORTED_LANGUAGES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 60
+DEFAULT_MAX_MB = 8
+ENVIRON_KEY = 'bizcore.page_cache'
+
+PUBLIC_PAGE_ENDPOINTS = (
+    'general_bp.landing',
+    'general_bp.about',
+    'general_bp.contact',
+    'general_bp.privacy',
+    'general_bp.terms',
+    'general_bp.business_finance_tips',
+)
+
+# Headers that describe one exchange rather than the page
+EXCHANGE_HEADERS = frozenset({'set-cookie', 'vary', 'content-length', 'content-encoding', 'etag', 'date'})
+VARY = 'Cookie, Accept-Language, Accept-Encoding'
+
+class CachedPage:
+    """A rendered page, plain and gzipped."""
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = [(name, value) for name, value in headers if name.lower() not in EXCHANGE_HEADERS]
+        self.body = body
+        self.gzipped = gzip.compress(body, 6)
+
+    @property
+    def size(self):
+        return len(self.body) + len(self.gzipped)
+
+    def response(self, accept_gzip):
+        headers = Headers(self.headers)
+        headers['Vary'] = VARY
+        if accept_gzip:
+            headers['Content-Encoding'] = 'gzip'
+            return Response(self.gzipped, status=self.status, headers=headers)
+        return Response(self.body, status=self.status, headers=headers)
+
+class PageCacheMiddleware:
+    """Serves PUBLIC_PAGE_ENDPOINTS to cookie-less visitors from the cache (see module docstring)."""
+
+    def __init__(self, app, wsgi_app, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        self.app = app
+        self.wsgi_app = wsgi_app
+        self.ttl = ttl
+        self.store = LocalFragmentStore(max_bytes)
+        self.paths = frozenset(
+            rule.rule for rule in app.url_map.iter_rules()
+            if rule.endpoint in PUBLIC_PAGE_ENDPOINTS and not rule.arguments
+        )
+
+    def _language(self, req):
+        bookkeeping = getattr(self.app.session_interface, 'cookie_bookkeeping', None)
+        lang = bookkeeping(self.app, req).get('lang') if bookkeeping is not None else None
+        if lang is None:
+            lang = req.accept_languages.best_match(SUPPORTED_LANGUAGES, 'en')
+        return lang if lang in SUPPORTED_LANGUAGES else 'en'
+
+    def cache_key(self, req):
+        """Key for req, or None when req must go to the app."""
+        if req.method not in ('GET', 'HEAD') or req.path not in self.paths:
+            return None
+        for cookie in (self.app.config.get('SESSION_COOKIE_NAME'), self.app.config.get('REMEMBER_COOKIE_NAME', 'remember_token')):
+            if cookie and cookie in req.cookies:
+                return None
+        return ':'.join(('page', req.host, req.path, self._language(req)))
+
+    def __call__(self, environ, start_response):
+        req = Request(environ)
+        key = self.cache_key(req)
+        if key is None:
+            return self.wsgi_app(environ, start_response)
+        accept_gzip = 'gzip' in req.accept_encodings
+        page = self.store.get(key)
+        record_cache_lookup('pages', page is not None)
+        if page is None:
+            render_environ = dict(environ)
+            render_environ['HTTP_ACCEPT_ENCODING'] = 'identity'
+            render_environ[ENVIRON_KEY] = True
+            rendered = Response.from_app(self.wsgi_app, render_environ, buffered=True)
+            rendered.headers.remove('Set-Cookie')
+            if rendered.status_code != 200 or rendered.is_streamed:
+                return rendered(environ, start_response)
+            page = CachedPage(rendered.status, rendered.headers.to_wsgi_list(), rendered.get_data())
+            self.store.set(key, page, self.ttl, size=page.size)
+        return page.response(accept_gzip)(environ, start_response)
+
+def is_page_cache_render():
+    """True while the page cache renders a page that will be shared between visitors."""
+    return has_request_context() and bool(request.environ.get(ENVIRON_KEY))
+
+def init_page_cache(app):
+    """Put the page cache in front of app from PAGE_CACHE_* settings; call after all blueprints are registered."""
+    app.config.setdefault('PAGE_CACHE_ENABLED', os.getenv('PAGE_CACHE_ENABLED', 'true').lower() != 'false')
+    app.config.setdefault('PAGE_CACHE_TTL', int(os.getenv('PAGE_CACHE_TTL', DEFAULT_TTL)))
+    app.config.setdefault('PAGE_CACHE_MAX_MB', float(os.getenv('PAGE_CACHE_MAX_MB', DEFAULT_MAX_MB)))
+
+    @app.context_processor
+    def inject_page_cache_render():
+        return {'page_cache_render': is_page_cache_render()}
+
+    if not app.config['PAGE_CACHE_ENABLED']:
+        return None
+    middleware = PageCacheMiddleware(
+        app,
+        app.wsgi_app,
+        ttl=app.config['PAGE_CACHE_TTL'],
+        max_bytes=int(app.config['PAGE_CACHE_MAX_MB'] * 1024 * 1024)
+    )
+    app.wsgi_app = middleware
+    app.extensions['page_cache'] = middleware
+    logger.info(f"Page cache enabled for {len(middleware.paths)} public pages")
+    return middleware
+
+__all__ = ['PUBLIC_PAGE_ENDPOINTS', 'CachedPage', 'PageCacheMiddleware', 'is_page_cache_render', 'init_page_cache']
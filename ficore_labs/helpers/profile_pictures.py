@@ -0,0 +1,192 @@
+"""
+Resized, cache-friendly profile pictures.
+
+The uploaded original stays in the default GridFS bucket (users.profile_picture
+holds its id), and its sha256 prefix goes in users.profile_picture_hash. A
+worker thread then writes square variants of it to PICTURES_BUCKET, each as
+WebP and JPEG:
+
+    thumb   96px  the header avatar on every page (a few KB)
+    medium 320px  the profile page
+
+Pages link to /settings/profile-picture/<user_id>/<hash>/<size>. The hash
+changes with the picture, so what that URL returns never does: variants are
+served with a year-long immutable Cache-Control and an ETag, and a
+revalidation is answered 304 without touching the database. Until the
+variants exist (or for pictures uploaded before them) the original is served
+instead, with no-cache so the browser picks up the variant later.
+
+Files are streamed from GridFS chunk by chunk rather than read into memory.
+"""
+import hashlib
+import logging
+import threading
+from io import BytesIO
+
+from flask import current_app, request, url_for
+from werkzeug.wsgi import wrap_file
+
+logger = logging.getLogger(__name__)
+
+PICTURES_BUCKET = 'profile_pictures'
+# Square edge in pixels of each variant
+VARIANTS = {'thumb': 96, 'medium': 320}
+# (format, mimetype, Pillow save options), preferred first
+FORMATS = (
+    ('webp', 'image/webp', {'quality': 80, 'method': 4}),
+    ('jpeg', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+IMMUTABLE = 'private, max-age=31536000, immutable'
+REVALIDATE = 'private, no-cache'
+DEFAULT_PICTURE = 'img/default_profile.png'
+
+def picture_hash(content):
+    """Content hash of an uploaded picture, used in its URLs."""
+    return hashlib.sha256(content).hexdigest()[:16]
+
+def variant_filename(user_id, digest, size, fmt):
+    return f'{user_id}/{digest}/{size}.{fmt}'
+
+def _field(user, name):
+    # Templates pass a User object or a to_dict_user() dict
+    return user.get(name) if isinstance(user, dict) else getattr(user, name, None)
+
+def picture_key(user):
+    """The URL key of user's picture: its hash, or its file id for older uploads."""
+    return _field(user, 'profile_picture_hash') or _field(user, 'profile_picture')
+
+def profile_picture_url(user, size='thumb'):
+    """Cacheable URL of user's picture at size, or the default picture."""
+    key = picture_key(user)
+    user_id = _field(user, 'id') or _field(user, '_id')
+    if not key or not user_id:
+        return url_for('static', filename=DEFAULT_PICTURE)
+    return url_for('settings.profile_picture_file', user_id=user_id, digest=key, size=size)
+
+def _flatten(image):
+    """image on a white background; JPEG has no alpha channel."""
+    if image.mode != 'RGBA':
+        return image
+    from PIL import Image
+    background = Image.new('RGB', image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel('A'))
+    return background
+
+def render_variants(content):
+    """Yield (size, fmt, mimetype, bytes) for every variant of the picture content."""
+    from PIL import Image, ImageOps
+    with Image.open(BytesIO(content)) as image:
+        largest = max(VARIANTS.values())
+        if image.format == 'JPEG':
+            # Let the decoder downscale large photos instead of decoding them in full
+            image.draft('RGB', (largest * 2, largest * 2))
+        has_alpha = image.mode in ('RGBA', 'LA') or 'transparency' in image.info
+        image = ImageOps.exif_transpose(image).convert('RGBA' if has_alpha else 'RGB')
+    for size, edge in VARIANTS.items():
+        resized = ImageOps.fit(image, (edge, edge), Image.LANCZOS)
+        for fmt, mimetype, options in FORMATS:
+            out = BytesIO()
+            (resized if fmt == 'webp' else _flatten(resized)).save(out, fmt.upper(), **options)
+            yield size, fmt, mimetype, out.getvalue()
+
+def generate_variants(app, user_id, digest, content):
+    """Thread target: store the variants of user_id's picture content."""
+    from gridfs import GridFS
+    with app.app_context():
+        db = app.extensions['mongo']['bizdb']
+        fs = GridFS(db, collection=PICTURES_BUCKET)
+        stored = []
+        try:
+            for size, fmt, mimetype, data in render_variants(content):
+                stored.append(fs.put(
+                    data,
+                    filename=variant_filename(user_id, digest, size, fmt),
+                    content_type=mimetype,
+                    metadata={'user_id': user_id, 'hash': digest, 'size': size, 'format': fmt}
+                ))
+            # A newer upload may have replaced this picture while we worked
+            if db.users.find_one({'_id': user_id, 'profile_picture_hash': digest}, {'_id': 1}):
+                logger.info(f"Stored {len(stored)} profile picture variants for user {user_id}", extra={'user_id': user_id})
+                return
+        except Exception as e:
+            logger.error(f"Error generating profile picture variants for user {user_id}: {str(e)}", exc_info=True, extra={'user_id': user_id})
+        for file_id in stored:
+            fs.delete(file_id)
+
+def start_variants(app, db, user_id, digest, content):
+    """Generate the variants of a new picture in the background, unless they already exist."""
+    from gridfs import GridFS
+    last_size = list(VARIANTS)[-1]
+    last_fmt = FORMATS[-1][0]
+    if GridFS(db, collection=PICTURES_BUCKET).exists({'filename': variant_filename(user_id, digest, last_size, last_fmt)}):
+        return
+    threading.Thread(target=generate_variants, args=(app, user_id, digest, content), name=f'profile-picture-{user_id}', daemon=True).start()
+
+def delete_variants(db, user_id, keep=None):
+    """Delete user_id's stored variants, except those of the picture hashed keep."""
+    import re
+    from gridfs import GridFS
+    fs = GridFS(db, collection=PICTURES_BUCKET)
+    # filename prefix queries use the bucket's (filename, uploadDate) index
+    for grid_out in fs.find({'filename': {'$regex': f'^{re.escape(str(user_id))}/'}}):
+        if keep is None or (grid_out.metadata or {}).get('hash') != keep:
+            fs.delete(grid_out._id)
+
+def _not_modified(etag, cache_control):
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    response.vary.add('Accept')
+    return response
+
+def _stream(grid_out, etag, cache_control):
+    response = current_app.response_class(
+        wrap_file(request.environ, grid_out, buffer_size=grid_out.chunk_size),
+        mimetype=grid_out.content_type or 'application/octet-stream',
+        direct_passthrough=True
+    )
+    response.content_length = grid_out.length
+    response.set_etag(etag)
+    response.last_modified = grid_out.upload_date
+    response.headers['Cache-Control'] = cache_control
+    response.vary.add('Accept')
+    return response.make_conditional(request)
+
+def picture_response(db, user_id, digest, size):
+    """
+    Stream user_id's picture hashed digest at size.
+
+    Returns:
+        Response, or None when digest is not a picture of user_id's (the
+        caller redirects to the current one).
+    """
+    from bson import ObjectId
+    from gridfs import GridFS
+    from gridfs.errors import NoFile
+    fmt = 'webp' if 'image/webp' in request.headers.get('Accept', '') else 'jpeg'
+    etag = f'{digest}-{size}-{fmt}'
+    if request.if_none_match.contains_weak(etag):
+        return _not_modified(etag, IMMUTABLE)
+    try:
+        grid_out = GridFS(db, collection=PICTURES_BUCKET).get_last_version(variant_filename(user_id, digest, size, fmt))
+        return _stream(grid_out, etag, IMMUTABLE)
+    except NoFile:
+        pass
+    # No variants yet: the original, until they are ready
+    user = db.users.find_one({'_id': user_id}, {'profile_picture': 1, 'profile_picture_hash': 1})
+    if not user or not user.get('profile_picture') or picture_key(user) != digest:
+        return None
+    try:
+        grid_out = GridFS(db).get(ObjectId(user['profile_picture']))
+    except (NoFile, ValueError):
+        return None
+    return _stream(grid_out, f'{digest}-original', REVALIDATE)
+
+def init_profile_pictures(app):
+    """Make profile_picture_url available to templates."""
+    app.jinja_env.globals['profile_picture_url'] = profile_picture_url
+
+__all__ = [
+    'PICTURES_BUCKET', 'VARIANTS', 'picture_hash', 'picture_key', 'profile_picture_url',
+    'start_variants', 'delete_variants', 'picture_response', 'init_profile_pictures'
+]
@@ -0,0 +1,174 @@
+"""
+Per-request MongoDB command instrumentation.
+
+A pymongo CommandListener counts the commands each request sends, their total
+time and the slowest one. The totals go out in a Server-Timing header (visible
+in the browser's network panel), admins get a debug panel at the bottom of
+every page, and endpoints can declare a query budget:
+
+    @dashboard_bp.route('/')
+    @login_required
+    @query_budget(25)
+    def index():
+        ...
+
+A request that exceeds its budget logs a warning; with QUERY_BUDGET_STRICT
+(on by default when app.testing is set) it raises QueryBudgetExceeded so an
+N+1 regression fails the request instead of slipping through. Commands slower
+than SLOW_QUERY_MS are also handed to helpers.slow_queries.
+"""
+import time
+from contextvars import ContextVar
+
+from flask import current_app, g, has_request_context, request
+from pymongo import monitoring
+
+from helpers.slow_queries import get_slow_query_recorder
+
+# Commands kept per request for the admin panel
+MAX_RECORDED_COMMANDS = 50
+
+_current_stats = ContextVar('query_stats', default=None)
+
+class QueryBudgetExceeded(RuntimeError):
+    """Raised in strict mode when an endpoint sends more commands than it declared."""
+
+class QueryStats:
+    """Commands sent to MongoDB while handling one request."""
+
+    __slots__ = ('count', 'total_ms', 'slowest', 'commands', 'failed', 'started_at', '_pending')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest = None
+        self.commands = []
+        self.failed = 0
+        self.started_at = time.perf_counter()
+        self._pending = {}
+
+    def record(self, command_name, collection, duration_ms, ok=True):
+        self.count += 1
+        self.total_ms += duration_ms
+        if not ok:
+            self.failed += 1
+        entry = {'command': command_name, 'collection': collection, 'ms': duration_ms, 'ok': ok}
+        if self.slowest is None or duration_ms > self.slowest['ms']:
+            self.slowest = entry
+        if len(self.commands) < MAX_RECORDED_COMMANDS:
+            self.commands.append(entry)
+
+    @property
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started_at) * 1000
+
+    def server_timing(self):
+        """Render the stats as a Server-Timing header value."""
+        parts = [f'db;dur={self.total_ms:.1f};desc="{self.count} queries"']
+        if self.slowest is not None:
+            desc = f"{self.slowest['command']} {self.slowest['collection'] or ''}".strip()
+            parts.append(f'db-slowest;dur={self.slowest["ms"]:.1f};desc="{desc}"')
+        parts.append(f'app;dur={self.elapsed_ms:.1f}')
+        return ', '.join(parts)
+
+class RequestCommandListener(monitoring.CommandListener):
+    """Feed command events into the QueryStats of the request that sent them."""
+
+    def started(self, event):
+        stats = _current_stats.get()
+        if stats is not None:
+            collection = event.command.get(event.command_name)
+            collection = collection if isinstance(collection, str) else None
+            stats._pending[(event.connection_id, event.request_id)] = (collection, event.database_name, event.command)
+
+    def succeeded(self, event):
+        self._finish(event, ok=True)
+
+    def failed(self, event):
+        self._finish(event, ok=False)
+
+    def _finish(self, event, ok):
+        stats = _current_stats.get()
+        if stats is None:
+            return
+        collection, database, command = stats._pending.pop((event.connection_id, event.request_id), (None, None, None))
+        duration_ms = event.duration_micros / 1000
+        stats.record(event.command_name, collection, duration_ms, ok=ok)
+        recorder = get_slow_query_recorder()
+        if recorder is not None and command is not None and duration_ms >= recorder.threshold_ms:
+            recorder.capture(event.command_name, database, collection, command, duration_ms,
+                             endpoint=request.endpoint if has_request_context() else None)
+
+def get_query_stats():
+    """Return the QueryStats for the current request, or None outside one."""
+    return _current_stats.get()
+
+def query_budget(max_queries):
+    """Declare the most MongoDB commands a view may send per request."""
+    def decorator(f):
+        f.query_budget = max_queries
+        return f
+    return decorator
+
+def get_query_budget(endpoint):
+    view = current_app.view_functions.get(endpoint) if endpoint else None
+    budget = getattr(view, 'query_budget', None)
+    if budget is None:
+        budget = current_app.config.get('QUERY_BUDGETS', {}).get(endpoint)
+    return budget
+
+_listener = None
+
+def init_query_metrics(app):
+    """
+    Register the command listener and the request hooks.
+
+    Must run before any MongoClient is created: pymongo only attaches globally
+    registered listeners to clients constructed afterwards.
+    """
+    global _listener
+    if _listener is None:
+        _listener = RequestCommandListener()
+        monitoring.register(_listener)
+    app.config.setdefault('QUERY_BUDGETS', {})
+    app.config.setdefault('QUERY_BUDGET_STRICT', app.testing)
+    app.config.setdefault('QUERY_PANEL_ENABLED', True)
+
+    @app.before_request
+    def start_query_stats():
+        g.query_stats_token = _current_stats.set(QueryStats())
+
+    @app.after_request
+    def report_query_stats(response):
+        stats = _current_stats.get()
+        if stats is None:
+            return response
+        response.headers.add('Server-Timing', stats.server_timing())
+        budget = get_query_budget(request.endpoint)
+        if budget is not None and stats.count > budget:
+            message = f"{request.endpoint} sent {stats.count} MongoDB commands (budget {budget})"
+            current_app.logger.warning(message, extra={'endpoint': request.endpoint, 'query_count': stats.count, 'query_budget': budget})
+            if current_app.config.get('QUERY_BUDGET_STRICT'):
+                raise QueryBudgetExceeded(message)
+        return response
+
+    @app.teardown_request
+    def clear_query_stats(exc=None):
+        token = g.pop('query_stats_token', None)
+        if token is not None:
+            _current_stats.reset(token)
+
+    @app.context_processor
+    def inject_query_stats():
+        from flask_login import current_user
+        show = (
+            app.config.get('QUERY_PANEL_ENABLED')
+            and current_user.is_authenticated
+            and getattr(current_user, 'role', None) == 'admin'
+        )
+        return {'query_stats': _current_stats.get() if show else None}
+
+__all__ = [
+    'init_query_metrics', 'query_budget', 'get_query_stats', 'get_query_budget',
+    'QueryStats', 'QueryBudgetExceeded', 'RequestCommandListener'
+]
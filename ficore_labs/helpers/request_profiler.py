@@ -0,0 +1,215 @@
+"""
+Sampling profiler for production requests.
+
+A profiled request has a background thread that reads the request thread's
+stack (sys._current_frames) every PROFILE_INTERVAL_MS (default 5 ms). The
+request itself runs untouched, so the overhead is the sampler's share of the
+GIL, not per-call tracing. The stacks are counted in collapsed form
+("module:function;module:function count", the input format of flamegraph.pl
+and speedscope) and stored in the GridFS bucket 'profiles' with endpoint,
+path and timing metadata once the response has been sent.
+
+A request is profiled when:
+- it carries an X-Profile-Token header issued from /admin/profiles (signed,
+  valid for PROFILE_TOKEN_MAX_AGE seconds), or
+- it is picked by the sampling rate an admin sets on /admin/profiles; the
+  setting is stored in app_settings and re-read by each worker every 30 s.
+"""
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from flask import current_app, g, request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+PROFILE_HEADER = 'X-Profile-Token'
+PROFILES_BUCKET = 'profiles'
+SETTINGS_ID = 'request_profiler'
+SETTINGS_REFRESH_SECONDS = 30
+MAX_STACK_DEPTH = 128
+
+class StackSampler:
+    """Periodically sample one thread's stack into collapsed-stack counts."""
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self
+
+    def _run(self):
+        own_frame_file = __file__
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None and len(names) < MAX_STACK_DEPTH:
+                code = frame.f_code
+                if code.co_filename != own_frame_file:
+                    names.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+                self.samples += 1
+
+    def collapsed(self):
+        """Return the samples in collapsed-stack text format."""
+        return '\n'.join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+def _token_serializer(app):
+    return URLSafeTimedSerializer(app.secret_key, salt='request-profile')
+
+def issue_profile_token(user_id):
+    """Return a signed token that profiles any request carrying it in X-Profile-Token."""
+    return _token_serializer(current_app).dumps({'issued_by': user_id})
+
+def _token_is_valid(token):
+    max_age = int(current_app.config.get('PROFILE_TOKEN_MAX_AGE', 3600))
+    try:
+        _token_serializer(current_app).loads(token, max_age=max_age)
+    except BadSignature:
+        return False
+    return True
+
+_settings_cache = {'sample_rate': 0.0, 'loaded_at': 0.0}
+
+def get_profiler_settings(db, refresh=False):
+    """Return {'sample_rate': float}, re-reading app_settings at most every 30 s."""
+    now = time.monotonic()
+    if refresh or now - _settings_cache['loaded_at'] > SETTINGS_REFRESH_SECONDS:
+        _settings_cache['loaded_at'] = now
+        try:
+            doc = db.app_settings.find_one({'_id': SETTINGS_ID}) or {}
+            _settings_cache['sample_rate'] = float(doc.get('sample_rate', 0.0))
+        except Exception as e:
+            current_app.logger.warning("Could not load profiler settings: %s", e)
+    return {'sample_rate': _settings_cache['sample_rate']}
+
+def set_profiler_sample_rate(db, sample_rate, user_id):
+    sample_rate = min(max(float(sample_rate), 0.0), 1.0)
+    db.app_settings.update_one(
+        {'_id': SETTINGS_ID},
+        {'$set': {'sample_rate': sample_rate, 'updated_by': user_id, 'updated_at': datetime.now(timezone.utc)}},
+        upsert=True
+    )
+    get_profiler_settings(db, refresh=True)
+    return sample_rate
+
+def _should_profile(get_db):
+    if request.endpoint in (None, 'static', 'metrics'):
+        return None
+    token = request.headers.get(PROFILE_HEADER)
+    if token and _token_is_valid(token):
+        return 'token'
+    rate = get_profiler_settings(get_db())['sample_rate']
+    if rate > 0 and random.random() < rate:
+        return 'sampled'
+    return None
+
+def save_profile(db, sampler, metadata):
+    from gridfs import GridFS
+    fs = GridFS(db, collection=PROFILES_BUCKET)
+    return fs.put(
+        sampler.collapsed().encode('utf-8'),
+        filename=f"{metadata['endpoint']}-{metadata['created_at']:%Y%m%dT%H%M%S}.collapsed.txt",
+        content_type='text/plain',
+        samples=sampler.samples,
+        **metadata
+    )
+
+def init_request_profiler(app, get_db):
+    """
+    Register the hooks.
+
+    get_db returns the database profiles and settings live in; it is called on
+    every request, so it must not do a round trip (no ping).
+    """
+    interval = float(os.getenv('PROFILE_INTERVAL_MS', app.config.get('PROFILE_INTERVAL_MS', 5))) / 1000
+
+    @app.before_request
+    def start_request_profiler():
+        try:
+            trigger = _should_profile(get_db)
+        except Exception:
+            return
+        if trigger:
+            g.profiler = StackSampler(threading.get_ident(), interval=interval).start()
+            g.profiler_trigger = trigger
+            g.profiler_started_at = time.perf_counter()
+
+    @app.after_request
+    def stop_request_profiler(response):
+        sampler = g.pop('profiler', None)
+        if sampler is None:
+            return response
+        sampler.stop()
+        from flask_login import current_user
+        metadata = {
+            'endpoint': request.endpoint,
+            'path': request.path,
+            'method': request.method,
+            'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - g.pop('profiler_started_at')) * 1000, 1),
+            'trigger': g.pop('profiler_trigger'),
+            'user_id': current_user.id if current_user.is_authenticated else None,
+            'created_at': datetime.now(timezone.utc),
+        }
+        db = get_db()
+
+        # Written after the response has been sent so the profiled request is not slowed
+        def store():
+            try:
+                save_profile(db, sampler, metadata)
+            except Exception as e:
+                app.logger.warning("Failed to store request profile for %s: %s", metadata['endpoint'], e)
+
+        response.call_on_close(store)
+        return response
+
+def build_flame_tree(collapsed):
+    """
+    Turn collapsed stacks into a tree for the flamegraph view.
+
+    Returns:
+        dict: {'name', 'value', 'children': [...]}, children sorted by value.
+    """
+    root = {'name': 'all', 'value': 0, 'children': {}}
+    for line in collapsed.splitlines():
+        stack, _, count = line.rpartition(' ')
+        if not stack or not count.isdigit():
+            continue
+        count = int(count)
+        root['value'] += count
+        node = root
+        for name in stack.split(';'):
+            child = node['children'].get(name)
+            if child is None:
+                child = node['children'][name] = {'name': name, 'value': 0, 'children': {}}
+            child['value'] += count
+            node = child
+
+    def finish(node):
+        node['children'] = sorted((finish(child) for child in node['children'].values()), key=lambda c: c['value'], reverse=True)
+        return node
+    return finish(root)
+
+__all__ = [
+    'init_request_profiler', 'issue_profile_token', 'get_profiler_settings', 'set_profiler_sample_rate',
+    'build_flame_tree', 'StackSampler', 'PROFILE_HEADER', 'PROFILES_BUCKET'
+]
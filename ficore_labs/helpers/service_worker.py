@@ -0,0 +1,100 @@
+"""
+Service worker generated from the static asset manifest.
+
+The old static/sw.js precached Jinja expressions and /templates/*.html paths
+that no server answers, so cache.addAll() rejected and nothing was cached; a
+second, unregistered service-worker.js precached missing icons. /sw.js is now
+rendered from templates/service_worker.js with URLs resolved by url_for, so it
+precaches the fingerprinted files of helpers.static_assets:
+
+- /static/dist/... (hashed, never change): cache-first;
+- the JSON endpoints behind the dashboard and business home cards
+  (SWR_ENDPOINTS): stale-while-revalidate. The cached copy is shown at once
+  and refreshed in the background; the refresh carries the ETag, so an
+  unchanged summary costs a 304 (helpers.conditional_get);
+- the add forms that queue entries offline (OFFLINE_FORM_ENDPOINTS, see
+  static/js/offline_queue.js): network first, falling back to the copy from
+  the last visit;
+- everything else, including pages: network, with a small offline page when
+  the network fails.
+
+Cache names carry a version computed from the build id and the precached
+URLs; on activation every other ficore-* cache is deleted. Cached JSON and
+pages are dropped when the user goes to the login or logout page, so the next
+user of a shared device never sees them.
+"""
+import hashlib
+import os
+
+from flask import current_app, make_response, render_template, request, url_for
+
+from translations import get_request_language
+
+# Files base.html loads on every page
+PRECACHE_STATIC = (
+    'css/bootstrap-icons.min.css',
+    'css/fonts/bootstrap-icons.woff2',
+    'css/styles.css',
+    'css/newbasefilelooks.css',
+    'css/iconslooks.css',
+    'css/profile_css.css',
+    'css/navigation_enhancements.css',
+    'img/favicon.ico',
+    'img/favicon-32x32.png',
+    'img/default_profile.png',
+)
+
+# JSON endpoints served stale-while-revalidate
+SWR_ENDPOINTS = (
+    'dashboard.weekly_profit_data',
+    'business.debt_summary',
+    'business.cashflow_summary',
+    'business.recent_activity',
+)
+
+# Pages kept for offline use, so entries can be captured without connectivity
+OFFLINE_FORM_ENDPOINTS = (
+    'receipts.add',
+    'payments.add',
+    'debtors.add',
+    'creditors.add',
+)
+
+# Visiting these clears the cached JSON and pages
+SESSION_BOUNDARY_ENDPOINTS = ('users.login', 'users.logout')
+
+def _precache_urls():
+    static_folder = current_app.static_folder
+    return [
+        url_for('static', filename=filename)
+        for filename in PRECACHE_STATIC
+        if os.path.isfile(os.path.join(static_folder, filename))
+    ]
+
+def service_worker():
+    """Render /sw.js for the current build and language."""
+    precache = _precache_urls()
+    lang = get_request_language()
+    digest = hashlib.sha256('\x1f'.join([current_app.config.get('ETAG_BUILD_ID', ''), lang] + precache).encode('utf-8'))
+    version = digest.hexdigest()[:12]
+    response = make_response(render_template(
+        'service_worker.js',
+        version=version,
+        precache=precache,
+        dist_prefix=url_for('static', filename='dist/'),
+        swr_paths=[url_for(endpoint) for endpoint in SWR_ENDPOINTS],
+        form_paths=[url_for(endpoint) for endpoint in OFFLINE_FORM_ENDPOINTS],
+        boundary_paths=[url_for(endpoint) for endpoint in SESSION_BOUNDARY_ENDPOINTS],
+        lang=lang
+    ))
+    response.mimetype = 'text/javascript'
+    # Browsers revalidate the script on navigation; the ETag makes that a 304
+    response.headers['Cache-Control'] = 'no-cache'
+    response.set_etag(version)
+    return response.make_conditional(request)
+
+def init_service_worker(app):
+    """Serve the generated service worker at /sw.js, so that its scope is the whole site."""
+    app.add_url_rule('/sw.js', 'service_worker', service_worker)
+
+__all__ = ['PRECACHE_STATIC', 'SWR_ENDPOINTS', 'OFFLINE_FORM_ENDPOINTS', 'init_service_worker']
@@ -0,0 +1,185 @@
+"""
+Write-coalescing MongoDB session interface.
+
+Flask-Session's MongoDB backend upserts the session document on every request
+(SESSION_REFRESH_EACH_REQUEST) and the app touches session['last_activity'] on
+every authenticated request, so every page view and XHR poll was a session
+write. This interface only writes the document when:
+
+- a key other than the activity fields has changed, or
+- the stored last_activity is older than ACTIVITY_WRITE_INTERVAL.
+
+The precise last_activity is kept in a signed cookie
+(<SESSION_COOKIE_NAME>_meta) that is refreshed on every response at no
+database cost. Sessions that only carry bookkeeping keys (anonymous visitors
+with a sid and language) are not stored server-side at all; those keys ride
+in the same signed cookie until the session gains real state.
+"""
+import copy
+from datetime import datetime, timedelta, timezone
+
+from flask import request
+from flask_session.mongodb import MongoDBSession, MongoDBSessionInterface
+from itsdangerous import BadSignature, URLSafeSerializer
+
+# Written to the store at most once per interval; always kept in the cookie
+ACTIVITY_KEYS = frozenset({'last_activity'})
+ACTIVITY_WRITE_INTERVAL = timedelta(seconds=60)
+
+# Keys that on their own do not make a session worth storing server-side
+BOOKKEEPING_KEYS = frozenset({'sid', 'lang', 'is_anonymous', 'created_at', '_permanent', '_fresh'}) | ACTIVITY_KEYS
+
+def _parse_timestamp(value):
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.replace(' ', 'T'))
+        except ValueError:
+            return None
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    return None
+
+def _state(data):
+    return {key: value for key, value in data.items() if key not in ACTIVITY_KEYS}
+
+class CoalescingSession(MongoDBSession):
+    """Session that remembers what was loaded so saves can be skipped."""
+
+    def __init__(self, initial=None, sid=None, permanent=None, stored=False):
+        super().__init__(initial, sid=sid, permanent=permanent)
+        self.stored = stored
+        self.loaded_state = copy.deepcopy(_state(self)) if stored else {}
+        self.stored_last_activity = _parse_timestamp(self.get('last_activity')) if stored else None
+        self.accessed = False
+
+class CoalescingMongoDBSessionInterface(MongoDBSessionInterface):
+    """MongoDB session interface that skips redundant writes (see module docstring)."""
+
+    session_class = CoalescingSession
+
+    def get_meta_cookie_name(self, app):
+        return f"{self.get_cookie_name(app)}_meta"
+
+    def _meta_serializer(self, app):
+        return URLSafeSerializer(app.secret_key, salt='session-meta')
+
+    def _load_meta(self, app, request):
+        value = request.cookies.get(self.get_meta_cookie_name(app))
+        if not value:
+            return {}
+        try:
+            meta = self._meta_serializer(app).loads(value)
+        except BadSignature:
+            return {}
+        return meta if isinstance(meta, dict) else {}
+
+    @staticmethod
+    def _cookie_bookkeeping(meta):
+        return {key: value for key, value in meta.get('data', {}).items() if key in BOOKKEEPING_KEYS}
+
+    def cookie_bookkeeping(self, app, request):
+        """Bookkeeping keys (e.g. lang) of a session that is not stored server-side, read from the cookie alone."""
+        return self._cookie_bookkeeping(self._load_meta(app, request))
+
+    def open_session(self, app, request):
+        meta = self._load_meta(app, request)
+        sid = request.cookies.get(app.config['SESSION_COOKIE_NAME'])
+        if sid and self.use_signer:
+            try:
+                sid = self._unsign(app, sid)
+            except BadSignature:
+                sid = None
+
+        if sid:
+            data = self._retrieve_session_data(self._get_store_id(sid))
+            if data is not None:
+                # Written by earlier versions; the idle timeout is checked against last_activity
+                data.pop('idle_deadline', None)
+                session = self.session_class(data, sid=sid, stored=True)
+                # The cookie holds the precise activity for this stored session
+                if meta.get('store_sid') == sid:
+                    for key in ACTIVITY_KEYS:
+                        if key in meta:
+                            dict.__setitem__(session, key, meta[key])
+                return session
+
+        # New or not-yet-stored session: restore bookkeeping keys from the cookie
+        initial = self._cookie_bookkeeping(meta)
+        return self.session_class(initial, sid=self._generate_sid(self.sid_length), permanent=self.permanent)
+
+    def _needs_store_write(self, session):
+        if not session.stored:
+            return True
+        if _state(session) != session.loaded_state:
+            return True
+        last_activity = _parse_timestamp(session.get('last_activity'))
+        if last_activity is None:
+            return False
+        stored = session.stored_last_activity
+        return stored is None or last_activity - stored >= ACTIVITY_WRITE_INTERVAL
+
+    def _set_meta_cookie(self, app, session, response, stored):
+        last_activity = _parse_timestamp(session.get('last_activity'))
+        meta = {}
+        if last_activity is not None:
+            meta['last_activity'] = last_activity.isoformat()
+        if stored:
+            meta['store_sid'] = session.sid
+        else:
+            meta['data'] = {key: value for key, value in session.items() if key in BOOKKEEPING_KEYS and key not in ACTIVITY_KEYS}
+        response.set_cookie(
+            self.get_meta_cookie_name(app),
+            self._meta_serializer(app).dumps(meta),
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=self.get_cookie_domain(app),
+            path=self.get_cookie_path(app),
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if not session:
+            if session.modified:
+                if session.stored:
+                    self._delete_session(self._get_store_id(session.sid))
+                response.delete_cookie(key=name, domain=domain, path=path)
+                response.delete_cookie(key=self.get_meta_cookie_name(app), domain=domain, path=path)
+                response.vary.add('Cookie')
+            return
+
+        has_state = any(key not in BOOKKEEPING_KEYS for key in session)
+        if not has_state:
+            # Only bookkeeping left (e.g. after logout): keep it in the cookie
+            if session.stored:
+                self._delete_session(self._get_store_id(session.sid))
+                session.stored = False
+            if name in request.cookies:
+                response.delete_cookie(key=name, domain=domain, path=path)
+        elif self._needs_store_write(session):
+            self._upsert_session(app.permanent_session_lifetime, session, self._get_store_id(session.sid))
+            session.stored = True
+            value = self._sign(app, session.sid) if self.use_signer else session.sid
+            response.set_cookie(
+                key=name,
+                value=value,
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+            )
+
+        if session.modified:
+            self._set_meta_cookie(app, session, response, session.stored)
+            response.vary.add('Cookie')
+
+__all__ = ['CoalescingMongoDBSessionInterface', 'CoalescingSession', 'ACTIVITY_WRITE_INTERVAL']
@@ -0,0 +1,230 @@
+"""
+Slow MongoDB command capture.
+
+The request command listener (helpers.query_metrics) hands every command that
+takes longer than SLOW_QUERY_MS (default 100) to SlowQueryRecorder.capture(). The
+command is reduced to its shape, with operators and field names kept and
+values replaced by '?', so the same query from different users groups together.
+A background thread writes it to the capped slow_queries collection. For a
+sample of read commands (SLOW_QUERY_EXPLAIN_RATE, at most once per shape per
+SLOW_QUERY_EXPLAIN_INTERVAL seconds) it also records a summary of
+explain('executionStats'): winning plan, keys and documents examined.
+
+Nothing here runs on the request thread apart from building the shape.
+"""
+import hashlib
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERIES_COLLECTION = 'slow_queries'
+
+# Commands that can be explained without side effects
+EXPLAINABLE_COMMANDS = frozenset({'find', 'aggregate', 'count', 'distinct'})
+
+# Fields of a command document that are driver/session plumbing, not the query
+_COMMAND_PLUMBING = frozenset({'lsid', 'txnNumber', 'autocommit', 'startTransaction', '$clusterTime', '$db', '$readPreference', 'readConcern', 'writeConcern', 'cursor'})
+
+_MAX_QUEUE = 1000
+
+def normalize_shape(value):
+    """Strip values from a filter/sort/pipeline, keeping operators and field names."""
+    if isinstance(value, dict):
+        return {key: normalize_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if any(isinstance(item, (dict, list, tuple)) for item in value):
+            return [normalize_shape(item) for item in value]
+        return ['?'] if value else []
+    return '?'
+
+def query_shape(command_name, command):
+    """
+    Return the shape of a command: {'filter': ..., 'sort': ...} or {'pipeline': ...}.
+
+    Only the parts that decide index use are kept.
+    """
+    if command_name == 'find':
+        return {'filter': normalize_shape(command.get('filter', {})), 'sort': normalize_shape(command.get('sort', {}))}
+    if command_name in ('count', 'distinct', 'findAndModify'):
+        shape = {'filter': normalize_shape(command.get('query', {}))}
+        if command_name == 'distinct':
+            shape['key'] = command.get('key')
+        return shape
+    if command_name == 'aggregate':
+        return {'pipeline': normalize_shape(command.get('pipeline', []))}
+    if command_name in ('update', 'delete'):
+        statements = command.get('updates' if command_name == 'update' else 'deletes') or [{}]
+        return {'filter': normalize_shape(statements[0].get('q', {}))}
+    return {}
+
+def shape_hash(command_name, collection, shape):
+    raw = json.dumps([command_name, collection, shape], sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+def summarize_explain(result):
+    """Reduce an explain('executionStats') result to the fields the admin page shows."""
+    planner = result.get('queryPlanner') or {}
+    stats = result.get('executionStats') or {}
+    # Aggregations nest the planner under the first $cursor stage
+    if not planner and result.get('stages'):
+        cursor = result['stages'][0].get('$cursor', {})
+        planner = cursor.get('queryPlanner', {})
+        stats = cursor.get('executionStats', {})
+
+    stages = []
+    plan = planner.get('winningPlan', {})
+    plan = plan.get('queryPlan', plan)
+    while plan:
+        stage = plan.get('stage')
+        if stage:
+            stages.append(f"{stage} {plan['indexName']}" if plan.get('indexName') else stage)
+        plan = plan.get('inputStage')
+    return {
+        'winning_plan': ' <- '.join(stages),
+        'collection_scan': 'COLLSCAN' in ' '.join(stages),
+        'n_returned': stats.get('nReturned'),
+        'keys_examined': stats.get('totalKeysExamined'),
+        'docs_examined': stats.get('totalDocsExamined'),
+        'execution_ms': stats.get('executionTimeMillis'),
+    }
+
+class SlowQueryRecorder:
+    """Queue slow commands and persist them from a background thread."""
+
+    def __init__(self, client, db_name, threshold_ms=100.0, explain_rate=0.1, explain_interval=600):
+        self.client = client
+        self.db_name = db_name
+        self.threshold_ms = threshold_ms
+        self.explain_rate = explain_rate
+        self.explain_interval = explain_interval
+        self._queue = queue.Queue(maxsize=_MAX_QUEUE)
+        self._last_explained = {}
+        self._thread = None
+        self._pid = None
+
+    def _ensure_worker(self):
+        # The worker thread does not survive fork (gunicorn --preload)
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            self._pid = os.getpid()
+            self._queue = queue.Queue(maxsize=_MAX_QUEUE)
+            self._thread = threading.Thread(target=self._run, name='slow-query-recorder', daemon=True)
+            self._thread.start()
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def capture(self, command_name, database, collection, command, duration_ms, endpoint=None):
+        """Called from the command listener; cheap, never raises."""
+        if duration_ms < self.threshold_ms or collection == SLOW_QUERIES_COLLECTION:
+            return
+        try:
+            shape = query_shape(command_name, command)
+            entry = {
+                'shape_hash': shape_hash(command_name, collection, shape),
+                'shape': json.dumps(shape, default=str),
+                'command': command_name,
+                'database': database,
+                'collection': collection,
+                'endpoint': endpoint,
+                'duration_ms': round(duration_ms, 2),
+                'created_at': datetime.now(timezone.utc),
+                'explain': None,
+            }
+            explain_command = None
+            if command_name in EXPLAINABLE_COMMANDS and self._should_explain(entry['shape_hash']):
+                explain_command = {key: value for key, value in command.items() if key not in _COMMAND_PLUMBING}
+            self._ensure_worker()
+            self._queue.put_nowait((entry, explain_command))
+        except queue.Full:
+            pass
+        except Exception as e:
+            logger.debug("Slow query capture failed: %s", e)
+
+    def _should_explain(self, key):
+        now = time.monotonic()
+        last = self._last_explained.get(key)
+        if last is not None and now - last < self.explain_interval:
+            return False
+        if random.random() >= self.explain_rate:
+            return False
+        self._last_explained[key] = now
+        return True
+
+    def _run(self):
+        while True:
+            entry, explain_command = self._queue.get()
+            try:
+                if explain_command is not None:
+                    try:
+                        result = self.client[entry['database']].command('explain', explain_command, verbosity='executionStats')
+                        entry['explain'] = summarize_explain(result)
+                    except Exception as e:
+                        entry['explain'] = {'error': str(e)}
+                self.client[self.db_name][SLOW_QUERIES_COLLECTION].insert_one(entry)
+            except Exception as e:
+                logger.warning("Failed to record slow query %s on %s: %s", entry['command'], entry['collection'], e)
+
+_recorder = None
+
+def get_slow_query_recorder():
+    return _recorder
+
+def init_slow_queries(app, client, db_name='bizdb'):
+    """Start capturing slow commands sent through client."""
+    global _recorder
+    _recorder = SlowQueryRecorder(
+        client,
+        db_name,
+        threshold_ms=float(os.getenv('SLOW_QUERY_MS', app.config.get('SLOW_QUERY_MS', 100))),
+        explain_rate=float(os.getenv('SLOW_QUERY_EXPLAIN_RATE', app.config.get('SLOW_QUERY_EXPLAIN_RATE', 0.1))),
+        explain_interval=float(os.getenv('SLOW_QUERY_EXPLAIN_INTERVAL', app.config.get('SLOW_QUERY_EXPLAIN_INTERVAL', 600))),
+    )
+    return _recorder
+
+def get_slow_query_groups(db, limit=50):
+    """
+    Group recorded slow queries by shape, worst total time first.
+
+    Each group carries the most recent explain summary recorded for its shape.
+    """
+    groups = list(db[SLOW_QUERIES_COLLECTION].aggregate([
+        {'$sort': {'created_at': 1}},
+        {'$group': {
+            '_id': '$shape_hash',
+            'command': {'$last': '$command'},
+            'collection': {'$last': '$collection'},
+            'shape': {'$last': '$shape'},
+            'endpoints': {'$addToSet': '$endpoint'},
+            'count': {'$sum': 1},
+            'total_ms': {'$sum': '$duration_ms'},
+            'avg_ms': {'$avg': '$duration_ms'},
+            'max_ms': {'$max': '$duration_ms'},
+            'last_seen': {'$max': '$created_at'},
+        }},
+        {'$sort': {'total_ms': -1}},
+        {'$limit': limit},
+    ]))
+    explains = {}
+    if groups:
+        cursor = db[SLOW_QUERIES_COLLECTION].find(
+            {'shape_hash': {'$in': [group['_id'] for group in groups]}, 'explain': {'$ne': None}},
+            {'shape_hash': 1, 'explain': 1}
+        ).sort('created_at', -1)
+        for doc in cursor:
+            explains.setdefault(doc['shape_hash'], doc['explain'])
+    for group in groups:
+        group['explain'] = explains.get(group['_id'])
+        group['endpoints'] = sorted(endpoint for endpoint in group['endpoints'] if endpoint)
+    return groups
+
+__all__ = [
+    'init_slow_queries', 'get_slow_query_recorder', 'get_slow_query_groups',
+    'normalize_shape', 'query_shape', 'summarize_explain', 'SlowQueryRecorder'
+]
@@ -0,0 +1,216 @@
+"""
+Fingerprinted, precompressed static files.
+
+Stylesheets, scripts and fonts used to be served with default caching, so
+browsers revalidated them on every page, and Flask-Compress gzipped the same
+bytes again on every request. A build step now copies static/css, static/js
+and static/fonts to static/dist under content-hashed names, next to .gz
+(gzip -9) and .br (brotli quality 11) variants, and writes
+static/dist/manifest.json:
+
+    python -m helpers.static_assets            # run from ficore_labs/, before starting the app
+
+url() references between the copied files (the icon fonts in
+bootstrap-icons.css) are rewritten to the hashed names. The original files
+stay in place, so hard-coded /static/... paths keep working.
+
+With a manifest present, init_static_assets(app, compress):
+- makes url_for('static', filename='css/styles.css') return the hashed name;
+- serves hashed names with the best precompressed variant the client accepts
+  and Cache-Control: public, max-age=31536000, immutable, since their content
+  never changes under that name;
+- keeps Flask-Compress away from those responses and lets it compress all
+  other responses as before.
+
+Without a manifest (development, or the build step was skipped) static files
+are served exactly as before.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+
+from flask import current_app, request, send_from_directory
+
+logger = logging.getLogger(__name__)
+
+SOURCE_DIRS = ('css', 'js', 'fonts')
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+HASH_LENGTH = 12
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Preferred first; the extension of each precompressed variant
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+# Already compressed formats (woff, woff2, images) gain nothing from another pass
+COMPRESSIBLE_EXTENSIONS = frozenset({'.css', '.js', '.svg', '.ttf', '.otf', '.eot', '.json', '.map', '.txt'})
+
+CSS_URL_RE = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+
+def _hashed_name(relpath, content):
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    root, ext = posixpath.splitext(relpath)
+    return f"{root}.{digest}{ext}"
+
+def _rewrite_css_urls(relpath, css, manifest):
+    """Point relative url() references in the stylesheet at relpath to hashed names."""
+    base = posixpath.dirname(relpath)
+
+    def replace(match):
+        quote, target = match.groups()
+        if target.startswith(('data:', 'http:', 'https:', '//', '/', '#')):
+            return match.group(0)
+        path, _, fragment = target.partition('#')
+        path = path.split('?', 1)[0]
+        resolved = posixpath.normpath(posixpath.join(base, path))
+        if resolved not in manifest:
+            return match.group(0)
+        hashed = posixpath.relpath(manifest[resolved]['path'], posixpath.join(DIST_DIR, base) if base else DIST_DIR)
+        return f"url({quote}{hashed}{'#' + fragment if fragment else ''}{quote})"
+
+    return CSS_URL_RE.sub(replace, css)
+
+def _write_variants(path, content):
+    """Write the compressed variants of path that are smaller than content."""
+    encodings = []
+    if os.path.splitext(path)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+        return encodings
+    import brotli
+    for encoding, suffix in ENCODINGS:
+        if encoding == 'br':
+            compressed = brotli.compress(content, quality=11)
+        else:
+            compressed = gzip.compress(content, compresslevel=9, mtime=0)
+        if len(compressed) < len(content):
+            with open(path + suffix, 'wb') as f:
+                f.write(compressed)
+            encodings.append(encoding)
+    return encodings
+
+def build_static(static_folder):
+    """
+    Fingerprint and precompress SOURCE_DIRS of static_folder into static_folder/dist.
+
+    Returns:
+        dict: The manifest, mapping each source path (relative to
+            static_folder) to its hashed path and precompressed encodings.
+    """
+    dist = os.path.join(static_folder, DIST_DIR)
+    shutil.rmtree(dist, ignore_errors=True)
+    sources = []
+    for folder in SOURCE_DIRS:
+        for dirpath, _, filenames in os.walk(os.path.join(static_folder, folder)):
+            for filename in sorted(filenames):
+                if filename.endswith(('.gz', '.br')):
+                    continue
+                sources.append(os.path.relpath(os.path.join(dirpath, filename), static_folder).replace(os.sep, '/'))
+    # Stylesheets last, so the files they reference already have hashed names
+    sources.sort(key=lambda relpath: (relpath.endswith('.css'), relpath))
+
+    manifest = {}
+    for relpath in sources:
+        with open(os.path.join(static_folder, relpath), 'rb') as f:
+            content = f.read()
+        if relpath.endswith('.css'):
+            content = _rewrite_css_urls(relpath, content.decode('utf-8'), manifest).encode('utf-8')
+        hashed = posixpath.join(DIST_DIR, _hashed_name(relpath, content))
+        target = os.path.join(static_folder, hashed)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(content)
+        manifest[relpath] = {'path': hashed, 'encodings': _write_variants(target, content)}
+
+    with open(os.path.join(dist, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    return manifest
+
+def load_manifest(static_folder):
+    """The manifest written by build_static, or None when there is none."""
+    try:
+        with open(os.path.join(static_folder, DIST_DIR, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.error(f"Unreadable static manifest, serving unversioned files: {str(e)}")
+        return None
+
+def _choose_encoding(encodings):
+    for encoding, suffix in ENCODINGS:
+        if encoding in encodings and request.accept_encodings.quality(encoding) > 0:
+            return encoding, suffix
+    return None, ''
+
+def init_static_assets(app, compress):
+    """
+    Serve fingerprinted static files and register Flask-Compress for the rest.
+
+    Call in place of the after_request hook Flask-Compress would register, i.e.
+    right after compress.init_app(app) with COMPRESS_REGISTER set to False.
+    """
+    manifest = load_manifest(app.static_folder) or {}
+    urls = {source: entry['path'] for source, entry in manifest.items()}
+    hashed = {entry['path']: tuple(entry['encodings']) for entry in manifest.values()}
+    app.extensions['static_assets'] = urls
+
+    @app.after_request
+    def compress_response(response):
+        if request.endpoint == 'static' and (request.view_args or {}).get('filename') in hashed:
+            return response
+        return compress.after_request(response)
+
+    if not manifest:
+        logger.info('No static manifest found; run python -m helpers.static_assets to fingerprint static files')
+        return urls
+
+    @app.url_defaults
+    def fingerprint_static(endpoint, values):
+        if endpoint == 'static' and values.get('filename') in urls:
+            values['filename'] = urls[values['filename']]
+
+    send_static_file = app.view_functions['static']
+
+    def static(filename):
+        encodings = hashed.get(filename)
+        if encodings is None:
+            return send_static_file(filename=filename)
+        encoding, suffix = _choose_encoding(encodings)
+        response = send_from_directory(
+            current_app.static_folder,
+            filename + suffix,
+            mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+            max_age=IMMUTABLE_MAX_AGE
+        )
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+    app.view_functions['static'] = static
+    logger.info(f"Serving {len(hashed)} fingerprinted static files")
+    return urls
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        '--static-folder',
+        default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static'),
+        help='Static folder to build (default: the app\'s static/)'
+    )
+    args = parser.parse_args(argv)
+    manifest = build_static(args.static_folder)
+    compressed = sum(1 for entry in manifest.values() if entry['encodings'])
+    print(f"Fingerprinted {len(manifest)} files ({compressed} precompressed) into {os.path.join(args.static_folder, DIST_DIR)}")
+
+__all__ = ['build_static', 'load_manifest', 'init_static_assets']
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""
+Batch upload of entries captured offline.
+
+The PWA queues receipts, payments, debtors and creditors recorded without
+connectivity (static/js/offline_queue.js) and uploads them in batches to
+/api/v1/sync/upload. Each entry carries an id generated on the device:
+
+    {"client_id": "6f1c...", "kind": "receipt", "captured_at": "2025-03-01T09:30:00Z",
+     "data": {"party_name": "Aisha Stores", "date": "2025-03-01", "amount": "2500", "method": "cash"}}
+
+data is validated with the form the web page uses (SYNC_KINDS) and turned into
+a document by the same builder as the add route. The documents go in with one
+insert_many(ordered=False) per collection. The unique (user_id, client_id)
+index on records and cashflows (models.py) turns a retried entry into a
+duplicate key error, which is reported as 'duplicate' with the stored id. A
+retried batch is therefore harmless, and the client can drop every entry that
+comes back as created or duplicate.
+"""
+import logging
+import re
+from datetime import datetime, timezone
+
+from pymongo.errors import BulkWriteError
+from werkzeug.datastructures import MultiDict
+
+from blueprints.creditors.routes import CreditorForm, creditor_document
+from blueprints.debtors.routes import DebtorForm, debtor_document
+from blueprints.payments.routes import PaymentForm, payment_document
+from blueprints.receipts.routes import ReceiptForm, receipt_document
+from helpers.data_versions import bump_data_version
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH = 100
+CLIENT_ID_RE = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+DUPLICATE_KEY = 11000
+
+# kind: (form, document builder, collection, data version resource)
+SYNC_KINDS = {
+    'receipt': (ReceiptForm, receipt_document, 'cashflows', 'receipts'),
+    'payment': (PaymentForm, payment_document, 'cashflows', 'payments'),
+    'debtor': (DebtorForm, debtor_document, 'records', 'debtors'),
+    'creditor': (CreditorForm, creditor_document, 'records', 'creditors'),
+}
+
+# Builders that take the capture time as created_at; cashflows use their form date
+CAPTURE_TIME_KINDS = frozenset({'debtor', 'creditor'})
+
+class SyncError(ValueError):
+    """The upload as a whole is malformed."""
+
+def _captured_at(value):
+    """The capture time sent by the client, if valid and not in the future."""
+    if not isinstance(value, str):
+        return None
+    try:
+        captured_at = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if captured_at.tzinfo is None:
+        captured_at = captured_at.replace(tzinfo=timezone.utc)
+    return captured_at if captured_at <= datetime.now(timezone.utc) else None
+
+def _formdata(data):
+    formdata = MultiDict()
+    for name, value in data.items():
+        if isinstance(value, (dict, list)):
+            return None
+        if value is not None:
+            formdata[name] = str(value)
+    return formdata
+
+def _validate(entry, user_id):
+    """(document, collection, resource) for a valid entry, or a result dict describing why it is not."""
+    client_id = entry.get('client_id') if isinstance(entry, dict) else None
+    if not isinstance(client_id, str) or not CLIENT_ID_RE.match(client_id):
+        return {'client_id': client_id if isinstance(client_id, str) else None, 'status': 'invalid', 'errors': {'client_id': ['Invalid client id']}}
+    kind = entry.get('kind')
+    if kind not in SYNC_KINDS:
+        return {'client_id': client_id, 'status': 'invalid', 'errors': {'kind': [f'Unknown kind {kind!r}']}}
+    data = entry.get('data')
+    formdata = _formdata(data) if isinstance(data, dict) else None
+    if formdata is None:
+        return {'client_id': client_id, 'status': 'invalid', 'errors': {'data': ['Expected an object of field values']}}
+    form_class, build, collection, resource = SYNC_KINDS[kind]
+    form = form_class(formdata=formdata, meta={'csrf': False})
+    if not form.validate():
+        return {'client_id': client_id, 'status': 'invalid', 'errors': form.errors}
+    if kind in CAPTURE_TIME_KINDS:
+        document = build(form, user_id, created_at=_captured_at(entry.get('captured_at')))
+    else:
+        document = build(form, user_id)
+    document['client_id'] = client_id
+    return document, collection, resource
+
+def _insert(db, collection, documents, results, user_id):
+    """Insert documents, filling results[client_id]; returns how many were created."""
+    duplicates = set()
+    failed = set()
+    write_errors = []
+    try:
+        db[collection].insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        write_errors = e.details.get('writeErrors', [])
+        for error in write_errors:
+            client_id = documents[error['index']]['client_id']
+            if error.get('code') == DUPLICATE_KEY:
+                duplicates.add(client_id)
+            else:
+                failed.add(client_id)
+                logger.error(f"Sync insert failed for user {user_id}, entry {client_id}: {error.get('errmsg')}", extra={'user_id': user_id})
+    existing = {}
+    if duplicates:
+        cursor = db[collection].find({'user_id': str(user_id), 'client_id': {'$in': list(duplicates)}}, {'client_id': 1})
+        existing = {doc['client_id']: str(doc['_id']) for doc in cursor}
+    for document in documents:
+        client_id = document['client_id']
+        if client_id in failed:
+            results[client_id] = {'client_id': client_id, 'status': 'error'}
+        elif client_id in duplicates:
+            results[client_id] = {'client_id': client_id, 'status': 'duplicate', 'id': existing.get(client_id)}
+        else:
+            results[client_id] = {'client_id': client_id, 'status': 'created', 'id': str(document['_id'])}
+    return len(documents) - len(write_errors)
+
+def apply_upload(db, user_id, entries):
+    """
+    Validate and store a batch of offline entries for user_id.
+
+    Args:
+        db: The bizdb database.
+        user_id: Owner of the entries.
+        entries: The decoded 'entries' list of the upload.
+
+    Returns:
+        list: One result per entry, in upload order, with status 'created',
+            'duplicate' (with the stored id), 'invalid' (with form errors) or
+            'error' (retry later).
+
+    Raises:
+        SyncError: entries is not a list or is larger than MAX_BATCH.
+    """
+    if not isinstance(entries, list):
+        raise SyncError('entries must be a list')
+    if len(entries) > MAX_BATCH:
+        raise SyncError(f'At most {MAX_BATCH} entries per upload')
+
+    ordered = []
+    results = {}
+    batches = {}
+    for entry in entries:
+        validated = _validate(entry, user_id)
+        if isinstance(validated, dict):
+            ordered.append(validated)
+            continue
+        document, collection, resource = validated
+        ordered.append(document['client_id'])
+        batches.setdefault(collection, ([], set()))
+        batches[collection][0].append(document)
+        batches[collection][1].add(resource)
+
+    touched = set()
+    for collection, (documents, resources) in batches.items():
+        if _insert(db, collection, documents, results, user_id):
+            touched.update(resources)
+    if touched:
+        bump_data_version(db, str(user_id), *sorted(touched))
+    return [results[item] if isinstance(item, str) else item for item in ordered]
+
+__all__ = ['MAX_BATCH', 'SYNC_KINDS', 'SyncError', 'apply_upload']
@@ -302,6 +302,7 @@ def initialize_app_data(app):
                                     }
                                 },
                                 'profile_picture': {'bsonType': ['string', 'null']},
+                                'profile_picture_hash': {'bsonType': ['string', 'null']},
                                 'phone': {'bsonType': ['string', 'null']},
                                 'coin_balance': {'bsonType': ['double', 'null']},
                                 'dark_mode': {'bsonType': ['bool', 'null']},
@@ -356,13 +357,21 @@ def initialize_app_data(app):
                                 'cost': {'bsonType': ['number', 'null'], 'minimum': 0},
                                 'expected_margin': {'bsonType': ['number', 'null'], 'minimum': 0},
                                 'created_at': {'bsonType': 'date'},
-                                'updated_at': {'bsonType': ['date', 'null']}
+                                'updated_at': {'bsonType': ['date', 'null']},
+                                'client_id': {'bsonType': 'string'}
                             }
                         }
                     },
                     'indexes': [
                         {'key': [('user_id', ASCENDING), ('type', ASCENDING)]},
-                        {'key': [('created_at', DESCENDING)]}
+                        {'key': [('created_at', DESCENDING)]},
+                        # Entries uploaded by the sync API carry the client's id; retries must not duplicate them
+                        {'key': [('user_id', ASCENDING), ('client_id', ASCENDING)], 'unique': True,
+                         'partialFilterExpression': {'client_id': {'$type': 'string'}}},
+                        # Change feed of the sync API (helpers.change_log)
+                        {'key': [('user_id', ASCENDING), ('updated_at', ASCENDING), ('_id', ASCENDING)]},
+                        # Keyset pagination of the read API, newest first
+                        {'key': [('user_id', ASCENDING), ('type', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)]}
                     ]
                 },
                 'cashflows': {
@@ -378,13 +387,21 @@ def initialize_app_data(app):
                                 'method': {'bsonType': ['string', 'null']},
                                 'category': {'bsonType': ['string', 'null']},
                                 'created_at': {'bsonType': 'date'},
-                                'updated_at': {'bsonType': ['date', 'null']}
+                                'updated_at': {'bsonType': ['date', 'null']},
+                                'client_id': {'bsonType': 'string'}
                             }
                         }
                     },
                     'indexes': [
                         {'key': [('user_id', ASCENDING), ('type', ASCENDING)]},
-                        {'key': [('created_at', DESCENDING)]}
+                        {'key': [('created_at', DESCENDING)]},
+                        # Entries uploaded by the sync API carry the client's id; retries must not duplicate them
+                        {'key': [('user_id', ASCENDING), ('client_id', ASCENDING)], 'unique': True,
+                         'partialFilterExpression': {'client_id': {'$type': 'string'}}},
+                        # Change feed of the sync API (helpers.change_log)
+                        {'key': [('user_id', ASCENDING), ('updated_at', ASCENDING), ('_id', ASCENDING)]},
+                        # Keyset pagination of the read API, newest first
+                        {'key': [('user_id', ASCENDING), ('type', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)]}
                     ]
                 },
                 'audit_logs': {
@@ -464,7 +481,8 @@ def initialize_app_data(app):
                     },
                     'indexes': [
                         {'key': [('user_id', ASCENDING), ('read', ASCENDING)]},
-                        {'key': [('timestamp', DESCENDING)]}
+                        {'key': [('timestamp', DESCENDING)]},
+                        {'key': [('user_id', ASCENDING), ('timestamp', DESCENDING), ('_id', DESCENDING)]}
                     ]
                 },
                 'kyc_records': {
@@ -566,13 +584,47 @@ def initialize_app_data(app):
                         {'key': [('created_at', DESCENDING)]},
                         {'key': [('expires_at', ASCENDING)], 'expireAfterSeconds': 31536000}
                     ]
+                },
+                'sync_tombstones': {
+                    # One per deleted record or cashflow, so the sync API can report deletions
+                    'validator': {
+                        '$jsonSchema': {
+                            'bsonType': 'object',
+                            'required': ['user_id', 'collection', 'doc_id', 'updated_at'],
+                            'properties': {
+                                'user_id': {'bsonType': 'string'},
+                                'collection': {'enum': ['records', 'cashflows']},
+                                'doc_id': {'bsonType': 'objectId'},
+                                'type': {'bsonType': ['string', 'null']},
+                                'updated_at': {'bsonType': 'date'}
+                            }
+                        }
+                    },
+                    'indexes': [
+                        {'key': [('user_id', ASCENDING), ('updated_at', ASCENDING), ('_id', ASCENDING)]},
+                        {'key': [('updated_at', ASCENDING)], 'expireAfterSeconds': 90 * 24 * 3600}
+                    ]
+                },
+                'import_jobs': {
+                    # Bulk imports (helpers.bulk_import); finished jobs are purged with their files
+                    'indexes': [
+                        {'key': [('user_id', ASCENDING), ('status', ASCENDING), ('updated_at', DESCENDING)]},
+                        {'key': [('user_id', ASCENDING), ('created_at', ASCENDING)]}
+                    ]
+                },
+                'slow_queries': {
+                    # Written by helpers.slow_queries; capped so it never needs pruning
+                    'options': {'capped': True, 'size': 16 * 1024 * 1024, 'max': 20000},
+                    'indexes': [
+                        {'key': [('shape_hash', ASCENDING), ('created_at', DESCENDING)]}
+                    ]
                 }
             }
                 
             for collection_name, config in collection_schemas.items():
                 if collection_name not in collections:
                     try:
-                        db_instance.create_collection(collection_name, validator=config.get('validator', {}))
+                        db_instance.create_collection(collection_name, validator=config.get('validator', {}), **config.get('options', {}))
                         logger.info(f"{trans('general_collection_created', default='Created collection')}: {collection_name}", 
                                    extra={'session_id': 'no-session-id'})
                     except Exception as e:
@@ -614,7 +666,8 @@ def initialize_app_data(app):
                         'report_date': datetime.now(timezone.utc),
                         'summary': 'This is a sample investor report for testing purposes.',
                         'financial_highlights': 'Revenue: $100,000; Expenses: $50,000; Net Profit: $50,000',
-                        'created_at': datetime.now(timezone.utc)
+                        'created_at': datetime.now(timezone.utc),
+                        'updated_at': datetime.now(timezone.utc)
                     }
                     try:
                         result = db_instance.records.insert_one(sample_report)
@@ -657,7 +710,8 @@ def initialize_app_data(app):
                         'name': 'Sample Inventory Item',
                         'cost': 100.0,
                         'expected_margin': 20.0,
-                        'created_at': datetime.now(timezone.utc)
+                        'created_at': datetime.now(timezone.utc),
+                        'updated_at': datetime.now(timezone.utc)
                     }
                     try:
                         result = db_instance.records.insert_one(sample_inventory)
@@ -765,6 +819,28 @@ def initialize_app_data(app):
                                 exc_info=True, extra={'session_id': 'no-session-id'})
                     raise
             
+            # Give records and cashflows written before updated_at was kept on every write one,
+            # so they appear in the sync API's change feed (one-off migration)
+            try:
+                backfill_flag = db_instance.system_config.find_one({'_id': 'updated_at_backfill_completed'})
+                if not (backfill_flag and backfill_flag.get('value') is True):
+                    for collection_name in ('records', 'cashflows'):
+                        result = db_instance[collection_name].update_many(
+                            {'updated_at': None},
+                            [{'$set': {'updated_at': '$created_at'}}]
+                        )
+                        logger.info(f"Backfilled updated_at on {result.modified_count} {collection_name}",
+                                   extra={'session_id': 'no-session-id'})
+                    db_instance.system_config.update_one(
+                        {'_id': 'updated_at_backfill_completed'},
+                        {'$set': {'value': True}},
+                        upsert=True
+                    )
+            except Exception as e:
+                logger.error(f"Failed to backfill updated_at: {str(e)}",
+                            exc_info=True, extra={'session_id': 'no-session-id'})
+                raise
+
             # Run datetime migration
             try:
                 migrate_naive_datetimes()
@@ -783,7 +859,7 @@ class User:
                  is_trial=True, trial_start=None, trial_end=None, is_subscribed=False, 
                  subscription_plan=None, subscription_start=None, subscription_end=None,
                  profile_picture=None, phone=None, coin_balance=0, dark_mode=False, 
-                 settings=None, security_settings=None):
+                 settings=None, security_settings=None, profile_picture_hash=None):
         self.id = id
         self.email = email
         self.username = display_name or email.split('@')[0]
@@ -800,6 +876,7 @@ class User:
         self.subscription_start = subscription_start
         self.subscription_end = subscription_end
         self.profile_picture = profile_picture
+        self.profile_picture_hash = profile_picture_hash
         self.phone = phone
         self.coin_balance = coin_balance
         self.dark_mode = dark_mode
@@ -966,6 +1043,7 @@ def get_user_by_email(db, email):
                 subscription_start=user_doc.get('subscription_start'),
                 subscription_end=user_doc.get('subscription_end'),
                 profile_picture=user_doc.get('profile_picture'),
+                profile_picture_hash=user_doc.get('profile_picture_hash'),
                 phone=user_doc.get('phone'),
                 coin_balance=user_doc.get('coin_balance', 0),
                 dark_mode=user_doc.get('dark_mode', False),
@@ -1009,6 +1087,7 @@ def get_user(db, user_id):
                 subscription_start=user_doc.get('subscription_start'),
                 subscription_end=user_doc.get('subscription_end'),
                 profile_picture=user_doc.get('profile_picture'),
+                profile_picture_hash=user_doc.get('profile_picture_hash'),
                 phone=user_doc.get('phone'),
                 coin_balance=user_doc.get('coin_balance', 0),
                 dark_mode=user_doc.get('dark_mode', False),
@@ -1087,6 +1166,7 @@ def create_record(db, record_data):
         required_fields = ['user_id', 'type', 'created_at']
         if not all(field in record_data for field in required_fields):
             raise ValueError(trans('general_missing_record_fields', default='Missing required record fields'))
+        record_data.setdefault('updated_at', datetime.now(timezone.utc))
         result = db.records.insert_one(record_data)
         logger.info(f"{trans('general_record_created', default='Created record with ID')}: {result.inserted_id}", 
                    extra={'session_id': record_data.get('session_id', 'no-session-id')})
@@ -1159,6 +1239,7 @@ def create_cashflow(db, cashflow_data):
         required_fields = ['user_id', 'type', 'party_name', 'amount', 'created_at']
         if not all(field in cashflow_data for field in required_fields):
             raise ValueError(trans('general_missing_cashflow_fields', default='Missing required cashflow fields'))
+        cashflow_data.setdefault('updated_at', datetime.now(timezone.utc))
         result = db.cashflows.insert_one(cashflow_data)
         logger.info(f"{trans('general_cashflow_created', default='Created cashflow record with ID')}: {result.inserted_id}", 
                    extra={'session_id': cashflow_data.get('session_id', 'no-session-id')})
@@ -1333,6 +1414,7 @@ def to_dict_user(user):
         'subscription_start': user.subscription_start,
         'subscription_end': user.subscription_end,
         'profile_picture': user.profile_picture,
+        'profile_picture_hash': user.profile_picture_hash,
         'phone': user.phone,
         'dark_mode': user.dark_mode,
         'settings': user.settings,
@@ -3,6 +3,7 @@ from flask_login import login_required, current_user
 from utils import get_mongo_db, logger, requires_role, get_limiter
 from translations import trans
 import utils  # <-- Added import for utils
+from helpers.conditional_get import conditional_get
 
 notifications = Blueprint('notifications', __name__, url_prefix='/notifications')
 
@@ -10,6 +11,7 @@ notifications = Blueprint('notifications', __name__, url_prefix='/notifications'
 @login_required
 @utils.requires_role(['trader', 'startup', 'admin'])
 @utils.limiter.limit('10 per minute')
+@conditional_get('notifications', page=False)
 def count():
     """Fetch the count of unread notifications for the authenticated user."""
     try:
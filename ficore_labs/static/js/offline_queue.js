@@ -0,0 +1,138 @@
+// Offline capture for the add forms of receipts, payments, debtors and creditors.
+//
+// A form marked with data-offline-kind submitted while the browser is offline
+// is queued in localStorage (one queue per user) instead of being posted. The
+// queue is uploaded to the sync API in batches whenever the browser is online;
+// every entry carries a client id, so an upload interrupted half-way is simply
+// sent again (see helpers/sync.py).
+(function () {
+    const script = document.currentScript;
+    const userId = script.dataset.user;
+    const syncUrl = script.dataset.syncUrl;
+    if (!userId || !syncUrl || !window.localStorage) {
+        return;
+    }
+    const storageKey = 'ficore-outbox-' + userId;
+    const BATCH_SIZE = 50;
+    const RETRY_INTERVAL_MS = 60000;
+    let flushing = false;
+
+    function load() {
+        try {
+            return JSON.parse(localStorage.getItem(storageKey)) || [];
+        } catch (error) {
+            return [];
+        }
+    }
+
+    function save(entries) {
+        if (entries.length) {
+            localStorage.setItem(storageKey, JSON.stringify(entries));
+        } else {
+            localStorage.removeItem(storageKey);
+        }
+    }
+
+    function newClientId() {
+        if (window.crypto && crypto.randomUUID) {
+            return crypto.randomUUID();
+        }
+        const bytes = new Uint8Array(16);
+        crypto.getRandomValues(bytes);
+        return Array.from(bytes, b => b.toString(16).padStart(2, '0')).join('');
+    }
+
+    function notify(message, type) {
+        if (message && typeof showToast === 'function') {
+            showToast(message, type);
+        }
+    }
+
+    function csrfToken() {
+        return document.querySelector('meta[name="csrf-token"]')?.content || '';
+    }
+
+    function queue(form) {
+        const data = {};
+        new FormData(form).forEach((value, name) => {
+            if (name !== 'csrf_token' && name !== 'submit' && typeof value === 'string') {
+                data[name] = value;
+            }
+        });
+        const entries = load();
+        entries.push({
+            client_id: newClientId(),
+            kind: form.dataset.offlineKind,
+            captured_at: new Date().toISOString(),
+            data: data
+        });
+        save(entries);
+    }
+
+    async function flush() {
+        if (flushing || !navigator.onLine || !load().length) {
+            return;
+        }
+        flushing = true;
+        let synced = 0;
+        let rejected = 0;
+        try {
+            for (;;) {
+                const batch = load().slice(0, BATCH_SIZE);
+                if (!batch.length) {
+                    break;
+                }
+                const response = await fetch(syncUrl, {
+                    method: 'POST',
+                    credentials: 'same-origin',
+                    headers: { 'Content-Type': 'application/json', 'X-CSRFToken': csrfToken() },
+                    body: JSON.stringify({ entries: batch })
+                });
+                if (!response.ok) {
+                    break;
+                }
+                const body = await response.json();
+                const done = new Set();
+                body.results.forEach(result => {
+                    if (result.status === 'created' || result.status === 'duplicate') {
+                        done.add(result.client_id);
+                        synced++;
+                    } else if (result.status === 'invalid') {
+                        done.add(result.client_id);
+                        rejected++;
+                    }
+                });
+                // Re-read: entries may have been queued while the upload was in flight
+                save(load().filter(entry => !done.has(entry.client_id)));
+                if (!done.size) {
+                    break;
+                }
+            }
+        } catch (error) {
+            console.error('Offline entries not uploaded yet:', error);
+        } finally {
+            flushing = false;
+        }
+        if (synced) {
+            notify(script.dataset.msgSynced, 'success');
+        }
+        if (rejected) {
+            notify(script.dataset.msgRejected, 'error');
+        }
+    }
+
+    document.addEventListener('submit', event => {
+        const form = event.target;
+        if (!form.dataset || !form.dataset.offlineKind || navigator.onLine || event.defaultPrevented) {
+            return;
+        }
+        event.preventDefault();
+        queue(form);
+        form.reset();
+        notify(script.dataset.msgQueued, 'info');
+    });
+
+    window.addEventListener('online', flush);
+    window.addEventListener('load', flush);
+    setInterval(flush, RETRY_INTERVAL_MS);
+})();
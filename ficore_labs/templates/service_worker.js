@@ -0,0 +1,104 @@
+// Generated by helpers.service_worker; version {{ version }}
+const VERSION = {{ version | tojson }};
+const STATIC_CACHE = 'ficore-static-' + VERSION;
+const DATA_CACHE = 'ficore-data-' + VERSION;
+const PRECACHE_URLS = {{ precache | tojson }};
+const DIST_PREFIX = {{ dist_prefix | tojson }};
+const SWR_PATHS = {{ swr_paths | tojson }};
+const FORM_PATHS = {{ form_paths | tojson }};
+const BOUNDARY_PATHS = {{ boundary_paths | tojson }};
+const OFFLINE_HTML = {{ ('<!DOCTYPE html><html lang="' ~ lang ~ '"><head><meta charset="UTF-8"><meta name="viewport" content="width=device-width, initial-scale=1.0"><title>' ~ t('general_offline', default='Offline') ~ '</title></head><body style="font-family: sans-serif; text-align: center; padding: 3rem 1rem;"><h1>' ~ t('general_offline', default='Offline') ~ '</h1><p>' ~ t('general_offline_message', default='You are offline. Check your connection and try again.') ~ '</p></body></html>') | tojson }};
+
+self.addEventListener('install', event => {
+    event.waitUntil(
+        caches.open(STATIC_CACHE)
+            .then(cache => cache.addAll(PRECACHE_URLS))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', event => {
+    const current = [STATIC_CACHE, DATA_CACHE];
+    event.waitUntil(
+        caches.keys()
+            .then(names => Promise.all(
+                names
+                    .filter(name => name.startsWith('ficore-') && !current.includes(name))
+                    .map(name => caches.delete(name))
+            ))
+            .then(() => self.clients.claim())
+    );
+});
+
+function cacheFirst(request) {
+    return caches.open(STATIC_CACHE).then(cache =>
+        cache.match(request).then(cached => cached || fetch(request).then(response => {
+            if (response.ok) {
+                cache.put(request, response.clone());
+            }
+            return response;
+        }))
+    );
+}
+
+function staleWhileRevalidate(event) {
+    return caches.open(DATA_CACHE).then(cache =>
+        cache.match(event.request).then(cached => {
+            const refresh = fetch(event.request).then(response => {
+                // A redirect means the session ended (login page); never cache it
+                if (response.ok && !response.redirected) {
+                    cache.put(event.request, response.clone());
+                }
+                return response;
+            });
+            if (cached) {
+                event.waitUntil(refresh.catch(() => undefined));
+                return cached;
+            }
+            return refresh;
+        })
+    );
+}
+
+function networkFallingBackToCache(request) {
+    return caches.open(DATA_CACHE).then(cache =>
+        fetch(request).then(response => {
+            if (response.ok && !response.redirected) {
+                cache.put(request, response.clone());
+            }
+            return response;
+        }).catch(() => cache.match(request).then(cached => cached || networkWithOfflinePage(request)))
+    );
+}
+
+function networkWithOfflinePage(request) {
+    return fetch(request).catch(() => new Response(OFFLINE_HTML, {
+        status: 503,
+        headers: { 'Content-Type': 'text/html; charset=utf-8' }
+    }));
+}
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET') {
+        return;
+    }
+    const url = new URL(request.url);
+    if (url.origin !== self.location.origin) {
+        return;
+    }
+    if (url.pathname.startsWith(DIST_PREFIX) || PRECACHE_URLS.includes(url.pathname)) {
+        event.respondWith(cacheFirst(request));
+    } else if (SWR_PATHS.includes(url.pathname)) {
+        event.respondWith(staleWhileRevalidate(event));
+    } else if (request.mode === 'navigate') {
+        if (BOUNDARY_PATHS.includes(url.pathname)) {
+            event.waitUntil(caches.delete(DATA_CACHE));
+        }
+        if (FORM_PATHS.includes(url.pathname)) {
+            event.respondWith(networkFallingBackToCache(request));
+        } else {
+            event.respondWith(networkWithOfflinePage(request));
+        }
+    }
+});
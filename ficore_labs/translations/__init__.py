@@ -1,7 +1,7 @@
+import importlib
 import logging
 from flask import session, has_request_context, g, request
 from typing import Dict, Optional, Union
-import threading
 
 # Set up logger to match app.py
 root_logger = logging.getLogger('ficore_app')
@@ -25,38 +25,31 @@ class SessionAdapter(logging.LoggerAdapter):
 
 logger = SessionAdapter(root_logger, {})
 
-# Thread-safe set to store logged missing keys
-logged_missing_keys = set()
-lock = threading.Lock()
-
-# Import translation modules for core business finance
-try:
-    # Business Tools (under trader and startup)
-    from .trader.creditors_translations import CREDITORS_TRANSLATIONS
-    from .trader.debtors_translations import DEBTORS_TRANSLATIONS
-    from .trader.payments_translations import PAYMENTS_TRANSLATIONS
-    from .trader.receipts_translations import RECEIPTS_TRANSLATIONS    
-    # General Features
-    from .general_features.general_translations import GENERAL_TRANSLATIONS
-    from .general_features.admin_translations import ADMIN_TRANSLATIONS
-    
-except ImportError as e:
-    logger.error(f"Failed to import translation module: {str(e)}", exc_info=True)
-    raise
+SUPPORTED_LANGUAGES = ('en', 'ha')
+
+# Keys that have already been logged as missing/invalid. Used as a lock-free
+# "seen" set: dict.setdefault is atomic, so only the first caller for a key
+# gets its own marker back and emits the warning.
+logged_missing_keys: Dict[str, object] = {}
 
-# Map module names to translation dictionaries
-translation_modules = {
+# Translation modules for core business finance, as (module path, attribute).
+# They are imported on first use rather than at startup; see get_translation_modules().
+TRANSLATION_MODULE_PATHS = {
     # Business Tools
-    'creditors': CREDITORS_TRANSLATIONS,
-    'debtors': DEBTORS_TRANSLATIONS,
-    'payments': PAYMENTS_TRANSLATIONS,
-    'receipts': RECEIPTS_TRANSLATIONS,
-    'admin': ADMIN_TRANSLATIONS,
-    
+    'creditors': ('.trader.creditors_translations', 'CREDITORS_TRANSLATIONS'),
+    'debtors': ('.trader.debtors_translations', 'DEBTORS_TRANSLATIONS'),
+    'payments': ('.trader.payments_translations', 'PAYMENTS_TRANSLATIONS'),
+    'receipts': ('.trader.receipts_translations', 'RECEIPTS_TRANSLATIONS'),
+    'admin': ('.general_features.admin_translations', 'ADMIN_TRANSLATIONS'),
+
     # General Features
-    'general': GENERAL_TRANSLATIONS,
+    'general': ('.general_features.general_translations', 'GENERAL_TRANSLATIONS'),
 }
 
+# Loaded translation modules and per-language lookup tables, filled on first use
+_translation_modules: Dict[str, Dict[str, Dict[str, str]]] = {}
+COMPILED_TRANSLATIONS: Dict[str, Dict[str, str]] = {}
+
 # Map key prefixes to module names
 KEY_PREFIX_TO_MODULE = {
     # Business Tools prefixes
@@ -65,7 +58,7 @@ KEY_PREFIX_TO_MODULE = {
     'payments_': 'payments',
     'receipts_': 'receipts',
     'admin_': 'admin',
-    
+
     # General Features prefixes
     'general_': 'general',
 }
@@ -81,94 +74,159 @@ GENERAL_SPECIFIC_KEYS = {
     'Upload', 'Back', 'Next', 'Previous', 'Continue', 'Finish', 'Close', 'Open'
 }
 
-# Log loaded translations
-for module_name, translations in translation_modules.items():
-    for lang in ['en', 'ha']:
+def get_module_name_for_key(key: str) -> str:
+    """
+    Return the name of the translation module that owns a key.
+
+    Args:
+        key: The translation key.
+
+    Returns:
+        The module name, based on the key prefix or 'general' by default.
+    """
+    if key in GENERAL_SPECIFIC_KEYS:
+        return 'general'
+    for prefix, mod in KEY_PREFIX_TO_MODULE.items():
+        if key.startswith(prefix):
+            return mod
+    return 'general'
+
+def compile_language_table(modules: Dict[str, Dict[str, Dict[str, str]]], lang: str) -> Dict[str, str]:
+    """
+    Flatten the per-module translation dictionaries into one lookup table for a language.
+
+    Each key is only taken from the module that owns it (see get_module_name_for_key),
+    and the English text is merged in wherever the language has no entry, so a lookup
+    in the compiled table gives the same result as the module/fallback walk.
+
+    Args:
+        modules: Mapping of module name to {lang: {key: text}} dictionaries.
+        lang: Language code to compile.
+
+    Returns:
+        A dictionary of {key: text} for the language.
+    """
+    table = {}
+    for module_name, translations in modules.items():
+        en_dict = translations.get('en', {})
         lang_dict = translations.get(lang, {})
-        logger.info(f"Loaded {len(lang_dict)} translations for module '{module_name}', lang='{lang}'")
+        for source in (en_dict, lang_dict):
+            for key, text in source.items():
+                if get_module_name_for_key(key) == module_name:
+                    table[key] = text
+    return table
+
+def get_translation_modules() -> Dict[str, Dict[str, Dict[str, str]]]:
+    """
+    Import the translation modules on first use.
+
+    Returns:
+        Mapping of module name to its {lang: {key: text}} dictionary.
+    """
+    if len(_translation_modules) < len(TRANSLATION_MODULE_PATHS):
+        for module_name, (module_path, attribute) in TRANSLATION_MODULE_PATHS.items():
+            if module_name in _translation_modules:
+                continue
+            try:
+                module = importlib.import_module(module_path, __name__)
+            except ImportError as e:
+                logger.error(f"Failed to import translation module: {str(e)}", exc_info=True)
+                raise
+            _translation_modules[module_name] = getattr(module, attribute)
+    return _translation_modules
+
+def get_language_table(lang: str) -> Optional[Dict[str, str]]:
+    """
+    Return the compiled lookup table for a language, building it on first use.
+
+    Args:
+        lang: Language code.
+
+    Returns:
+        The {key: text} table, or None if the language is not supported.
+    """
+    table = COMPILED_TRANSLATIONS.get(lang)
+    if table is None and lang in SUPPORTED_LANGUAGES:
+        table = compile_language_table(get_translation_modules(), lang)
+        COMPILED_TRANSLATIONS[lang] = table
+        logger.info(f"Compiled translations: {lang}={len(table)}")
+    return table
+
+def _log_once(log_key: str, level: int, msg: str, *args) -> None:
+    """Log a message only the first time log_key is seen in this process."""
+    marker = object()
+    if logged_missing_keys.setdefault(log_key, marker) is not marker:
+        return
+    current_logger = g.get('logger', logger) if has_request_context() else logger
+    session_id = session.get('sid', 'no-session-id') if has_request_context() else 'no-session-id'
+    current_logger.log(level, msg, *args, extra={'session_id': session_id})
+
+def get_request_language() -> str:
+    """
+    Return the language for the current request, resolved once and cached on g.
+
+    Returns:
+        A supported language code; 'en' outside of a request.
+    """
+    if not has_request_context():
+        return 'en'
+    lang = g.get('lang')
+    if lang is None:
+        lang = session.get('lang', 'en')
+        if lang not in SUPPORTED_LANGUAGES:
+            _log_once(f"invalid_language_{lang}", logging.WARNING, "Invalid language '%s', falling back to 'en'", lang)
+            lang = 'en'
+        g.lang = lang
+    return lang
 
 def trans(key: str, lang: Optional[str] = None, default: Optional[str] = None, **kwargs: str) -> str:
     """
-    Translate a key using the appropriate module's translation dictionary.
-    
+    Translate a key using the precompiled per-language lookup table.
+
     Args:
         key: The translation key (e.g., 'funds_title', 'general_welcome').
-        lang: Language code ('en', 'ha'). Defaults to session['lang'] or 'en'.
+        lang: Language code ('en', 'ha'). Defaults to the request language or 'en'.
         default: Default string to use if translation is missing. Defaults to None (returns key).
         **kwargs: String formatting parameters for the translated string.
-    
+
     Returns:
         The translated string, falling back to English, default, or the key itself if missing.
         Applies string formatting with kwargs if provided, with fallback for missing keys.
     """
-    current_logger = g.get('logger', logger) if has_request_context() else logger
-    session_id = session.get('sid', 'no-session-id') if has_request_context() else 'no-session-id'
-
-    # Default to session language or 'en'
     if lang is None:
-        lang = session.get('lang', 'en') if has_request_context() else 'en'
-    if lang not in ['en', 'ha']:
-        with lock:
-            if f"invalid_language_{lang}" not in logged_missing_keys:
-                logged_missing_keys.add(f"invalid_language_{lang}")
-                current_logger.warning(f"Invalid language '{lang}', falling back to 'en'", extra={'session_id': session_id})
+        lang = get_request_language()
+    table = get_language_table(lang)
+    if table is None:
+        _log_once(f"invalid_language_{lang}", logging.WARNING, "Invalid language '%s', falling back to 'en'", lang)
         lang = 'en'
+        table = get_language_table('en')
 
-    # Determine module based on key prefix or specific keys
-    module_name = 'general'  # Default to general
-    
-    # Check for specific prefix mappings
-    for prefix, mod in KEY_PREFIX_TO_MODULE.items():
-        if key.startswith(prefix):
-            module_name = mod
-            break
-    
-    # Check for general-specific keys (common UI elements)
-    if key in GENERAL_SPECIFIC_KEYS:
-        module_name = 'general'
-
-    module = translation_modules.get(module_name, translation_modules['general'])
-    lang_dict = module.get(lang, {})
-
-    # Get translation
-    translation = lang_dict.get(key)
-
-    # Fallback to English, then default, then key
+    translation = table.get(key)
     if translation is None:
-        en_dict = module.get('en', {})
-        translation = en_dict.get(key, default or key)
-        if translation == default or translation == key:
-            with lock:
-                if key not in logged_missing_keys:
-                    logged_missing_keys.add(key)
-                    current_logger.warning(
-                        f"Missing translation for key='{key}' in module '{module_name}', lang='{lang}'",
-                        extra={'session_id': session_id}
-                    )
+        translation = default or key
+        _log_once(
+            key, logging.WARNING,
+            "Missing translation for key='%s' in module '%s', lang='%s'",
+            key, get_module_name_for_key(key), lang
+        )
 
     # Apply string formatting with fallback for missing kwargs
     if kwargs:
         try:
             return translation.format(**kwargs)
         except KeyError as e:
-            with lock:
-                error_key = f"formatting_error_{key}_{lang}"
-                if error_key not in logged_missing_keys:
-                    logged_missing_keys.add(error_key)
-                    current_logger.error(
-                        f"Formatting error for key='{key}', lang='{lang}', kwargs={kwargs}, error='Missing key: {str(e)}'",
-                        extra={'session_id': session_id}
-                    )
+            _log_once(
+                f"formatting_error_{key}_{lang}", logging.ERROR,
+                "Formatting error for key='%s', lang='%s', kwargs=%s, error='Missing key: %s'",
+                key, lang, kwargs, e
+            )
             return translation  # Return unformatted string as fallback
         except ValueError as e:
-            with lock:
-                error_key = f"formatting_error_{key}_{lang}"
-                if error_key not in logged_missing_keys:
-                    logged_missing_keys.add(error_key)
-                    current_logger.error(
-                        f"Formatting failed for key='{key}', lang='{lang}', kwargs={kwargs}, error='Invalid format: {str(e)}'",
-                        extra={'session_id': session_id}
-                    )
+            _log_once(
+                f"formatting_error_{key}_{lang}", logging.ERROR,
+                "Formatting failed for key='%s', lang='%s', kwargs=%s, error='Invalid format: %s'",
+                key, lang, kwargs, e
+            )
             return translation  # Return unformatted string as fallback
     return translation
 
@@ -177,14 +235,14 @@ def get_translations(lang: Optional[str] = None) -> Dict[str, callable]:
     Return a dictionary with a trans callable for the specified language.
 
     Args:
-        lang: Language code ('en', 'ha'). Defaults to session['lang'] or 'en'.
+        lang: Language code ('en', 'ha'). Defaults to the request language or 'en'.
 
     Returns:
         A dictionary with a 'trans' function that translates keys for the specified language.
     """
     if lang is None:
-        lang = session.get('lang', 'en') if has_request_context() else 'en'
-    if lang not in ['en', 'ha']:
+        lang = get_request_language()
+    if lang not in SUPPORTED_LANGUAGES:
         logger.warning(f"Invalid language '{lang}', falling back to 'en'", extra={'session_id': session.get('sid', 'no-session-id')})
         lang = 'en'
     return {
@@ -198,7 +256,7 @@ def get_all_translations() -> Dict[str, Dict[str, Dict[str, str]]]:
     Returns:
         A dictionary with module names as keys and their translation dictionaries as values.
     """
-    return translation_modules.copy()
+    return get_translation_modules().copy()
 
 def get_module_translations(module_name: str, lang: Optional[str] = None) -> Dict[str, str]:
     """
@@ -212,11 +270,11 @@ def get_module_translations(module_name: str, lang: Optional[str] = None) -> Dic
         Dictionary of translations for the specified module and language.
     """
     if lang is None:
-        lang = session.get('lang', 'en') if has_request_context() else 'en'
-    if lang not in ['en', 'ha']:
+        lang = get_request_language()
+    if lang not in SUPPORTED_LANGUAGES:
         logger.warning(f"Invalid language '{lang}', falling back to 'en'", extra={'session_id': session.get('sid', 'no-session-id')})
         lang = 'en'
-    module = translation_modules.get(module_name, {})
+    module = get_translation_modules().get(module_name, {})
     return module.get(lang, {})
 
 def register_translation(app):
@@ -239,5 +297,7 @@ def register_translation(app):
                 f"Set default language to {session['lang']} for session {session.get('sid', 'no-session-id')}",
                 extra={'session_id': session.get('sid', 'no-session-id'), 'ip_address': request.remote_addr}
             )
+        # Resolve the request language once; trans() reads it from g
+        get_request_language()
 
-__all__ = ['trans', 'get_translations', 'get_all_translations', 'get_module_translations', 'register_translation']
+__all__ = ['trans', 'get_request_language', 'get_language_table', 'get_translations', 'get_all_translations', 'get_module_translations', 'register_translation']
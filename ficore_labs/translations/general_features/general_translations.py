@@ -417,6 +417,32 @@ GENERAL_TRANSLATIONS = {
         'general_disabled': 'Disabled',
         'general_online': 'Online',
         'general_offline': 'Offline',
+        'general_offline_message': 'You are offline. Check your connection and try again.',
+        'general_saved_offline': 'Saved offline. It will be uploaded when you are back online.',
+        'general_offline_synced': 'Entries saved offline have been uploaded.',
+        'general_offline_rejected': 'Some entries saved offline were invalid and could not be uploaded.',
+        'general_import': 'Import',
+        'general_import_title': 'Import from a Spreadsheet',
+        'general_import_subtitle': 'Bring in your existing records from a CSV or Excel file',
+        'general_import_kind': 'What are you importing?',
+        'general_import_file': 'CSV or Excel file',
+        'general_import_file_type': 'Only .csv and .xlsx files can be imported',
+        'general_import_hint': 'The first row must hold the column names. You choose which column goes where on the next page.',
+        'general_import_upload': 'Upload',
+        'general_import_running': 'An import is already running. Please wait for it to finish.',
+        'general_import_not_found': 'Import not found',
+        'general_import_map_columns': 'Choose the column that holds each field. Fields marked * are required.',
+        'general_import_skip': '(not in file)',
+        'general_import_column': 'Column',
+        'general_import_start': 'Start Import',
+        'general_import_processed': 'Rows read',
+        'general_import_created': 'Imported',
+        'general_import_invalid': 'Rejected',
+        'general_import_done': 'Import complete.',
+        'general_import_truncated': 'Only the first 50,000 rows were read.',
+        'general_import_failed': 'The import stopped because of an error. Rows counted as imported were saved.',
+        'general_import_download_errors': 'Download rejected rows',
+        'general_import_view': 'View Records',
         'general_available': 'Available',
         'general_unavailable': 'Unavailable',
         'general_pending': 'Pending',
@@ -1238,6 +1264,32 @@ GENERAL_TRANSLATIONS = {
         'general_disabled': 'An Kashe',
         'general_online': 'Kan Layi',
         'general_offline': 'Ba Kan Layi Ba',
+        'general_offline_message': 'Ba ka kan layi. Duba haɗin intanet ɗinka ka sake gwadawa.',
+        'general_saved_offline': 'An adana ba tare da intanet ba. Za a tura shi idan kun dawo kan layi.',
+        'general_offline_synced': 'An tura bayanan da aka adana ba tare da intanet ba.',
+        'general_offline_rejected': 'Wasu bayanan da aka adana ba tare da intanet ba ba su da inganci, ba a tura su ba.',
+        'general_import': 'Shigo da Bayanai',
+        'general_import_title': 'Shigo da Bayanai daga Takardar Lissafi',
+        'general_import_subtitle': 'Kawo bayanan da kake da su daga fayil ɗin CSV ko Excel',
+        'general_import_kind': 'Me kake shigowa da shi?',
+        'general_import_file': 'Fayil ɗin CSV ko Excel',
+        'general_import_file_type': 'Fayilolin .csv da .xlsx kaɗai ake iya shigowa da su',
+        'general_import_hint': 'Layin farko dole ya ƙunshi sunayen ginshiƙai. Za ka zaɓi inda kowane ginshiƙi zai tafi a shafi na gaba.',
+        'general_import_upload': 'Ɗora',
+        'general_import_running': 'Akwai shigowa da ke gudana. Da fatan za a jira ta kammala.',
+        'general_import_not_found': 'Ba a sami shigowar ba',
+        'general_import_map_columns': 'Zaɓi ginshiƙin da ke ɗauke da kowane fili. Filayen da ke da * dole ne.',
+        'general_import_skip': '(babu a fayil)',
+        'general_import_column': 'Ginshiƙi',
+        'general_import_start': 'Fara Shigowa',
+        'general_import_processed': 'Layukan da aka karanta',
+        'general_import_created': 'An shigo da su',
+        'general_import_invalid': 'An ƙi su',
+        'general_import_done': 'An kammala shigowa.',
+        'general_import_truncated': 'Layuka 50,000 na farko kaɗai aka karanta.',
+        'general_import_failed': 'Shigowar ta tsaya saboda kuskure. An adana layukan da aka ƙidaya a matsayin waɗanda aka shigo da su.',
+        'general_import_download_errors': 'Sauke layukan da aka ƙi',
+        'general_import_view': 'Duba Bayanai',
         'general_available': 'Akwai',
         'general_unavailable': 'Babu',
         'general_pending': 'Ana Jira',
@@ -0,0 +1,160 @@
+"""
+Compile-time translation for Jinja templates.
+
+Templates call t('key') / trans('key') with literal keys thousands of times per
+render. InlineTranslationExtension rewrites those calls into string constants
+while a template is being compiled, using the language the template is being
+compiled for. TranslatingEnvironment keeps one compiled template per language,
+and LanguageBytecodeCache keeps one bytecode file per language, so a warm render
+does no translation work at all for constant keys.
+
+Calls with a dynamic key, extra kwargs (other than default) or an explicit
+lang, and keys missing from the compiled table, are left untouched and go
+through translations.trans() at render time as before.
+"""
+import hashlib
+import os
+import weakref
+from contextvars import ContextVar
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from flask.templating import Environment
+from jinja2 import FileSystemBytecodeCache
+from jinja2.ext import Extension
+from jinja2.lexer import (
+    Token, TokenStream, TOKEN_NAME, TOKEN_LPAREN, TOKEN_RPAREN, TOKEN_STRING,
+    TOKEN_COMMA, TOKEN_ASSIGN, TOKEN_DOT
+)
+
+from translations import get_language_table, get_request_language
+
+# Language of the template currently being compiled; None means "don't inline"
+# (e.g. templates built with from_string outside of the loader).
+_compile_language: ContextVar[Optional[str]] = ContextVar('compile_language', default=None)
+
+TRANSLATION_CALLABLES = frozenset({'t', 'trans'})
+
+def _match_constant_call(tokens: List[Token], start: int) -> Optional[Tuple[int, str]]:
+    """
+    Match t('key') or t('key', default='...') starting at tokens[start].
+
+    Returns:
+        (index of the closing paren, key) or None if the call is not constant.
+    """
+    def type_at(i):
+        return tokens[i].type if i < len(tokens) else None
+
+    if type_at(start + 1) != TOKEN_LPAREN or type_at(start + 2) != TOKEN_STRING:
+        return None
+    key = tokens[start + 2].value
+    i = start + 3
+    if type_at(i) == TOKEN_COMMA and type_at(i + 1) == TOKEN_NAME and tokens[i + 1].value == 'default' \
+            and type_at(i + 2) == TOKEN_ASSIGN and type_at(i + 3) == TOKEN_STRING:
+        i += 4
+    if type_at(i) == TOKEN_COMMA:
+        i += 1
+    if type_at(i) != TOKEN_RPAREN:
+        return None
+    return i, key
+
+class InlineTranslationExtension(Extension):
+    """Replace constant-key translation calls with the translated string at compile time."""
+
+    def filter_stream(self, stream: TokenStream) -> Iterable[Token]:
+        lang = _compile_language.get()
+        table = get_language_table(lang) if lang else None
+        if table is None:
+            return stream
+        return self._inline(list(stream), table)
+
+    @staticmethod
+    def _inline(tokens: List[Token], table) -> Iterator[Token]:
+        i = 0
+        previous_type = None
+        while i < len(tokens):
+            token = tokens[i]
+            if token.type == TOKEN_NAME and token.value in TRANSLATION_CALLABLES and previous_type != TOKEN_DOT:
+                match = _match_constant_call(tokens, i)
+                if match is not None:
+                    end, key = match
+                    text = table.get(key)
+                    if text is not None:
+                        yield Token(token.lineno, TOKEN_STRING, text)
+                        previous_type = TOKEN_STRING
+                        i = end + 1
+                        continue
+            yield token
+            previous_type = token.type
+            i += 1
+
+class TranslatingEnvironment(Environment):
+    """Flask Jinja environment that caches one compiled template per language."""
+
+    def _load_template(self, name, globals):
+        if self.loader is None:
+            raise TypeError("no loader for this environment specified")
+        lang = get_request_language()
+        cache_key = (weakref.ref(self.loader), name, lang)
+        if self.cache is not None:
+            template = self.cache.get(cache_key)
+            if template is not None and (not self.auto_reload or template.is_up_to_date):
+                if globals:
+                    template.globals.update(globals)
+                return template
+
+        token = _compile_language.set(lang)
+        try:
+            template = self.loader.load(self, name, self.make_globals(globals))
+        finally:
+            _compile_language.reset(token)
+
+        if self.cache is not None:
+            self.cache[cache_key] = template
+        return template
+
+class LanguageBytecodeCache(FileSystemBytecodeCache):
+    """
+    Filesystem bytecode cache with one entry per template and language.
+
+    The source checksum also covers the language's translation table, so
+    bytecode with inlined strings is discarded when translations change.
+    """
+
+    _translations_digests = {}
+
+    @classmethod
+    def translations_digest(cls, lang) -> str:
+        digest = cls._translations_digests.get(lang)
+        if digest is None:
+            sha = hashlib.sha1()
+            for key, text in sorted((get_language_table(lang) or {}).items()):
+                sha.update(f"{key}\0{text}\0".encode('utf-8'))
+            digest = cls._translations_digests[lang] = sha.hexdigest()
+        return digest
+
+    def get_cache_key(self, name, filename=None):
+        return f"{super().get_cache_key(name, filename)}-{_compile_language.get() or 'none'}"
+
+    def get_source_checksum(self, source):
+        digest = self.translations_digest(_compile_language.get())
+        return hashlib.sha1((source + digest).encode('utf-8')).hexdigest()
+
+def configure_template_translations(app, bytecode_cache_dir=None):
+    """
+    Set up compile-time translation for an app's templates.
+
+    Must be called before app.jinja_env is first accessed.
+
+    Args:
+        app: Flask application instance.
+        bytecode_cache_dir: Directory for compiled template bytecode. Defaults to Jinja's temp dir.
+    """
+    if bytecode_cache_dir:
+        os.makedirs(bytecode_cache_dir, exist_ok=True)
+    options = dict(app.jinja_options)
+    options['extensions'] = list(options.get('extensions', [])) + [InlineTranslationExtension]
+    options['bytecode_cache'] = LanguageBytecodeCache(bytecode_cache_dir)
+    app.jinja_options = options
+    app.jinja_environment = TranslatingEnvironment
+
+__all__ = ['InlineTranslationExtension', 'TranslatingEnvironment', 'LanguageBytecodeCache', 'configure_template_translations']
@@ -5,7 +5,7 @@ import os
 import certifi
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
-from flask import session, has_request_context, current_app, url_for, request
+from flask import session, has_request_context, current_app, url_for, request, g
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from pymongo import MongoClient
@@ -13,6 +13,8 @@ from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
 from werkzeug.routing import BuildError
 from wtforms import ValidationError
 from flask_login import current_user
+from helpers.logging_helpers import get_log_context
+from helpers.metrics import record_cache_lookup
 
 # Initialize extensions
 limiter = Limiter(
@@ -41,23 +43,8 @@ root_logger.addHandler(handler)
 
 class SessionAdapter(logging.LoggerAdapter):
     def process(self, msg, kwargs):
-        kwargs['extra'] = kwargs.get('extra', {})
-        session_id = 'no-session-id'
-        ip_address = 'unknown'
-        user_role = 'anonymous'
-        try:
-            if has_request_context():
-                session_id = session.get('sid', 'no-session-id')
-                ip_address = request.remote_addr
-                user_role = current_user.role if current_user.is_authenticated else 'anonymous'
-            else:
-                session_id = f'non-request-{str(uuid.uuid4())[:8]}'
-        except Exception as e:
-            session_id = f'session-error-{str(uuid.uuid4())[:8]}'
-            kwargs['extra']['session_error'] = str(e)
-        kwargs['extra']['session_id'] = session_id
-        kwargs['extra']['ip_address'] = ip_address
-        kwargs['extra']['user_role'] = user_role
+        # Request context is resolved once per request (see helpers.logging_helpers)
+        kwargs['extra'] = {**kwargs.get('extra', {}), **get_log_context()}
         return msg, kwargs
 
 logger = SessionAdapter(root_logger, {})
@@ -205,28 +192,91 @@ ADMIN_NAV = [
 
 ALL_TOOLS = []
 
-def initialize_tools_with_urls(app):
+# Most hosts for which navigation tables are kept when SERVER_NAME is unset
+NAVIGATION_HOST_CACHE_LIMIT = 16
+
+def _navigation_url_builder(app):
+    """Return a callable that builds external URLs for navigation tables."""
+    server_name = app.config.get('SERVER_NAME')
+    if not server_name:
+        return lambda endpoint: url_for(endpoint, _external=True)
+    adapter = app.url_map.bind(
+        server_name,
+        script_name=app.config.get('APPLICATION_ROOT') or '/',
+        url_scheme=app.config.get('PREFERRED_URL_SCHEME') or 'http'
+    )
+    return lambda endpoint: adapter.build(endpoint, force_external=True)
+
+def build_navigation_tables(app):
+    """
+    Resolve navigation, tools and breadcrumbs for every role once.
+
+    Returns:
+        dict: 'nav' and 'tools' keyed by 'admin'/'trader', and 'breadcrumbs'
+        keyed by role group then endpoint.
+    """
+    from helpers.breadcrumb_helper import build_breadcrumb_table
+    build_url = _navigation_url_builder(app)
+    return {
+        'nav': {
+            'admin': generate_tools_with_urls(ADMIN_NAV, build_url),
+            'trader': generate_tools_with_urls(TRADER_NAV, build_url),
+        },
+        'tools': {
+            'admin': generate_tools_with_urls(ADMIN_TOOLS, build_url),
+            'trader': generate_tools_with_urls(TRADER_TOOLS, build_url),
+        },
+        'breadcrumbs': build_breadcrumb_table(build_url),
+    }
+
+def get_navigation_tables():
+    """
+    Return the navigation tables for the current app, building them on first use.
+
+    With SERVER_NAME configured the URLs are the same for every request and one
+    set of tables is kept per app; otherwise tables are kept per request host.
+    """
+    app = current_app._get_current_object()
+    tables_by_host = app.extensions.setdefault('navigation_tables', {})
+    key = app.config.get('SERVER_NAME') or request.host_url
+    tables = tables_by_host.get(key)
+    record_cache_lookup('navigation', tables is not None)
+    if tables is None:
+        tables = build_navigation_tables(app)
+        if len(tables_by_host) < NAVIGATION_HOST_CACHE_LIMIT:
+            tables_by_host[key] = tables
+        if len(tables_by_host) == 1:
+            _set_tools_with_urls(tables)
+        logger.info('Built navigation tables', extra={'session_id': 'no-session-id'})
+    return tables
+
+def _set_tools_with_urls(tables):
     global TRADER_TOOLS, TRADER_NAV, ADMIN_TOOLS, ADMIN_NAV, ALL_TOOLS
+    TRADER_TOOLS = tables['tools']['trader']
+    TRADER_NAV = tables['nav']['trader']
+    ADMIN_TOOLS = tables['tools']['admin']
+    ADMIN_NAV = tables['nav']['admin']
+    ALL_TOOLS = TRADER_TOOLS + ADMIN_TOOLS
+
+def initialize_tools_with_urls(app):
     try:
         with app.app_context():
-            TRADER_TOOLS = generate_tools_with_urls(TRADER_TOOLS)
-            TRADER_NAV = generate_tools_with_urls(TRADER_NAV)
-            ADMIN_TOOLS = generate_tools_with_urls(ADMIN_TOOLS)
-            ADMIN_NAV = generate_tools_with_urls(ADMIN_NAV)
-            ALL_TOOLS = TRADER_TOOLS + ADMIN_TOOLS
+            _set_tools_with_urls(build_navigation_tables(app))
             logger.info('Initialized tools and navigation with resolved URLs', extra={'session_id': 'no-session-id'})
     except Exception as e:
         logger.error(f'Error initializing tools with URLs: {str(e)}', extra={'session_id': 'no-session-id'})
         raise
 
-def generate_tools_with_urls(tools):
+def generate_tools_with_urls(tools, build_url=None):
+    if build_url is None:
+        build_url = lambda endpoint: url_for(endpoint, _external=True)
     result = []
     for tool in tools:
         try:
             if not tool.get('endpoint'):
                 logger.error(f"Missing endpoint for tool {tool.get('label', 'unknown')}", extra={'session_id': 'no-session-id'})
                 continue
-            url = url_for(tool['endpoint'], _external=True)
+            url = build_url(tool['endpoint'])
             icon = tool.get('icon', 'bi-question-circle')
             if not icon or not icon.startswith('bi-'):
                 logger.warning(f"Invalid icon for tool {tool.get('label', 'unknown')}: {icon}", extra={'session_id': 'no-session-id'})
@@ -331,30 +381,40 @@ def create_anonymous_session():
         session['is_anonymous'] = True
         session.modified = True
 
+def parse_currency(value, max_value=10000000000):
+    """
+    Parse an amount such as 'NGN 2,500.75'. Like clean_currency, but raises
+    without logging, for callers that expect bad input (e.g. bulk imports).
+
+    Raises:
+        ValidationError: value is not a valid, non-negative amount up to max_value.
+    """
+    if value is None or (isinstance(value, str) and value.strip() == ''):
+        return 0.0
+    if isinstance(value, (int, float)):
+        value = float(value)
+        if value > max_value:
+            raise ValidationError(f"Input cannot exceed {max_value:,}")
+        if value < 0:
+            raise ValidationError("Negative currency values are not allowed")
+        return value
+    value_str = str(value).strip()
+    cleaned = re.sub(r'[^\d.]', '', value_str.replace('NGN', '').replace('₦', '').replace('$', '').replace('€', '').replace('£', '').replace(',', ''))
+    parts = cleaned.split('.')
+    if len(parts) > 2 or cleaned.count('-') > 1 or (cleaned.count('-') == 1 and not cleaned.startswith('-')):
+        raise ValidationError('Invalid currency format')
+    if not cleaned or cleaned == '.':
+        raise ValidationError('Invalid currency format')
+    result = float(cleaned)
+    if result < 0:
+        raise ValidationError('Negative currency values are not allowed')
+    if result > max_value:
+        raise ValidationError(f"Input cannot exceed {max_value:,}")
+    return result
+
 def clean_currency(value, max_value=10000000000):
     try:
-        if value is None or (isinstance(value, str) and value.strip() == ''):
-            return 0.0
-        if isinstance(value, (int, float)):
-            value = float(value)
-            if value > max_value:
-                raise ValidationError(f"Input cannot exceed {max_value:,}")
-            if value < 0:
-                raise ValidationError("Negative currency values are not allowed")
-            return value
-        value_str = str(value).strip()
-        cleaned = re.sub(r'[^\d.]', '', value_str.replace('NGN', '').replace('₦', '').replace('$', '').replace('€', '').replace('£', '').replace(',', ''))
-        parts = cleaned.split('.')
-        if len(parts) > 2 or cleaned.count('-') > 1 or (cleaned.count('-') == 1 and not cleaned.startswith('-')):
-            raise ValidationError('Invalid currency format')
-        if not cleaned or cleaned == '.':
-            raise ValidationError('Invalid currency format')
-        result = float(cleaned)
-        if result < 0:
-            raise ValidationError('Negative currency values are not allowed')
-        if result > max_value:
-            raise ValidationError(f"Input cannot exceed {max_value:,}")
-        return result
+        return parse_currency(value, max_value)
     except Exception as e:
         logger.error(f"Error in clean_currency for value '{value}': {str(e)}", extra={'session_id': session.get('sid', 'no-session-id')})
         raise ValidationError('Invalid currency format')
@@ -392,111 +452,118 @@ def get_mongo_db():
         logger.error(f"Failed to connect to MongoDB: {str(e)}", extra={'session_id': 'no-session-id'})
         raise RuntimeError(f"Failed to connect to MongoDB: {str(e)}")
 
+class Entitlement:
+    """
+    What the current user may do, computed once per request (see get_entitlement).
+
+    Attributes:
+        can_interact: True if the user may create or change data.
+        read_only: True for authenticated users whose trial and subscription have lapsed.
+        banner: True if the subscription banner should be shown.
+        reason: 'anonymous', 'admin', 'subscription', 'trial' or 'expired'.
+    """
+    __slots__ = ('user_id', 'can_interact', 'read_only', 'banner', 'reason')
+
+    def __init__(self, user_id, reason):
+        self.user_id = user_id
+        self.reason = reason
+        self.can_interact = reason in ('admin', 'subscription', 'trial')
+        self.read_only = reason == 'expired'
+        self.banner = reason == 'expired'
+
+    def __repr__(self):
+        return f"<Entitlement {self.user_id}: {self.reason}>"
+
+def _as_utc(value):
+    if value is None or not isinstance(value, datetime):
+        return None
+    return value.replace(tzinfo=ZoneInfo("UTC")) if value.tzinfo is None else value
+
+def compute_entitlement(user, now=None):
+    """
+    Work out a user's entitlement from the attributes loaded with the user.
+
+    An admin always has access; otherwise an active subscription (one without
+    an end date counts as active) or an unexpired trial grants it.
+    """
+    if not user or not user.is_authenticated:
+        return Entitlement(None, 'anonymous')
+    user_id = getattr(user, 'id', None)
+    if getattr(user, 'role', None) == 'admin':
+        return Entitlement(user_id, 'admin')
+    now = now or datetime.now(ZoneInfo("UTC"))
+    if getattr(user, 'is_subscribed', False):
+        subscription_end = _as_utc(getattr(user, 'subscription_end', None))
+        if subscription_end is None or subscription_end > now:
+            return Entitlement(user_id, 'subscription')
+    if getattr(user, 'is_trial', False):
+        trial_end = _as_utc(getattr(user, 'trial_end', None))
+        if trial_end is not None and trial_end > now:
+            return Entitlement(user_id, 'trial')
+    return Entitlement(user_id, 'expired')
+
+def get_entitlement(user=None):
+    """
+    Return the entitlement for user (default: current_user), memoised on g.
+
+    The first lookup in a request computes and logs it; later calls from
+    decorators, routes and templates reuse the same object.
+    """
+    if user is None:
+        user = current_user
+    if not has_request_context():
+        return compute_entitlement(user)
+    user_id = getattr(user, 'id', None) if user and user.is_authenticated else None
+    entitlement = g.get('entitlement')
+    # A login or logout mid-request changes the user the cache was built for
+    if entitlement is None or entitlement.user_id != user_id:
+        try:
+            entitlement = compute_entitlement(user)
+        except Exception as e:
+            logger.error("Error computing entitlement for user %s: %s", user_id, e, extra={'user_id': user_id})
+            entitlement = Entitlement(user_id, 'expired' if user_id else 'anonymous')
+        if entitlement.read_only:
+            logger.info("User %s has no active subscription or trial", user_id, extra={'user_id': user_id})
+        else:
+            logger.debug("User %s entitlement: %s", user_id, entitlement.reason)
+        g.entitlement = entitlement
+    return entitlement
+
 def requires_role(role):
     def decorator(f):
         from functools import wraps
         from flask import redirect, url_for, flash
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            with current_app.app_context():
-                if not current_user.is_authenticated:
-                    flash('Please log in to access this page.', 'warning')
-                    return redirect(url_for('users.login'))
-                if is_admin():
-                    return f(*args, **kwargs)
-                allowed_roles = role if isinstance(role, list) else [role]
-                if current_user.role not in allowed_roles:
-                    flash('You do not have permission to access this page.', 'danger')
-                    return redirect(url_for('dashboard.index'))
-                if not current_user.is_trial_active():
-                    logger.info(f"User {current_user.id} trial expired, redirecting to subscription", extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': current_user.id})
-                    return redirect(url_for('subscribe_bp.subscription_required'))
+            if not current_user.is_authenticated:
+                flash('Please log in to access this page.', 'warning')
+                return redirect(url_for('users.login'))
+            if is_admin():
                 return f(*args, **kwargs)
+            allowed_roles = role if isinstance(role, list) else [role]
+            if current_user.role not in allowed_roles:
+                flash('You do not have permission to access this page.', 'danger')
+                return redirect(url_for('dashboard.index'))
+            if not get_entitlement().can_interact:
+                logger.info(f"User {current_user.id} trial expired, redirecting to subscription", extra={'user_id': current_user.id})
+                return redirect(url_for('subscribe_bp.subscription_required'))
+            return f(*args, **kwargs)
         return decorated_function
     return decorator
 
 def is_admin():
     try:
-        with current_app.app_context():
-            return current_user.is_authenticated and current_user.role == 'admin'
+        return current_user.is_authenticated and current_user.role == 'admin'
     except Exception:
         return False
 
 def can_user_interact(user):
-    try:
-        with current_app.app_context():
-            if not user or not user.is_authenticated:
-                logger.info("User interaction denied: No authenticated user", extra={'session_id': session.get('sid', 'no-session-id')})
-                return False
-            if user.role == 'admin':
-                logger.info(f"User {user.id} allowed to interact: Admin role", extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': user.id})
-                return True
-            if user.get('is_subscribed', False):
-                subscription_end = user.get('subscription_end')
-                if subscription_end:
-                    subscription_end_aware = (
-                        subscription_end.replace(tzinfo=ZoneInfo("UTC"))
-                        if subscription_end.tzinfo is None
-                        else subscription_end
-                    )
-                    if subscription_end_aware > datetime.now(ZoneInfo("UTC")):
-                        logger.info(f"User {user.id} allowed to interact: Active subscription", extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': user.id})
-                        return True
-                    logger.info(f"User {user.id} subscription expired: {subscription_end_aware}", extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': user.id})
-                else:
-                    logger.info(f"User {user.id} allowed to interact: Active subscription (no end date)", extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': user.id})
-                    return True
-            if user.get('is_trial', False):
-                trial_end = user.get('trial_end')
-                if trial_end:
-                    trial_end_aware = (
-                        trial_end.replace(tzinfo=ZoneInfo("UTC"))
-                        if trial_end.tzinfo is None
-                        else trial_end
-                    )
-                    if trial_end_aware > datetime.now(ZoneInfo("UTC")):
-                        logger.info(f"User {user.id} allowed to interact: Active trial", extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': user.id})
-                        return True
-                    logger.info(f"User {user.id} trial expired: {trial_end_aware}", extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': user.id})
-            logger.info(f"User {user.id} interaction denied: No active subscription or trial", extra={'session_id': session.get('sid', 'no-session-id'), 'user_id': user.id})
-            return False
-    except Exception as e:
-        logger.error(f"Error checking user interaction for user {user.get('id', 'unknown')}: {str(e)}", extra={'session_id': session.get('sid', 'no-session-id')})
-        return False
+    """Return True if user may create or change data (memoised per request)."""
+    return get_entitlement(user).can_interact
 
 def should_show_subscription_banner(user):
-    try:
-        with current_app.app_context():
-            if not user or not user.is_authenticated:
-                return False
-            if user.role == 'admin':
-                return False
-            if user.get('is_subscribed', False):
-                subscription_end = user.get('subscription_end')
-                if subscription_end:
-                    subscription_end_aware = (
-                        subscription_end.replace(tzinfo=ZoneInfo("UTC"))
-                        if subscription_end.tzinfo is None
-                        else subscription_end
-                    )
-                    if subscription_end_aware > datetime.now(ZoneInfo("UTC")):
-                        return False
-                else:
-                    return False
-            if user.get('is_trial', False):
-                trial_end = user.get('trial_end')
-                if trial_end:
-                    trial_end_aware = (
-                        trial_end.replace(tzinfo=ZoneInfo("UTC"))
-                        if trial_end.tzinfo is None
-                        else trial_end
-                    )
-                    if trial_end_aware > datetime.now(ZoneInfo("UTC")):
-                        return False
-            return True
-    except Exception as e:
-        logger.error(f"Error checking subscription banner for user {user.get('id', 'unknown')}: {str(e)}", extra={'session_id': session.get('sid', 'no-session-id')})
-        return False
+    """Return True if the subscription banner should be shown (memoised per request)."""
+    return get_entitlement(user).banner
 
 def format_currency(amount, currency='₦', lang=None, include_symbol=True):
     try:
@@ -626,10 +693,11 @@ def track_user_activity(activity_type, description, amount=None, related_id=None
         # Don't raise to avoid breaking main functionality
 
 __all__ = [
-    'clean_currency', 'log_tool_usage', 'get_limiter', 'create_anonymous_session', 
+    'clean_currency', 'parse_currency', 'log_tool_usage', 'get_limiter', 'create_anonymous_session', 
     'is_valid_email', 'get_mongo_db', 'requires_role', 'is_admin', 'can_user_interact',
+    'Entitlement', 'compute_entitlement', 'get_entitlement',
     'should_show_subscription_banner', 'format_currency', 'format_date', 'sanitize_input', 
     'generate_unique_id', 'validate_required_fields', 'get_user_language', 'log_user_action', 
-    'track_user_activity', 'initialize_tools_with_urls', 'TRADER_TOOLS', 'TRADER_NAV', 
+    'track_user_activity', 'initialize_tools_with_urls', 'get_navigation_tables', 'TRADER_TOOLS', 'TRADER_NAV', 
     'ADMIN_TOOLS', 'ADMIN_NAV', 'ALL_TOOLS', 'get_explore_features'
 ]